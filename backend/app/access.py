@@ -0,0 +1,112 @@
+"""
+Access Context.
+The caller's identity and memberships, resolved once per request.
+
+Routes used to reload the User and walk `user.teams` / `team.projects` for
+every permission check. The context is built from the JWT on first use and
+kept on flask.g. Existence and team ids are read from the database with one
+indexed query the first time they are needed, never from the user summary
+cache: other workers may hold a stale summary for up to USER_CACHE_TTL,
+which is fine for display but not for authorization. Project visibility is
+one semi-join (visible_projects_query), used both to filter lists and, via
+can_view_project / project_access_error, by the project-scoped routes.
+"""
+from flask import g
+from sqlalchemy import select, union, exists, or_
+from .models import db, User, Project, project_teams, user_teams
+from .utils import get_current_user_id, get_current_user_role, error_response
+from .constants import ROLE_ADMIN, ROLE_MANAGER
+
+class AccessContext:
+    """Who is calling: user id, role and (lazily) team ids"""
+    def __init__(self, user_id, role):
+        self.user_id = user_id
+        self.role = role
+        self._exists = None
+        self._team_ids = None
+        self._visible = {}
+
+    def _load_memberships(self):
+        # One row per team (one row with a NULL team for users without teams),
+        # served by the user primary key and the user_teams primary key
+        if self._team_ids is None:
+            rows = db.session.execute(
+                select(User.user_id, user_teams.c.team_id)
+                .outerjoin(user_teams, user_teams.c.user_id == User.user_id)
+                .where(User.user_id == self.user_id)
+            ).all() if self.user_id else []
+            self._exists = bool(rows)
+            self._team_ids = frozenset(team_id for _, team_id in rows if team_id is not None)
+
+    @property
+    def exists(self):
+        """False when the token's user has been deleted"""
+        self._load_memberships()
+        return self._exists
+
+    @property
+    def team_ids(self):
+        """Ids of the caller's teams, read from the database (memoized per request)"""
+        self._load_memberships()
+        return self._team_ids
+
+    @property
+    def is_admin(self):
+        return self.role == ROLE_ADMIN
+
+    def in_team(self, team_id):
+        return team_id in self.team_ids
+
+    def visible_projects_query(self):
+        """
+        SELECT of the project ids this user can see: projects of their teams
+        (user_teams joined to project_teams), plus projects they created when
+        they are a manager. None for admins (all projects).
+        """
+        if self.is_admin:
+            return None
+        team_projects = select(project_teams.c.project_id) \
+            .join(user_teams, user_teams.c.team_id == project_teams.c.team_id) \
+            .where(user_teams.c.user_id == self.user_id)
+        if self.role == ROLE_MANAGER:
+            # UNION removes the duplicates of projects reached several ways
+            return union(team_projects, select(Project.project_id).where(Project.created_by == self.user_id))
+        return team_projects.distinct()
+
+    def can_view_project(self, project_id):
+        """Whether the caller may read the project (memoized per project)"""
+        if self.is_admin:
+            return True
+        if project_id not in self._visible:
+            # Same rules as visible_projects_query, as EXISTS probes on the
+            # project_teams and user_teams primary keys (and the project row)
+            visible = exists(
+                select(project_teams.c.project_id)
+                .join(user_teams, user_teams.c.team_id == project_teams.c.team_id)
+                .where(project_teams.c.project_id == project_id, user_teams.c.user_id == self.user_id)
+            )
+            if self.role == ROLE_MANAGER:
+                visible = or_(visible, exists(
+                    select(Project.project_id)
+                    .where(Project.project_id == project_id, Project.created_by == self.user_id)
+                ))
+            self._visible[project_id] = bool(db.session.execute(select(visible)).scalar())
+        return self._visible[project_id]
+
+def get_access_context():
+    """The current request's AccessContext (built on first use)"""
+    ctx = g.get('access_context')
+    if ctx is None:
+        ctx = AccessContext(get_current_user_id(), get_current_user_role())
+        g.access_context = ctx
+    return ctx
+
+def project_access_error(project_id):
+    """403 response when the caller cannot see the project, None otherwise"""
+    if not get_access_context().can_view_project(project_id):
+        return error_response("You do not have access to this project", 403)
+    return None
+
+def reset_access_context():
+    """Drop the memoized context after the caller's own memberships changed"""
+    g.pop('access_context', None)
@@ -0,0 +1,694 @@
+"""
+Benchmarks.
+Latency, throughput and query counts of the hot REST endpoints and
+Socket.IO events, measured in-process with the Flask and Socket.IO test
+clients against the configured databases (fill them with `flask
+generate-data` first).
+
+Each scenario is warmed up, then run a fixed number of times (optionally
+from several threads). Per scenario the report holds p50/p95/p99/mean/max
+latency, throughput, SQL statements per request (counted with an engine
+event, per thread), mean response size and growth of the current resident
+set size. Results are JSON documents; `compare_results` lines up two runs.
+`measure_startup` times worker cold starts in fresh interpreters;
+`measure_login_load` checks a running server for socket latency during a
+login burst; `measure_draw_fanout` measures draw fan-out across one or
+more running workers sharing a message queue.
+
+Write scenarios change data and only run when asked for. With
+STORAGE_PROFILE=memory the whole run is hermetic: SQLite in memory and the
+in-process whiteboard store (generate the data in the same process).
+"""
+import contextvars
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import cycle
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from werkzeug.http import quote_etag
+from .models import db, User, Role, Project, Task, TaskActivity, task_assignees, user_teams, project_teams
+from .datagen import BENCH_PASSWORD
+from .versioning import make_etag
+from .pagination import PageArgs
+
+# Scenarios that move a lot of data are capped at this many iterations
+HEAVY_ITERATIONS = 5
+
+_counter = threading.local()
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _counter.statements = getattr(_counter, 'statements', 0) + 1
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def current_rss_mb():
+    """
+    Resident set size right now, from /proc (None where it is not available).
+    Not ru_maxrss: a high-water mark hides growth below an earlier peak.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+# --- subjects ----------------------------------------------------------
+
+def pick_subjects():
+    """
+    Choose the rows the scenarios hit: the project with the most tasks, a
+    median-sized project, the most assigned member of the hot project, the
+    hot project's creator and its most active task.
+    """
+    admin = db.session.query(User.user_id, User.email).join(Role, Role.role_id == User.role_id) \
+        .filter(Role.name == 'admin').first()
+    sizes = db.session.query(Task.project_id, func.count(Task.task_id)) \
+        .group_by(Task.project_id).order_by(func.count(Task.task_id).desc()).all()
+    if admin is None or not sizes:
+        return None
+
+    hot_project, hot_tasks = sizes[0]
+    typical_project, typical_tasks = sizes[len(sizes) // 2]
+    project = db.session.get(Project, hot_project)
+    member_id = db.session.query(task_assignees.c.user_id) \
+        .join(Task, Task.task_id == task_assignees.c.task_id) \
+        .filter(Task.project_id == hot_project) \
+        .group_by(task_assignees.c.user_id) \
+        .order_by(func.count().desc()).limit(1).scalar()
+    task_id = db.session.query(TaskActivity.task_id) \
+        .filter(TaskActivity.project_id == hot_project) \
+        .group_by(TaskActivity.task_id) \
+        .order_by(func.count().desc()).limit(1).scalar()
+    if task_id is None:
+        task_id = db.session.query(Task.task_id).filter(Task.project_id == hot_project).limit(1).scalar()
+
+    # The generator's wide member: many teams and projects to resolve per access check
+    wide_id = db.session.query(User.user_id).filter(User.email.like('%.wide@example.test')).limit(1).scalar()
+    wide_project = None
+    if wide_id is not None:
+        wide_project = db.session.query(project_teams.c.project_id) \
+            .join(user_teams, user_teams.c.team_id == project_teams.c.team_id) \
+            .filter(user_teams.c.user_id == wide_id).limit(1).scalar()
+
+    users = {}
+    for key, user_id in (('admin', admin.user_id), ('manager', project.created_by), ('member', member_id or admin.user_id),
+                         ('wide', wide_id)):
+        if user_id is None:
+            continue
+        user = db.session.get(User, user_id)
+        users[key] = {'userId': user.user_id, 'email': user.email, 'role': user.role.name}
+    if 'wide' in users:
+        users['wide']['teams'] = db.session.query(func.count()).select_from(user_teams) \
+            .filter(user_teams.c.user_id == wide_id).scalar()
+
+    return {
+        'users': users,
+        'hotProject': {'projectId': hot_project, 'tasks': hot_tasks, 'version': project.version},
+        'typicalProject': {'projectId': typical_project, 'tasks': typical_tasks},
+        'wideProjectId': wide_project,
+        'taskId': task_id
+    }
+
+def dataset_counts():
+    return {
+        'users': db.session.query(func.count(User.user_id)).scalar(),
+        'projects': db.session.query(func.count(Project.project_id)).scalar(),
+        'tasks': db.session.query(func.count(Task.task_id)).scalar(),
+        'activities': db.session.query(func.count(TaskActivity.activity_id)).scalar()
+    }
+
+# --- scenarios ---------------------------------------------------------
+
+class Clients(threading.local):
+    """One Flask test client and one Socket.IO test client per worker thread"""
+    def __init__(self, app):
+        self.app = app
+        self._http = None
+        self._socket = None
+
+    @property
+    def http(self):
+        if self._http is None:
+            self._http = self.app.test_client()
+        return self._http
+
+    @property
+    def socket(self):
+        if self._socket is None:
+            from .extensions import socketio
+            self._socket = socketio.test_client(self.app)
+        return self._socket
+
+def http_scenario(name, method, path, token=None, body=None, headers=None, data=None, heavy=False):
+    """`body` is a JSON body, or a function building one per call"""
+    def call(clients):
+        request_headers = dict(headers or {})
+        if token:
+            request_headers['Authorization'] = f"Bearer {token}"
+        json_body = body() if callable(body) else body
+        response = clients.http.open(path, method=method, headers=request_headers, json=json_body, data=data)
+        size = len(response.get_data())
+        return response.status_code < 400, size
+    return {'name': name, 'kind': 'http', 'call': call, 'heavy': heavy}
+
+def socket_scenario(name, event_name, payload):
+    def call(clients):
+        client = clients.socket
+        client.emit(event_name, payload() if callable(payload) else payload)
+        received = client.get_received()
+        return client.is_connected(), sum(len(json.dumps(message['args'], default=str)) for message in received)
+    return {'name': name, 'kind': 'socket', 'call': call, 'heavy': False}
+
+# Room of the draw fan-out scenarios (no project needed: drawing is not persisted)
+FANOUT_PROJECT = 'benchmark-fanout'
+FANOUT_VIEWERS = 5
+FANOUT_TIMEOUT = 5.0
+
+def _stroke_points(stroke):
+    points = stroke.get('points') or []
+    # DRAW_BATCH_BINARY sends packed float32 pairs
+    return array('f', points).tolist() if isinstance(points, (bytes, bytearray)) else points
+
+def _fanout_segment(marker):
+    # Segments never touch, so each one is its own stroke starting at x == marker
+    return {'projectId': FANOUT_PROJECT, 'x0': marker, 'y0': 0, 'x1': marker, 'y1': 1, 'color': '#000000', 'width': 2}
+
+def draw_fanout_scenario(name, viewers=FANOUT_VIEWERS):
+    """
+    End to end 'draw' latency: one client draws a segment and the call ends
+    once each of `viewers` clients in the room has received the
+    'drawing_batch' carrying it, so the batching interval is included.
+    """
+    markers = cycle(range(1 << 20))
+    local = threading.local()
+
+    def call(clients):
+        from .extensions import socketio
+        if not hasattr(local, 'viewers'):
+            local.viewers = [socketio.test_client(clients.app) for _ in range(viewers)]
+            for viewer in local.viewers:
+                viewer.emit('join_project', {'projectId': FANOUT_PROJECT})
+                viewer.get_received()
+        marker = next(markers)
+        clients.socket.emit('draw', _fanout_segment(marker))
+
+        waiting = set(range(viewers))
+        size = 0
+        deadline = time.perf_counter() + FANOUT_TIMEOUT
+        while waiting and time.perf_counter() < deadline:
+            # Yield so the batcher's background task can flush
+            socketio.sleep(0.001)
+            for index in list(waiting):
+                for message in local.viewers[index].get_received():
+                    if message['name'] != 'drawing_batch':
+                        continue
+                    if any(_stroke_points(stroke)[:1] == [marker] for stroke in message['args'][0]['strokes']):
+                        waiting.discard(index)
+                        size = len(json.dumps(message['args'], default=str))
+        return not waiting, size
+    return {'name': name, 'kind': 'socket', 'call': call, 'heavy': False}
+
+def build_scenarios(subjects, include_writes=False, include_sockets=True):
+    expires = timedelta(hours=12)
+    tokens = {
+        key: create_access_token(identity=user['userId'], expires_delta=expires,
+                                 additional_claims={'role': user['role'], 'email': user['email']})
+        for key, user in subjects['users'].items()
+    }
+    hot = subjects['hotProject']
+    hot_id = hot['projectId']
+    typical_id = subjects['typicalProject']['projectId']
+    task_id = subjects['taskId']
+    member = subjects['users']['member']
+    # Full views of projects with running tasks carry no ETag (timeWorked), so revalidate the summary
+    etag = quote_etag(make_etag('project', hot_id, hot['version'], PageArgs(limit=100, view='summary').representation()))
+    since = max(0, hot['version'] - 50)
+
+    scenarios = [
+        http_scenario('projects.list.member', 'GET', '/projects', tokens['member']),
+        http_scenario('projects.list.manager', 'GET', '/projects', tokens['manager']),
+        http_scenario('projects.list.admin.page', 'GET', '/projects?limit=50', tokens['admin']),
+        http_scenario('project.details.full', 'GET', f'/projects/{hot_id}', tokens['admin'], heavy=True),
+        http_scenario('project.details.typical', 'GET', f'/projects/{typical_id}', tokens['admin']),
+        http_scenario('project.details.page', 'GET', f'/projects/{hot_id}?limit=100', tokens['admin']),
+        http_scenario('project.details.summary', 'GET', f'/projects/{hot_id}?view=summary&limit=100', tokens['admin']),
+        http_scenario('project.details.not_modified', 'GET', f'/projects/{hot_id}?view=summary&limit=100',
+                      tokens['admin'], headers={'If-None-Match': etag}),
+        http_scenario('project.details.since', 'GET', f'/projects/{hot_id}?since={since}', tokens['admin']),
+        http_scenario('project.tasks.page', 'GET', f'/projects/{hot_id}/tasks?limit=100', tokens['admin']),
+        http_scenario('project.stats', 'GET', f'/projects/{hot_id}/stats', tokens['admin']),
+        http_scenario('project.activities', 'GET', f'/projects/{hot_id}/activities?limit=50', tokens['admin']),
+        http_scenario('project.export', 'GET', f'/projects/{hot_id}/export?format=ndjson', tokens['admin'], heavy=True),
+        http_scenario('tasks.my_tasks', 'GET', '/tasks/my-tasks?limit=100', tokens['member']),
+        http_scenario('tasks.my_tasks.summary', 'GET', '/tasks/my-tasks?view=summary&limit=100', tokens['member']),
+        http_scenario('task.activities', 'GET', f'/tasks/{task_id}/activities?limit=50', tokens['admin']),
+        http_scenario('teams.list', 'GET', '/teams', tokens['manager']),
+        http_scenario('user.activities', 'GET', f"/users/{member['userId']}/activities?limit=50", tokens['member']),
+    ]
+    if 'wide' in tokens and subjects['wideProjectId']:
+        # Access checks and lists of a member of 50 teams with 500 projects
+        wide_project_id = subjects['wideProjectId']
+        scenarios.extend([
+            http_scenario('access.wide.projects', 'GET', '/projects', tokens['wide']),
+            http_scenario('access.wide.projects.page', 'GET', '/projects?limit=50', tokens['wide']),
+            http_scenario('access.wide.project', 'GET', f'/projects/{wide_project_id}', tokens['wide']),
+            http_scenario('access.wide.project.tasks', 'GET', f'/projects/{wide_project_id}/tasks?limit=100',
+                          tokens['wide']),
+        ])
+    if member['email'].endswith('@example.test'):
+        # Generated users share BENCH_PASSWORD; measures password verification too
+        scenarios.append(http_scenario('auth.login', 'POST', '/login',
+                                       body={'email': member['email'], 'password': BENCH_PASSWORD}))
+
+    if include_writes:
+        statuses = cycle(['in_progress', 'to_do'])
+        status_lock = threading.Lock()
+
+        def next_status():
+            with status_lock:
+                return {'status': next(statuses)}
+
+        scenarios.extend([
+            http_scenario('task.create', 'POST', f'/projects/{typical_id}/tasks', tokens['manager'],
+                          body={'name': 'Benchmark task', 'priority': 'medium', 'assigneeIds': [member['userId']]}),
+            http_scenario('task.status', 'PUT', f'/tasks/{task_id}/status', tokens['admin'], body=next_status),
+            http_scenario('task.import.50', 'POST', f'/projects/{typical_id}/tasks/import?format=ndjson', tokens['manager'],
+                          data='\n'.join(json.dumps({'name': f'Imported benchmark task {n}'}) for n in range(50)),
+                          headers={'Content-Type': 'application/x-ndjson'}, heavy=True),
+        ])
+
+    if include_sockets:
+        from .whiteboard import get_store
+        board_version = get_store().get_board(hot_id)['version']
+        segment = {'projectId': hot_id, 'x0': 10, 'y0': 10, 'x1': 20, 'y1': 20, 'color': '#000000', 'width': 2}
+        scenarios.extend([
+            socket_scenario('socket.join_project', 'join_project', {'projectId': hot_id}),
+            socket_scenario('socket.join_project.delta', 'join_project',
+                            {'projectId': hot_id, 'sinceVersion': board_version}),
+            socket_scenario('socket.get_history', 'get_history', {'projectId': hot_id}),
+            socket_scenario('socket.subscribe_tasks', 'subscribe_tasks', {'projectId': hot_id}),
+            socket_scenario('socket.draw', 'draw', segment),
+            draw_fanout_scenario('socket.draw.fanout'),
+        ])
+    return scenarios
+
+# --- running -----------------------------------------------------------
+
+def run_scenario(scenario, clients, iterations, warmup, concurrency):
+    if scenario['heavy']:
+        iterations = min(iterations, HEAVY_ITERATIONS)
+        warmup = min(warmup, 1)
+
+    def call():
+        # Outside the caller's app context: each request pushes its own, as in a
+        # server, instead of sharing flask.g (and the memoized access context)
+        return contextvars.Context().run(scenario['call'], clients)
+
+    for _ in range(warmup):
+        call()
+
+    def sample(_):
+        _counter.statements = 0
+        started = time.perf_counter()
+        try:
+            ok, size = call()
+        except Exception:
+            ok, size = False, 0
+        elapsed = time.perf_counter() - started
+        return elapsed, _counter.statements, ok, size, current_rss_mb()
+
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(sample, range(iterations)))
+    else:
+        samples = [sample(n) for n in range(iterations)]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _, _, _ in samples)
+    queries = [count for _, count, _, _, _ in samples]
+    sizes = [size for _, _, _, size, _ in samples]
+    # Largest current RSS seen after a request, against the RSS before the scenario
+    peak_rss = max((rss for _, _, _, _, rss in samples if rss is not None), default=None)
+
+    def ms(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'kind': scenario['kind'],
+        'iterations': iterations,
+        'errors': sum(1 for _, _, ok, _, _ in samples if not ok),
+        'p50Ms': ms(percentile(latencies, 50)),
+        'p95Ms': ms(percentile(latencies, 95)),
+        'p99Ms': ms(percentile(latencies, 99)),
+        'meanMs': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'maxMs': ms(latencies[-1]) if latencies else None,
+        'throughputPerSec': round(iterations / wall, 2) if wall else None,
+        'queriesPerRequest': round(sum(queries) / len(queries), 2) if queries else None,
+        'maxQueries': max(queries) if queries else None,
+        'meanBytes': int(sum(sizes) / len(sizes)) if sizes else None,
+        'peakRssGrowthMb': round(peak_rss - rss_before, 1) if rss_before is not None and peak_rss is not None else None
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_benchmarks(iterations=100, warmup=5, concurrency=1, include_writes=False,
+                   include_sockets=True, only=None, progress=None):
+    """
+    Run the suite inside an app context; returns the result document.
+    `only` is a list of scenario name prefixes to keep.
+    """
+    progress = progress or (lambda message: None)
+    subjects = pick_subjects()
+    if subjects is None:
+        raise RuntimeError("No tasks to benchmark; run `flask generate-data` first")
+
+    scenarios = build_scenarios(subjects, include_writes, include_sockets)
+    if only:
+        scenarios = [s for s in scenarios if any(s['name'].startswith(prefix) for prefix in only)]
+
+    clients = Clients(current_app._get_current_object())
+    results = {}
+    event.listen(Engine, 'before_cursor_execute', _count_statement)
+    try:
+        for scenario in scenarios:
+            progress(f"{scenario['name']} ...")
+            results[scenario['name']] = run_scenario(scenario, clients, iterations, warmup, concurrency)
+            # Requests run in their own contexts; drop anything this context still holds
+            db.session.remove()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _count_statement)
+
+    return {
+        'meta': {
+            'startedAt': datetime.utcnow().isoformat() + 'Z',
+            'gitCommit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': db.engine.dialect.name,
+            'iterations': iterations,
+            'warmup': warmup,
+            'concurrency': concurrency,
+            'writes': include_writes,
+            'sockets': include_sockets,
+            'dataset': dataset_counts(),
+            'subjects': subjects,
+            'rssMb': current_rss_mb()
+        },
+        'results': results
+    }
+
+# --- startup -----------------------------------------------------------
+
+# Run in a fresh interpreter; prints import and create_app() seconds
+STARTUP_SCRIPT = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "from app import create_app\n"
+    "imported = time.perf_counter()\n"
+    "create_app()\n"
+    "print(imported - started, time.perf_counter() - imported)\n"
+)
+
+def _summarize_ms(values):
+    """Latency summary of durations given in seconds"""
+    values = sorted(value * 1000 for value in values)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50Ms': round(percentile(values, 50), 3),
+        'p95Ms': round(percentile(values, 95), 3),
+        'p99Ms': round(percentile(values, 99), 3),
+        'maxMs': round(values[-1], 3)
+    }
+
+def measure_startup(runs=10):
+    """
+    Cold start of a worker: spawn `runs` fresh interpreters that import the
+    app and call create_app() with the current environment (so the storage
+    profile and AUTO_* settings apply). Reports the time to a ready app per
+    process, split into imports and create_app().
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    totals, imports, creates = [], [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=backend_dir,
+                                   capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise RuntimeError(f"App failed to start:\n{completed.stderr.strip()}")
+        import_seconds, create_seconds = (float(value) for value in completed.stdout.split()[-2:])
+        totals.append(elapsed)
+        imports.append(import_seconds)
+        creates.append(create_seconds)
+
+    return {
+        'meta': {
+            'startedAt': datetime.utcnow().isoformat() + 'Z',
+            'gitCommit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': runs,
+            'settings': {key: os.environ.get(key) for key in
+                         ('STORAGE_PROFILE', 'WHITEBOARD_STORE', 'AUTO_MIGRATE', 'AUTO_SEED', 'ARANGO_PROVISION')}
+        },
+        'results': {
+            'startup.process': _summarize_ms(totals),
+            'startup.imports': _summarize_ms(imports),
+            'startup.create_app': _summarize_ms(creates)
+        }
+    }
+
+# --- logins under load ---------------------------------------------------
+
+PROBE_PROJECT = 'benchmark-probe'
+PROBE_TIMEOUT = 5.0
+
+def _probe_socket(base_url, stop, round_trips, interval):
+    """
+    Keep one Socket.IO client doing join_project round trips (emit ->
+    whiteboard_delta) until `stop` is set; timeouts count as PROBE_TIMEOUT.
+    """
+    import socketio as socketio_client
+
+    client = socketio_client.Client(reconnection=False)
+    reply = threading.Event()
+    for name in ('whiteboard_delta', 'init_whiteboard'):
+        client.on(name, lambda *args: reply.set())
+    client.connect(base_url)
+    try:
+        while not stop.is_set():
+            reply.clear()
+            started = time.perf_counter()
+            client.emit('join_project', {'projectId': PROBE_PROJECT, 'sinceVersion': 0})
+            answered = reply.wait(PROBE_TIMEOUT)
+            round_trips.append(time.perf_counter() - started if answered else PROBE_TIMEOUT)
+            stop.wait(interval)
+    finally:
+        client.disconnect()
+
+def _login(base_url, email, password):
+    """One POST /login; returns (seconds, ok)"""
+    from urllib.error import URLError
+    from urllib.request import Request, urlopen
+
+    body = json.dumps({'email': email, 'password': password}).encode()
+    request = Request(f"{base_url}/login", data=body, headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except (URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+def measure_login_load(base_url, email, password, logins=200, concurrency=20, idle_seconds=3.0, probe_interval=0.05):
+    """
+    Against a running server (python run.py): measure Socket.IO round trips
+    while idle, then fire `logins` logins from `concurrency` threads and
+    measure login latency/throughput and the round trips during the burst.
+    Flat socket latency under the burst means hashing is not blocking the
+    event loop.
+    """
+    base_url = base_url.rstrip('/')
+    idle, loaded = [], []
+
+    stop = threading.Event()
+    probe = threading.Thread(target=_probe_socket, args=(base_url, stop, idle, probe_interval), daemon=True)
+    probe.start()
+    time.sleep(idle_seconds)
+    stop.set()
+    probe.join()
+
+    stop = threading.Event()
+    probe = threading.Thread(target=_probe_socket, args=(base_url, stop, loaded, probe_interval), daemon=True)
+    probe.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: _login(base_url, email, password), range(logins)))
+    wall = time.perf_counter() - started
+    stop.set()
+    probe.join()
+
+    login_summary = _summarize_ms([seconds for seconds, _ in samples])
+    login_summary['errors'] = sum(1 for _, ok in samples if not ok)
+    login_summary['throughputPerSec'] = round(logins / wall, 2) if wall else None
+
+    return {
+        'meta': {
+            'startedAt': datetime.utcnow().isoformat() + 'Z',
+            'gitCommit': _git_commit(),
+            'baseUrl': base_url,
+            'logins': logins,
+            'concurrency': concurrency,
+            'idleSeconds': idle_seconds,
+            'probeIntervalMs': probe_interval * 1000
+        },
+        'results': {
+            'login': login_summary,
+            'socket.idle': _summarize_ms(idle),
+            'socket.during_logins': _summarize_ms(loaded)
+        }
+    }
+
+# --- draw fan-out across workers -------------------------------------------
+
+def _fanout_receiver(url, worker, received):
+    """A Socket.IO client in the fan-out room recording (worker, marker, time) per received segment"""
+    import socketio as socketio_client
+
+    client = socketio_client.Client(reconnection=False)
+    joined = threading.Event()
+    for name in ('whiteboard_delta', 'init_whiteboard'):
+        client.on(name, lambda *args: joined.set())
+
+    def on_batch(frame):
+        now = time.perf_counter()
+        for stroke in frame.get('strokes', []):
+            points = _stroke_points(stroke)
+            if points:
+                received.append((worker, int(points[0]), now))
+
+    client.on('drawing_batch', on_batch)
+    client.connect(url)
+    client.emit('join_project', {'projectId': FANOUT_PROJECT})
+    joined.wait(PROBE_TIMEOUT)
+    return client
+
+def _draw_fanout_run(urls, clients_per_worker, segments, rate):
+    """
+    One fan-out run: `clients_per_worker` receivers on every worker, one
+    client on the first worker drawing `segments` segments at `rate` per
+    second. Returns (summary of all receipts, summaries per worker).
+    """
+    import socketio as socketio_client
+
+    received = []
+    receivers = [_fanout_receiver(url, worker, received)
+                 for worker, url in enumerate(urls) for _ in range(clients_per_worker)]
+    sender = socketio_client.Client(reconnection=False)
+    sender.connect(urls[0])
+    sent = {}
+    try:
+        started = time.perf_counter()
+        for marker in range(segments):
+            sent[marker] = time.perf_counter()
+            sender.emit('draw', _fanout_segment(marker))
+            time.sleep(max(0.0, started + (marker + 1) / rate - time.perf_counter()))
+        expected = segments * len(receivers)
+        deadline = time.perf_counter() + PROBE_TIMEOUT
+        while len(received) < expected and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        wall = (max(at for _, _, at in received) if received else time.perf_counter()) - started
+    finally:
+        for client in receivers + [sender]:
+            client.disconnect()
+
+    def summary(receipts, receiver_count):
+        result = _summarize_ms([at - sent[marker] for _, marker, at in receipts if marker in sent])
+        result['delivered'] = round(len(receipts) / (segments * receiver_count), 4)
+        result['throughputPerSec'] = round(len(receipts) / wall, 2) if wall else None
+        return result
+
+    per_worker = {
+        worker: summary([r for r in received if r[0] == worker], clients_per_worker)
+        for worker in range(len(urls))
+    }
+    return summary(received, len(receivers)), per_worker
+
+def measure_draw_fanout(urls, clients_per_worker=10, segments=500, rate=200.0, scaling=False):
+    """
+    Against running workers (python run.py per port, all with the same
+    SOCKETIO_MESSAGE_QUEUE): latency from a 'draw' emit on the first worker to
+    the 'drawing_batch' on receivers connected to every worker, the share of
+    segments delivered and receipts per second. With `scaling`, the run is
+    repeated on the first 1, 2, 4, ... workers, the load per worker staying
+    the same, so the results show how fan-out scales out.
+    """
+    urls = [url.rstrip('/') for url in urls]
+    counts = [len(urls)]
+    if scaling:
+        counts = sorted({min(2 ** n, len(urls)) for n in range(len(urls).bit_length() + 1)})
+
+    results = {}
+    for count in counts:
+        overall, per_worker = _draw_fanout_run(urls[:count], clients_per_worker, segments, rate)
+        results[f'fanout.workers{count}'] = overall
+        for worker, result in per_worker.items():
+            results[f'fanout.workers{count}.worker{worker}'] = result
+
+    return {
+        'meta': {
+            'startedAt': datetime.utcnow().isoformat() + 'Z',
+            'gitCommit': _git_commit(),
+            'urls': urls,
+            'clientsPerWorker': clients_per_worker,
+            'segments': segments,
+            'ratePerSec': rate,
+            'workerCounts': counts
+        },
+        'results': results
+    }
+
+COMPARED_METRICS = ('p50Ms', 'p95Ms', 'p99Ms', 'throughputPerSec', 'queriesPerRequest')
+
+def compare_results(baseline, current):
+    """Rows of (scenario, metric, baseline value, current value, change in %) for scenarios in both runs"""
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old is None and new is None:
+                continue
+            change = round((new - old) / old * 100, 1) if old and new is not None else None
+            rows.append((name, metric, old, new, change))
+    return rows
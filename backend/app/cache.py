@@ -0,0 +1,183 @@
+"""
+Cache Module.
+Process-local LRU cache with TTL and size-bounded eviction, optionally backed
+by a shared cache (Redis) so several worker processes can reuse lookups.
+Used for user summaries and role names, see models.get_user_summaries.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class MemoryBackend:
+    """
+    In-process stand-in for a shared cache backend.
+    Handy in tests to exercise the two-level read path without Redis.
+    """
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class RedisBackend:
+    """Shared cache backend storing JSON values in Redis"""
+    def __init__(self, url, prefix='pt:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_REDIS_URL is set but the 'redis' package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL.
+    Misses fall through to the optional shared backend before the caller
+    loads from the database. Hit/miss/eviction counters are kept for metrics.
+    """
+    def __init__(self, max_size=2048, ttl=300, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self.evictions = 0
+
+    def configure(self, max_size=None, ttl=None, backend=_MISSING):
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            if backend is not _MISSING:
+                self.backend = backend
+            self._data.clear()
+
+    def _get_local(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _set_local(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys):
+        """Return {key: value} for every key found locally or in the backend"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_local(key)
+                if value is not _MISSING:
+                    found[key] = value
+        remaining = [key for key in keys if key not in found]
+
+        if remaining and self.backend is not None:
+            for key in remaining:
+                value = self.backend.get(key)
+                if value is not None:
+                    found[key] = value
+                    self.backend_hits += 1
+                    with self._lock:
+                        self._set_local(key, value)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._set_local(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxSize': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'backendHits': self.backend_hits,
+                'evictions': self.evictions
+            }
+
+# Shared instance for user summaries and role names (configured by init_cache)
+user_cache = LRUCache()
+
+def init_cache(app):
+    redis_url = app.config.get('CACHE_REDIS_URL')
+    user_cache.configure(
+        max_size=app.config.get('USER_CACHE_SIZE', 2048),
+        ttl=app.config.get('USER_CACHE_TTL', 300),
+        backend=RedisBackend(redis_url) if redis_url else None
+    )
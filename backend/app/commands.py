@@ -0,0 +1,200 @@
+"""
+CLI Commands.
+Maintenance commands registered on the Flask CLI (`flask --app run <command>`).
+"""
+import json
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from .models import db
+
+@click.command('rebuild-stats')
+@click.option('--project-id', default=None, help='Only rebuild this project')
+@with_appcontext
+def rebuild_stats_command(project_id):
+    """Recompute project task statistics from the task table."""
+    from .stats import rebuild_project_stats
+    count = rebuild_project_stats(project_id)
+    db.session.commit()
+    click.echo(f"Rebuilt statistics for {count} project(s).")
+
+@click.command('upgrade-schema')
+@with_appcontext
+def upgrade_schema_command():
+    """Migrate the relational schema to the latest revision (stamps pre-migration databases first)."""
+    from .extensions import upgrade_schema
+    upgrade_schema(db)
+    click.echo("Schema is up to date.")
+
+@click.command('seed')
+@click.option('--samples/--no-samples', default=True, show_default=True,
+              help='Also create the TEST users, team, project and tasks')
+@with_appcontext
+def seed_command(samples):
+    """Create the roles and default admin (and sample data) if missing."""
+    from .seed import seed_database
+    seed_database(samples=samples)
+    click.echo("Seed data is in place.")
+
+@click.command('provision-whiteboard')
+@with_appcontext
+def provision_whiteboard_command():
+    """Create the ArangoDB whiteboard database, collections and indexes if missing."""
+    from .extensions import provision_whiteboard_storage
+    try:
+        provision_whiteboard_storage()
+    except RuntimeError as e:
+        raise click.ClickException(f"{e}; set WHITEBOARD_STORE=arango")
+    click.echo("Whiteboard storage is provisioned.")
+
+@click.command('generate-data')
+@click.option('--preset', type=click.Choice(['tiny', 'small', 'large']), default='small', show_default=True,
+              help='Base volumes (large: 10k users / 500k tasks / 5M activities)')
+@click.option('--users', type=int, help='Override the preset volume')
+@click.option('--teams', type=int, help='Override the preset volume')
+@click.option('--projects', type=int, help='Override the preset volume')
+@click.option('--tasks', type=int, help='Override the preset volume')
+@click.option('--activities', type=int, help='Override the preset volume')
+@click.option('--elements', type=int, help='Whiteboard elements per project (0 to skip the whiteboard store)')
+@click.option('--seed', default=0, show_default=True, help='Random seed')
+@click.option('--tag', default='bench', show_default=True, help='Prefix of generated ids, emails and names')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per insert and commit')
+@with_appcontext
+def generate_data_command(preset, users, teams, projects, tasks, activities, elements, seed, tag, chunk_size):
+    """Fill the databases with synthetic data for benchmarking."""
+    from .datagen import DataGenerator, PRESETS, BENCH_PASSWORD
+    volumes = dict(PRESETS[preset])
+    overrides = {'users': users, 'teams': teams, 'projects': projects, 'tasks': tasks,
+                 'activities': activities, 'elements': elements}
+    volumes.update({key: value for key, value in overrides.items() if value is not None})
+    if volumes['users'] < 1 or volumes['teams'] < 1 or volumes['projects'] < 1:
+        raise click.BadParameter("users, teams and projects must be at least 1")
+
+    generator = DataGenerator(volumes, seed=seed, tag=tag, chunk_size=chunk_size, progress=click.echo)
+    if generator.exists():
+        raise click.ClickException(f"Data tagged '{tag}' already exists; choose another --tag")
+    counts = generator.run()
+    click.echo(f"Generated {json.dumps(counts)}. Every generated user's password is '{BENCH_PASSWORD}'.")
+
+@click.command('benchmark')
+@click.option('--iterations', type=click.IntRange(1), default=100, show_default=True, help='Measured requests per scenario')
+@click.option('--warmup', type=click.IntRange(0), default=5, show_default=True, help='Unmeasured requests per scenario')
+@click.option('--concurrency', type=click.IntRange(1), default=1, show_default=True, help='Worker threads per scenario')
+@click.option('--writes/--no-writes', default=False, show_default=True, help='Include scenarios that change data')
+@click.option('--sockets/--no-sockets', default=True, show_default=True, help='Include Socket.IO scenarios')
+@click.option('--only', multiple=True, help='Scenario name prefix to run (repeatable)')
+@click.option('--output', type=click.Path(dir_okay=False), help='Result file (default: benchmark-<timestamp>.json)')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier result file to compare with')
+@click.option('--generate', type=click.Choice(['tiny', 'small', 'large']),
+              help='Generate this preset first, in the same process (needed with STORAGE_PROFILE=memory)')
+@with_appcontext
+def benchmark_command(iterations, warmup, concurrency, writes, sockets, only, output, baseline, generate):
+    """Measure latency, throughput and queries per request of the hot endpoints."""
+    from .benchmark import run_benchmarks
+    if generate:
+        from .datagen import DataGenerator, PRESETS
+        generator = DataGenerator(dict(PRESETS[generate]), progress=click.echo)
+        if not generator.exists():
+            generator.run()
+    try:
+        report = run_benchmarks(iterations=iterations, warmup=warmup, concurrency=concurrency,
+                                include_writes=writes, include_sockets=sockets, only=list(only),
+                                progress=click.echo)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    _write_report(report, output, 'benchmark')
+    click.echo(f"{'scenario':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8} {'errors':>6}")
+    for name, result in report['results'].items():
+        click.echo(f"{name:<32} {result['p50Ms']!s:>9} {result['p95Ms']!s:>9} {result['p99Ms']!s:>9} "
+                   f"{result['throughputPerSec']!s:>9} {result['queriesPerRequest']!s:>8} {result['errors']:>6}")
+    _print_comparison(baseline, report)
+
+@click.command('benchmark-startup')
+@click.option('--runs', type=click.IntRange(1), default=10, show_default=True, help='Fresh processes to start')
+@click.option('--output', type=click.Path(dir_okay=False), help='Result file (default: startup-<timestamp>.json)')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier result file to compare with')
+def benchmark_startup_command(runs, output, baseline):
+    """Measure how long a new worker takes to import the app and run create_app()."""
+    from .benchmark import measure_startup
+    try:
+        report = measure_startup(runs)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    _write_report(report, output, 'startup')
+    _print_latencies(report)
+    _print_comparison(baseline, report)
+
+@click.command('benchmark-logins')
+@click.option('--url', default='http://localhost:5001', show_default=True, help='Running server (python run.py)')
+@click.option('--email', default='user@user.com', show_default=True, help='Account to log in with')
+@click.option('--password', default='takovo123', show_default=True)
+@click.option('--logins', type=click.IntRange(1), default=200, show_default=True, help='Logins in the burst')
+@click.option('--concurrency', type=click.IntRange(1), default=20, show_default=True, help='Concurrent login clients')
+@click.option('--idle-seconds', default=3.0, show_default=True, help='Socket probing before the burst')
+@click.option('--output', type=click.Path(dir_okay=False), help='Result file (default: logins-<timestamp>.json)')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier result file to compare with')
+def benchmark_logins_command(url, email, password, logins, concurrency, idle_seconds, output, baseline):
+    """Measure login throughput and Socket.IO latency during a login burst."""
+    from .benchmark import measure_login_load
+    report = measure_login_load(url, email, password, logins=logins, concurrency=concurrency,
+                                idle_seconds=idle_seconds)
+    _write_report(report, output, 'logins')
+    _print_latencies(report)
+    login = report['results']['login']
+    click.echo(f"Login throughput {login['throughputPerSec']} /s, {login['errors']} error(s)")
+    _print_comparison(baseline, report)
+
+@click.command('benchmark-fanout')
+@click.option('--url', 'urls', multiple=True, default=['http://localhost:5001'], show_default=True,
+              help='Running worker (repeatable; the workers must share SOCKETIO_MESSAGE_QUEUE)')
+@click.option('--clients', type=click.IntRange(1), default=10, show_default=True, help='Receiving clients per worker')
+@click.option('--segments', type=click.IntRange(1), default=500, show_default=True, help='Segments drawn per run')
+@click.option('--rate', type=click.FloatRange(min=1), default=200.0, show_default=True, help='Segments drawn per second')
+@click.option('--scaling/--no-scaling', default=False, show_default=True,
+              help='Repeat on the first 1, 2, 4, ... workers')
+@click.option('--output', type=click.Path(dir_okay=False), help='Result file (default: fanout-<timestamp>.json)')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier result file to compare with')
+def benchmark_fanout_command(urls, clients, segments, rate, scaling, output, baseline):
+    """Measure live draw fan-out latency and throughput across running workers."""
+    from .benchmark import measure_draw_fanout
+    report = measure_draw_fanout(list(urls), clients_per_worker=clients, segments=segments, rate=rate, scaling=scaling)
+    _write_report(report, output, 'fanout')
+    _print_latencies(report)
+    for name, result in report['results'].items():
+        click.echo(f"{name:<24} delivered {result['delivered']:.1%}   {result['throughputPerSec']!s:>9} segments/s")
+    _print_comparison(baseline, report)
+
+def _write_report(report, output, prefix):
+    output = output or f"{prefix}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    click.echo(f"Results written to {output}")
+
+def _print_latencies(report):
+    for name, result in report['results'].items():
+        click.echo(f"{name:<24} p50 {result.get('p50Ms')!s:>9} ms   p95 {result.get('p95Ms')!s:>9} ms   "
+                   f"p99 {result.get('p99Ms')!s:>9} ms   max {result.get('maxMs')!s:>9} ms")
+
+def _print_comparison(baseline, report):
+    if not baseline:
+        return
+    from .benchmark import compare_results
+    with open(baseline) as f:
+        rows = compare_results(json.load(f), report)
+    click.echo(f"\nCompared with {baseline}:")
+    for name, metric, old, new, change in rows:
+        click.echo(f"{name:<32} {metric:<18} {old!s:>10} -> {new!s:>10} "
+                   f"{'' if change is None else f'{change:+.1f}%'}")
+
+def register_commands(app):
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(generate_data_command)
+    app.cli.add_command(benchmark_command)
+    app.cli.add_command(benchmark_startup_command)
+    app.cli.add_command(benchmark_logins_command)
+    app.cli.add_command(benchmark_fanout_command)
+    app.cli.add_command(upgrade_schema_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(provision_whiteboard_command)
@@ -0,0 +1,382 @@
+"""
+Synthetic Data.
+Deterministic generator of realistic volumes for load testing: users,
+teams, projects, tasks, assignees, TaskActivity rows and whiteboard boards.
+
+The same volumes, seed and tag always produce the same rows (ids are uuid5
+of the tag and row number; timestamps are relative to the time of the run).
+Projects get tasks with a Zipf-like skew, so a few hot projects hold a
+large share of the tasks, like real workspaces. Rows are written with Core
+bulk inserts in committed chunks, and only compact per-row arrays are kept
+in memory, so the large preset (10k users / 500k tasks / 5M activities)
+runs in bounded memory.
+
+Every generated user has the password BENCH_PASSWORD; emails look like
+<tag>.user<n>@example.test (managers: <tag>.manager<n>@example.test).
+One more user, <tag>.wide@example.test, belongs to WIDE_TEAMS teams of its
+own that hold WIDE_PROJECTS projects between them: the worst case for the
+access checks.
+"""
+import random
+import uuid
+from array import array
+from datetime import datetime
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from .models import (
+    db, Role, User, Team, Project, Task, TaskActivity,
+    user_teams, project_teams, task_assignees
+)
+from .constants import (
+    ROLE_MANAGER, ROLE_USER, ALL_PRIORITIES,
+    STATUS_TODO, STATUS_IN_PROGRESS, STATUS_FOR_REVIEW, STATUS_DONE
+)
+from .stats import rebuild_project_stats
+
+PRESETS = {
+    'tiny': {'users': 50, 'teams': 5, 'projects': 10, 'tasks': 500, 'activities': 2000, 'elements': 20},
+    'small': {'users': 1000, 'teams': 50, 'projects': 200, 'tasks': 20000, 'activities': 100000, 'elements': 50},
+    'large': {'users': 10000, 'teams': 500, 'projects': 2000, 'tasks': 500000, 'activities': 5000000, 'elements': 200},
+}
+
+BENCH_PASSWORD = 'bench123'
+NAMESPACE = uuid.UUID('6f1c3a52-9a0e-4e0b-8d8e-5b7f0c2d4a11')
+MANAGER_SHARE = 0.05
+DAY = 86400
+
+# Teams and projects of the wide member
+WIDE_TEAMS = 50
+WIDE_PROJECTS = 500
+
+# Status mix of generated tasks and the path each status was reached by
+STATUS_WEIGHTS = {STATUS_TODO: 35, STATUS_IN_PROGRESS: 25, STATUS_FOR_REVIEW: 10, STATUS_DONE: 30}
+STATUS_PATH = [STATUS_TODO, STATUS_IN_PROGRESS, STATUS_FOR_REVIEW, STATUS_DONE]
+
+class DataGenerator:
+    def __init__(self, volumes, seed=0, tag='bench', chunk_size=5000, progress=None):
+        self.volumes = volumes
+        self.tag = tag
+        self.chunk_size = chunk_size
+        self.progress = progress or (lambda message: None)
+        self.rng = random.Random(seed)
+        self.now = int(datetime.utcnow().timestamp())
+        self.password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    def _id(self, kind, index):
+        return str(uuid.uuid5(NAMESPACE, f"{self.tag}:{kind}:{index}"))
+
+    def _insert(self, table, rows):
+        """Insert rows (any iterable) in committed chunks; returns the row count"""
+        count = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                db.session.execute(insert(table), chunk)
+                db.session.commit()
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            count += len(chunk)
+        return count
+
+    def exists(self):
+        """Whether data with this tag was already generated"""
+        return db.session.get(User, self._id('user', 0)) is not None
+
+    def run(self):
+        """Generate everything; returns the number of rows written per kind"""
+        counts = {}
+        counts['users'] = self.generate_users()
+        counts['teams'], counts['teamMembers'] = self.generate_teams()
+        counts['projects'] = self.generate_projects()
+        counts['wideMemberProjects'] = self.generate_wide_member()
+        counts['tasks'], counts['assignees'] = self.generate_tasks()
+        counts['activities'] = self.generate_activities()
+        self.progress("Rebuilding project statistics")
+        rebuild_project_stats()
+        db.session.commit()
+        counts['whiteboardElements'] = self.generate_whiteboards()
+        return counts
+
+    # --- users and teams -------------------------------------------------
+
+    def generate_users(self):
+        roles = {role.name: role.role_id for role in Role.query.all()}
+        total = self.volumes['users']
+        self.manager_count = max(1, int(total * MANAGER_SHARE))
+        self.progress(f"Users: {total} ({self.manager_count} managers)")
+
+        def rows():
+            for i in range(total):
+                manager = i < self.manager_count
+                yield {
+                    'user_id': self._id('user', i),
+                    'email': f"{self.tag}.{'manager' if manager else 'user'}{i}@example.test",
+                    'password_hash': self.password_hash,
+                    'first_name': f"{'Manager' if manager else 'User'}{i}",
+                    'last_name': self.tag.capitalize(),
+                    'is_active': True,
+                    'created_at': self.now - self.rng.randrange(365 * DAY),
+                    'role_id': roles[ROLE_MANAGER if manager else ROLE_USER]
+                }
+        return self._insert(User.__table__, rows())
+
+    def generate_teams(self):
+        users, teams = self.volumes['users'], self.volumes['teams']
+        self.progress(f"Teams: {teams}")
+        self._insert(Team.__table__, (
+            {'team_id': self._id('team', t), 'name': f"{self.tag.capitalize()} Team {t}", 'version': 0}
+            for t in range(teams)
+        ))
+
+        # Every user is in one to three teams
+        self.team_members = [[] for _ in range(teams)]
+        for u in range(users):
+            for t in self.rng.sample(range(teams), min(teams, self.rng.randint(1, 3))):
+                self.team_members[t].append(u)
+        members = self._insert(user_teams, (
+            {'user_id': self._id('user', u), 'team_id': self._id('team', t)}
+            for t, member_list in enumerate(self.team_members) for u in member_list
+        ))
+        return teams, members
+
+    # --- projects --------------------------------------------------------
+
+    def generate_projects(self):
+        projects, teams, tasks = self.volumes['projects'], self.volumes['teams'], self.volumes['tasks']
+        self.progress(f"Projects: {projects}")
+
+        # Decide task placement first so each project is written with its final version
+        weights = [1.0 / (p + 1) for p in range(projects)]
+        self.task_project = array('I', self.rng.choices(range(projects), weights, k=tasks))
+        task_counts = [0] * projects
+        for p in self.task_project:
+            task_counts[p] += 1
+
+        self.project_members = []
+        self.project_creators = array('I')
+        project_rows = []
+        link_rows = []
+        for p in range(projects):
+            assigned = self.rng.sample(range(teams), min(teams, self.rng.randint(1, 2)))
+            members = sorted({u for t in assigned for u in self.team_members[t]})
+            creator = self.rng.randrange(self.manager_count)
+            self.project_members.append(members or [creator])
+            self.project_creators.append(creator)
+            project_rows.append({
+                'project_id': self._id('project', p),
+                'name': f"{self.tag.capitalize()} Project {p}",
+                'description': f"Synthetic project {p} with {task_counts[p]} tasks",
+                'created_at': self.now - self.rng.randrange(365 * DAY),
+                'created_by': self._id('user', creator),
+                'version': task_counts[p]
+            })
+            link_rows.extend({'project_id': self._id('project', p), 'team_id': self._id('team', t)} for t in assigned)
+        self._insert(Project.__table__, project_rows)
+        self._insert(project_teams, link_rows)
+        return projects
+
+    def generate_wide_member(self):
+        """The wide member, its WIDE_TEAMS teams and their WIDE_PROJECTS (empty) projects"""
+        self.progress(f"Wide member: {WIDE_TEAMS} teams, {WIDE_PROJECTS} projects")
+        user_id = self._id('user', 'wide')
+        self._insert(User.__table__, [{
+            'user_id': user_id,
+            'email': f"{self.tag}.wide@example.test",
+            'password_hash': self.password_hash,
+            'first_name': 'Wide',
+            'last_name': self.tag.capitalize(),
+            'is_active': True,
+            'created_at': self.now,
+            'role_id': Role.query.filter_by(name=ROLE_USER).one().role_id
+        }])
+        self._insert(Team.__table__, (
+            {'team_id': self._id('wide-team', t), 'name': f"{self.tag.capitalize()} Wide Team {t}", 'version': 0}
+            for t in range(WIDE_TEAMS)
+        ))
+        self._insert(user_teams, (
+            {'user_id': user_id, 'team_id': self._id('wide-team', t)} for t in range(WIDE_TEAMS)
+        ))
+        self._insert(Project.__table__, (
+            {
+                'project_id': self._id('wide-project', p),
+                'name': f"{self.tag.capitalize()} Wide Project {p}",
+                'description': f"Synthetic project {p} of the wide member's teams",
+                'created_at': self.now - self.rng.randrange(365 * DAY),
+                'created_by': self._id('user', self.rng.randrange(self.manager_count)),
+                'version': 0
+            }
+            for p in range(WIDE_PROJECTS)
+        ))
+        self._insert(project_teams, (
+            {'project_id': self._id('wide-project', p), 'team_id': self._id('wide-team', p % WIDE_TEAMS)}
+            for p in range(WIDE_PROJECTS)
+        ))
+        return WIDE_PROJECTS
+
+    # --- tasks and activities --------------------------------------------
+
+    def _task_row(self, i, version):
+        """One task row and the user indices assigned to it"""
+        p = self.task_project[i]
+        members = self.project_members[p]
+        creator = self.project_creators[p] if self.rng.random() < 0.5 else self.rng.choice(members)
+        status = self.rng.choices(self.statuses, self.status_weights)[0]
+        step = STATUS_PATH.index(status)
+        created_at = self.now - self.rng.randrange(DAY, 180 * DAY)
+        self.task_created_at.append(created_at)
+        self.task_creator.append(creator)
+        self.task_status.append(step)
+
+        row = {
+            'task_id': self._id('task', i),
+            'name': f"Task {i}",
+            'description': f"Synthetic task {i} of project {p}",
+            'project_id': self._id('project', p),
+            'priority': self.rng.choice(ALL_PRIORITIES),
+            'status': status,
+            'deadline': created_at + self.rng.randrange(DAY, 60 * DAY) if self.rng.random() < 0.7 else None,
+            'created_at': created_at,
+            'created_by': self._id('user', creator),
+            'updated_at': created_at,
+            'started_at': None, 'started_by': None,
+            'reviewed_at': None, 'reviewed_by': None,
+            'completed_at': None, 'completed_by': None,
+            'accumulated_work_time': 0,
+            'last_progress_start': None,
+            'version': version
+        }
+        moment = created_at
+        for column, reached in (('started', 1), ('reviewed', 2), ('completed', 3)):
+            if step >= reached:
+                moment = min(self.now, moment + self.rng.randrange(3600, 5 * DAY))
+                row[f'{column}_at'] = moment
+                row[f'{column}_by'] = self._id('user', self.rng.choice(members))
+                row['updated_at'] = moment
+        if step >= 1:
+            row['accumulated_work_time'] = self.rng.randrange(3600, 40 * 3600)
+        if status == STATUS_IN_PROGRESS:
+            row['last_progress_start'] = row['started_at']
+        return row, self.rng.sample(members, min(len(members), self.rng.randint(0, 3)))
+
+    def generate_tasks(self):
+        total = self.volumes['tasks']
+        self.progress(f"Tasks: {total}")
+        self.statuses, self.status_weights = zip(*STATUS_WEIGHTS.items())
+        project_versions = [0] * self.volumes['projects']
+        # Kept for the activity pass: creation time, creator and final status per task
+        self.task_created_at = array('q')
+        self.task_creator = array('I')
+        self.task_status = array('B')
+
+        assignee_count = 0
+        for start in range(0, total, self.chunk_size):
+            task_rows, assignee_rows = [], []
+            for i in range(start, min(total, start + self.chunk_size)):
+                p = self.task_project[i]
+                project_versions[p] += 1
+                row, assignees = self._task_row(i, project_versions[p])
+                task_rows.append(row)
+                assignee_rows.extend({'task_id': row['task_id'], 'user_id': self._id('user', u)} for u in assignees)
+            db.session.execute(insert(Task.__table__), task_rows)
+            if assignee_rows:
+                db.session.execute(insert(task_assignees), assignee_rows)
+            db.session.commit()
+            assignee_count += len(assignee_rows)
+        return total, assignee_count
+
+    def _task_activities(self, i, count):
+        """
+        'created' plus `count - 1` status changes: to_do/in_progress rework
+        cycles first, then the path to the task's current status.
+        """
+        task_id = self._id('task', i)
+        project_id = self._id('project', self.task_project[i])
+        members = self.project_members[self.task_project[i]]
+        created_at = self.task_created_at[i]
+        path = [(STATUS_PATH[s], STATUS_PATH[s + 1]) for s in range(self.task_status[i])]
+        cycles = max(0, count - 1 - len(path)) // 2
+        transitions = ([(STATUS_TODO, STATUS_IN_PROGRESS), (STATUS_IN_PROGRESS, STATUS_TODO)] * cycles + path)[:count - 1]
+        times = sorted(self.rng.randint(created_at, self.now) for _ in transitions)
+
+        yield {
+            'activity_id': self._id('activity', f"{i}:0"),
+            'task_id': task_id, 'project_id': project_id,
+            'user_id': self._id('user', self.task_creator[i]),
+            'action_type': 'created', 'old_status': None, 'new_status': STATUS_TODO,
+            'timestamp': created_at
+        }
+        for n, ((old_status, new_status), timestamp) in enumerate(zip(transitions, times), start=1):
+            yield {
+                'activity_id': self._id('activity', f"{i}:{n}"),
+                'task_id': task_id, 'project_id': project_id,
+                'user_id': self._id('user', self.rng.choice(members)),
+                'action_type': 'status_change', 'old_status': old_status, 'new_status': new_status,
+                'timestamp': timestamp
+            }
+
+    def generate_activities(self):
+        total, tasks = self.volumes['activities'], self.volumes['tasks']
+        self.progress(f"Task activities: {total}")
+        if not tasks or not total:
+            return 0
+        per_task, remainder = divmod(total, tasks)
+
+        def rows():
+            for i in range(tasks):
+                count = per_task + (1 if i < remainder else 0)
+                if count:
+                    yield from self._task_activities(i, count)
+        return self._insert(TaskActivity.__table__, rows())
+
+    # --- whiteboards -----------------------------------------------------
+
+    def generate_whiteboards(self):
+        """Path and note elements (with their 'add' actions) for every project board"""
+        from .whiteboard import get_store
+
+        per_project = self.volumes.get('elements', 0)
+        if not per_project:
+            return 0
+        store = get_store()
+        self.progress(f"Whiteboard elements: {per_project} per project")
+        written = 0
+        for p in range(self.volumes['projects']):
+            project_id = self._id('project', p)
+            members = self.project_members[p]
+            elements, actions = [], []
+            for n in range(per_project):
+                element_id = self._id('element', f"{p}:{n}")
+                user = self.rng.choice(members)
+                if self.rng.random() < 0.8:
+                    x, y = self.rng.randrange(1200), self.rng.randrange(800)
+                    points = []
+                    for _ in range(self.rng.randint(10, 60)):
+                        x, y = x + self.rng.randint(-8, 8), y + self.rng.randint(-8, 8)
+                        points.append({'x': x, 'y': y})
+                    element_type = 'path'
+                    content = {'points': points, 'color': '#000000', 'width': 2}
+                else:
+                    element_type = 'note'
+                    content = {'x': self.rng.randrange(1200), 'y': self.rng.randrange(800),
+                               'text': f"Note {n}", 'color': '#fff59d'}
+                created_at = self.now - self.rng.randrange(90 * DAY)
+                user_name = f"{'Manager' if user < self.manager_count else 'User'}{user} {self.tag.capitalize()}"
+                elements.append({
+                    '_key': element_id, 'elementId': element_id, 'projectId': project_id,
+                    'type': element_type, 'content': content,
+                    'createdBy': self._id('user', user), 'createdByName': user_name,
+                    'createdAt': created_at
+                })
+                actions.append({
+                    '_key': element_id, 'actionId': element_id, 'projectId': project_id,
+                    'userId': self._id('user', user), 'userName': user_name,
+                    'actionType': 'add', 'elementId': element_id, 'elementType': element_type,
+                    'data': content, 'timestamp': created_at
+                })
+            store.write_batch(elements, (), actions)
+            written += len(elements)
+        return written
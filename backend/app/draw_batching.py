@@ -0,0 +1,162 @@
+"""
+Whiteboard Draw Batching.
+Buffers live 'draw' segments per room and fans them out as one compact
+'drawing_batch' frame every few milliseconds instead of one emit per segment.
+"""
+import logging
+import math
+import threading
+import time
+from array import array
+from .extensions import socketio
+
+logger = logging.getLogger(__name__)
+
+class DrawBatcher:
+    """
+    Per-room outbound buffer for live pen segments.
+
+    Consecutive segments of the same stroke (same sender, color and width,
+    touching endpoints) are merged into one flat point list
+    [x0, y0, x1, y1, ...]. A room is flushed every `interval` seconds or as
+    soon as it holds `max_segments` segments. When more than `max_points`
+    points are pending for a room (clients or the loop cannot keep up),
+    intermediate points are dropped so the frame stays bounded; the final
+    path is still persisted in full through 'save_element'.
+    """
+    def __init__(self, interval=0.03, max_segments=200, max_points=4000, binary=False):
+        self.interval = interval
+        self.max_segments = max_segments
+        self.max_points = max_points
+        self.binary = binary
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._task = None
+        # Counters for metrics. emit_durations is how long building and emitting a
+        # frame took, not draw-to-receipt latency (see `flask benchmark-fanout`)
+        self.segments_in = 0
+        self.frames_out = 0
+        self.points_dropped = 0
+        self.emit_durations = []
+
+    def configure(self, app):
+        self.interval = app.config.get('DRAW_BATCH_INTERVAL_MS', 30) / 1000.0
+        self.max_segments = app.config.get('DRAW_BATCH_MAX_SEGMENTS', 200)
+        self.max_points = app.config.get('DRAW_BATCH_MAX_POINTS', 4000)
+        self.binary = app.config.get('DRAW_BATCH_BINARY', False)
+
+    def add(self, room, sender, segment):
+        """Queue one segment dict ({x0, y0, x1, y1, color, width}) from `sender` (socket sid)"""
+        with self._lock:
+            pending = self._pending.setdefault(room, [])
+            pending.append((sender, segment))
+            self.segments_in += 1
+            full = len(pending) >= self.max_segments
+            # Checked and started under the lock: concurrent first adds start one loop
+            if self._task is None:
+                self._task = socketio.start_background_task(self._run)
+        if full:
+            self.flush(room)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            self.flush()
+
+    def flush(self, room=None):
+        """Emit pending segments for one room (or all rooms)"""
+        with self._lock:
+            if room is None:
+                batches, self._pending = self._pending, {}
+            else:
+                batches = {room: self._pending.pop(room, [])}
+
+        for batch_room, segments in batches.items():
+            if not segments:
+                continue
+            started = time.perf_counter()
+            # One bad batch must not stop the fan-out of other rooms (or kill the flush loop)
+            try:
+                frame = {'projectId': batch_room, 'strokes': self._build_strokes(segments)}
+                socketio.emit('drawing_batch', frame, room=batch_room)
+            except Exception:
+                logger.exception("Dropped drawing batch of %d segment(s) for room %s", len(segments), batch_room)
+                continue
+            self.frames_out += 1
+            self.emit_durations.append(time.perf_counter() - started)
+            if len(self.emit_durations) > 1000:
+                del self.emit_durations[:500]
+
+    def _build_strokes(self, segments):
+        strokes = []
+        open_strokes = {}
+        for sender, seg in segments:
+            key = (sender, seg.get('color'), seg.get('width'))
+            stroke = open_strokes.get(key)
+            if stroke and stroke['points'][-2] == seg['x0'] and stroke['points'][-1] == seg['y0']:
+                stroke['points'].extend((seg['x1'], seg['y1']))
+                continue
+            stroke = {
+                'sid': sender,
+                'color': seg.get('color'),
+                'width': seg.get('width') or 2,
+                'points': [seg['x0'], seg['y0'], seg['x1'], seg['y1']]
+            }
+            strokes.append(stroke)
+            open_strokes[key] = stroke
+
+        total_points = sum(len(s['points']) // 2 for s in strokes)
+        if total_points > self.max_points:
+            step = math.ceil(total_points / self.max_points)
+            for stroke in strokes:
+                before = len(stroke['points']) // 2
+                stroke['points'] = _decimate(stroke['points'], step)
+                self.points_dropped += before - len(stroke['points']) // 2
+
+        if self.binary:
+            for stroke in strokes:
+                stroke['points'] = array('f', stroke['points']).tobytes()
+        return strokes
+
+    def stats(self):
+        durations = sorted(self.emit_durations)
+        p99 = durations[int(len(durations) * 0.99) - 1] if durations else 0.0
+        return {
+            'segmentsIn': self.segments_in,
+            'framesOut': self.frames_out,
+            'pointsDropped': self.points_dropped,
+            'emitP99Seconds': p99
+        }
+
+def _decimate(points, step):
+    """Keep the first and last point of a flat [x, y, ...] list and every `step`-th point between"""
+    count = len(points) // 2
+    if count <= 2 or step <= 1:
+        return points
+    kept = []
+    for i in range(0, count - 1, step):
+        kept.extend(points[2 * i:2 * i + 2])
+    kept.extend(points[-2:])
+    return kept
+
+def parse_segment(data):
+    """
+    Segment dict ({x0, y0, x1, y1, color, width}) from a 'draw' payload, with
+    coordinates converted to float; None unless all four are finite numbers.
+    """
+    try:
+        segment = {k: float(data[k]) for k in ('x0', 'y0', 'x1', 'y1')}
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(math.isfinite(value) for value in segment.values()):
+        return None
+    color = data.get('color')
+    segment['color'] = color if isinstance(color, str) else None
+    try:
+        width = float(data.get('width'))
+    except (TypeError, ValueError):
+        width = None
+    segment['width'] = width if width is not None and math.isfinite(width) and width > 0 else None
+    return segment
+
+draw_batcher = DrawBatcher()
@@ -0,0 +1,154 @@
+"""
+Project Export.
+Streams a project's tasks, assignments and TaskActivity audit trail as
+NDJSON or CSV. Rows are read in keyset-ordered batches (one LIMIT query per
+batch, see pagination.keyset_batches) and written out in chunks, so memory
+use does not grow with the size of the project whatever the driver.
+"""
+import csv
+import io
+import json
+from sqlalchemy import select
+from .models import db, Task, TaskActivity, User, task_assignees
+from .pagination import keyset_batches
+
+# Rows fetched per batch query
+EXPORT_BATCH_SIZE = 1000
+# Approximate size of each chunk written to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+TASK_FIELDS = [
+    ('taskId', Task.task_id),
+    ('name', Task.name),
+    ('description', Task.description),
+    ('priority', Task.priority),
+    ('status', Task.status),
+    ('deadline', Task.deadline),
+    ('jiraKey', Task.jira_key),
+    ('jiraUrl', Task.jira_url),
+    ('createdAt', Task.created_at),
+    ('createdBy', Task.created_by),
+    ('updatedAt', Task.updated_at),
+    ('startedAt', Task.started_at),
+    ('startedBy', Task.started_by),
+    ('reviewedAt', Task.reviewed_at),
+    ('reviewedBy', Task.reviewed_by),
+    ('completedAt', Task.completed_at),
+    ('completedBy', Task.completed_by),
+    ('accumulatedWorkTime', Task.accumulated_work_time),
+]
+
+ASSIGNEE_FIELDS = [
+    ('taskId', task_assignees.c.task_id),
+    ('userId', task_assignees.c.user_id),
+]
+
+ACTIVITY_FIELDS = [
+    ('activityId', TaskActivity.activity_id),
+    ('taskId', TaskActivity.task_id),
+    ('userId', TaskActivity.user_id),
+    ('firstName', User.first_name),
+    ('lastName', User.last_name),
+    ('actionType', TaskActivity.action_type),
+    ('oldStatus', TaskActivity.old_status),
+    ('newStatus', TaskActivity.new_status),
+    ('timestamp', TaskActivity.timestamp),
+]
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def _stream(statement, order_columns):
+    """Rows of `statement` in (order_columns...) order, EXPORT_BATCH_SIZE per query"""
+    for batch in keyset_batches(db.session, statement, order_columns, EXPORT_BATCH_SIZE):
+        yield from batch
+
+SECTIONS = [
+    ('task', TASK_FIELDS),
+    ('assignee', ASSIGNEE_FIELDS),
+    ('activity', ACTIVITY_FIELDS),
+]
+
+def _section_queries(project_id):
+    """record type -> (statement, unique order columns it is read in)"""
+    tasks = select(*[column for _, column in TASK_FIELDS]) \
+        .where(Task.project_id == project_id)
+
+    assignees = select(*[column for _, column in ASSIGNEE_FIELDS]) \
+        .join(Task, Task.task_id == task_assignees.c.task_id) \
+        .where(Task.project_id == project_id)
+
+    activities = select(*[column for _, column in ACTIVITY_FIELDS]) \
+        .outerjoin(User, User.user_id == TaskActivity.user_id) \
+        .where(TaskActivity.project_id == project_id)
+
+    return {
+        'task': (tasks, (Task.created_at, Task.task_id)),
+        'assignee': (assignees, (task_assignees.c.task_id, task_assignees.c.user_id)),
+        'activity': (activities, (TaskActivity.timestamp, TaskActivity.activity_id)),
+    }
+
+def _record_sets(project_id):
+    """(record type, field names, row iterator) for every section of the export"""
+    queries = _section_queries(project_id)
+    for record_type, fields in SECTIONS:
+        # Each section is only queried once the previous one is fully written
+        yield record_type, [name for name, _ in fields], _stream(*queries[record_type])
+
+def _chunked(lines):
+    """Group small strings into ~EXPORT_CHUNK_BYTES chunks for the response"""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _ndjson_lines(project_id):
+    for record_type, names, rows in _record_sets(project_id):
+        for row in rows:
+            record = {'type': record_type}
+            record.update(zip(names, row))
+            yield json.dumps(record, separators=(',', ':')) + '\n'
+
+def _csv_lines(project_id):
+    # One table for all record types: recordType plus the union of columns
+    header = ['recordType']
+    for _, fields in SECTIONS:
+        for name, _ in fields:
+            if name not in header:
+                header.append(name)
+    positions = {name: i for i, name in enumerate(header)}
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(header)
+    yield flush()
+    for record_type, names, rows in _record_sets(project_id):
+        indexes = [positions[name] for name in names]
+        for row in rows:
+            line = [''] * len(header)
+            line[0] = record_type
+            for index, value in zip(indexes, row):
+                line[index] = '' if value is None else value
+            writer.writerow(line)
+            yield flush()
+
+def export_project(project_id, export_format):
+    """Generator of response chunks for GET /projects/<id>/export"""
+    lines = _ndjson_lines(project_id) if export_format == 'ndjson' else _csv_lines(project_id)
+    return _chunked(lines)
@@ -1,36 +1,156 @@
+import os
+import sqlite3
+import threading
 from flask_socketio import SocketIO
-from arango import ArangoClient
+from flask_migrate import Migrate, upgrade, stamp
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
 
 socketio = SocketIO(cors_allowed_origins="*")
+migrate = Migrate()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# Revision matching the schema that db.create_all() used to build
+INITIAL_REVISION = '0001_initial_schema'
 
 arango_client = None
 arango_db = None
+_arango_settings = None
+_arango_lock = threading.Lock()
+
+WHITEBOARD_COLLECTIONS = (
+    'whiteboard_elements',
+    'whiteboard_actions',
+    'whiteboard_boards'  # per-project board versions for incremental sync
+)
 
 def init_arango(app):
+    """
+    Remember the ArangoDB settings. Nothing is contacted here: the
+    connection (and provisioning) happens once, on first use, in get_arango_db.
+    """
+    global _arango_settings
+    _arango_settings = {
+        'url': app.config['ARANGO_URL'],
+        'db_name': app.config['ARANGO_DB_NAME'],
+        'username': app.config['ARANGO_USERNAME'],
+        'password': app.config['ARANGO_PASSWORD'],
+        'provision': app.config.get('ARANGO_PROVISION', True)
+    }
+
+def get_arango_db():
+    """The whiteboard database handle, connected on first call (once per process)"""
     global arango_client, arango_db
-    
-    url = app.config['ARANGO_URL']
-    db_name = app.config['ARANGO_DB_NAME']
-    username = app.config['ARANGO_USERNAME']
-    password = app.config['ARANGO_PASSWORD']
-    
-    # Initialize client
-    arango_client = ArangoClient(hosts=url)
-    
-    # Create system connection
-    sys_db = arango_client.db('_system', username=username, password=password)
-    
-    # Create database if not exists
-    if not sys_db.has_database(db_name):
-        sys_db.create_database(db_name)
-    
-    # Connect to database
-    arango_db = arango_client.db(db_name, username=username, password=password)
-    
-    # Create collections if not exist
-    if not arango_db.has_collection('whiteboard_elements'):
-        arango_db.create_collection('whiteboard_elements')
-        
-    if not arango_db.has_collection('whiteboard_actions'):
-        arango_db.create_collection('whiteboard_actions')
+    if arango_db is None:
+        with _arango_lock:
+            if arango_db is None:
+                if _arango_settings is None:
+                    raise RuntimeError("ArangoDB is not configured (init_arango was not called)")
+                from arango import ArangoClient
+                settings = _arango_settings
+                arango_client = ArangoClient(hosts=settings['url'])
+                database = arango_client.db(settings['db_name'], username=settings['username'],
+                                            password=settings['password'])
+                if settings['provision']:
+                    provision_arango(arango_client, database, settings)
+                arango_db = database
+    return arango_db
+
+def provision_whiteboard_storage():
+    """Connect if needed and create whatever is missing (`flask provision-whiteboard`)"""
+    database = get_arango_db()
+    provision_arango(arango_client, database, _arango_settings)
+
+def provision_arango(client, database, settings):
+    """Create the whiteboard database, collections and indexes that are missing"""
+    sys_db = client.db('_system', username=settings['username'], password=settings['password'])
+    if not sys_db.has_database(settings['db_name']):
+        sys_db.create_database(settings['db_name'])
+
+    # One round trip to list what exists instead of one check per collection
+    existing = {collection['name'] for collection in database.collections()}
+    for name in WHITEBOARD_COLLECTIONS:
+        if name not in existing:
+            database.create_collection(name)
+
+    ensure_whiteboard_indexes(database)
+
+def ensure_whiteboard_indexes(database):
+    """
+    Provision the persistent indexes the whiteboard queries rely on.
+    ArangoDB returns the existing index when an identical one is requested,
+    so this is safe to run repeatedly.
+    """
+    database.collection('whiteboard_elements').add_persistent_index(
+        fields=['projectId'], name='idx_elements_project'
+    )
+    actions = database.collection('whiteboard_actions')
+    actions.add_persistent_index(
+        fields=['projectId', 'timestamp'], name='idx_actions_project_timestamp'
+    )
+    actions.add_persistent_index(
+        fields=['projectId', 'version'], name='idx_actions_project_version'
+    )
+
+
+def init_socketio(app):
+    """
+    Attach Socket.IO to the app.
+    With SOCKETIO_MESSAGE_QUEUE set, room broadcasts go through a pub/sub
+    backend so several processes or nodes can serve the same project rooms:
+    redis://, kafka:// and amqp:// URLs use the python-socketio managers,
+    local:// the in-process LocalPubSubManager.
+    """
+    from .pubsub import LocalPubSubManager
+
+    options = {}
+    queue_url = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    channel = app.config.get('SOCKETIO_CHANNEL', 'project-tracker')
+    if queue_url and queue_url.startswith('local://'):
+        options['client_manager'] = LocalPubSubManager(channel=channel)
+    elif queue_url:
+        options['message_queue'] = queue_url
+        options['channel'] = channel
+
+    # Long-polling needs every request of a session on the same worker: either
+    # restrict to websocket or let the load balancer pin on the sticky cookie
+    transports = app.config.get('SOCKETIO_TRANSPORTS')
+    if transports:
+        options['transports'] = transports
+    sticky_cookie = app.config.get('SOCKETIO_STICKY_COOKIE')
+    if sticky_cookie:
+        options['cookie'] = {'name': sticky_cookie, 'path': '/', 'SameSite': 'Lax'}
+
+    socketio.init_app(app, **options)
+
+def init_migrations(app, db):
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
+
+def upgrade_schema(db):
+    """
+    Bring the relational schema to the latest migration.
+    Databases bootstrapped by the old db.create_all() have tables but no
+    alembic_version, so they are stamped at the initial revision first.
+    Must be called inside an app context.
+
+    SQLite (test/dev profiles) cannot run the ALTER steps of the migrations,
+    so its schema is created from the models and stamped at the latest
+    revision; delete a SQLite file to pick up later model changes.
+    """
+    tables = set(inspect(db.engine).get_table_names())
+    if db.engine.dialect.name == 'sqlite':
+        db.create_all()
+        if 'alembic_version' not in tables:
+            stamp(directory=MIGRATIONS_DIR, revision='head')
+        return
+    if 'user' in tables and 'alembic_version' not in tables:
+        stamp(directory=MIGRATIONS_DIR, revision=INITIAL_REVISION)
+    upgrade(directory=MIGRATIONS_DIR)
 
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # MySQL enforces foreign keys (and ON DELETE CASCADE); make SQLite behave the same
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
@@ -0,0 +1,280 @@
+"""
+Metrics.
+In-process request, SQL, ArangoDB and Socket.IO instrumentation, exposed
+at GET /metrics in the Prometheus text exposition format.
+
+Recording is a dict lookup, a bisect and a few additions under a lock, so
+it is cheap enough to leave on in production. Metrics are per worker
+process; scrape every worker (or aggregate in Prometheus) when scaled out.
+The endpoint requires `Authorization: Bearer <METRICS_TOKEN>`; without a
+token configured it only answers loopback clients.
+"""
+import bisect
+import hmac
+import threading
+import time
+from functools import wraps
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; covers fast cached reads up to slow exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+
+def _label_text(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_label_text(self.labelnames, key)} {_number(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Decorator observing the wrapped function's duration"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = [('le', _number(bound) if bound == float('inf') else repr(float(bound)))]
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}')
+            labels = _label_text(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_number(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, documentation, metric_type, collect):
+        """`collect()` returns {label dict as tuple of pairs or (): value} at scrape time"""
+        self._collectors.append((name, documentation, metric_type, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, metric_type, collect in self._collectors:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in collect().items():
+                names = [label for label, _ in labels]
+                values = [value for _, value in labels]
+                lines.append(f'{name}{_label_text(names, values)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint',
+    ('endpoint', 'method', 'status')))
+HTTP_SQL_STATEMENTS = registry.register(Histogram(
+    'http_request_sql_statements', 'SQL statements executed per HTTP request',
+    ('endpoint',), buckets=COUNT_BUCKETS))
+HTTP_SQL_SECONDS = registry.register(Histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL per HTTP request',
+    ('endpoint',)))
+SQL_STATEMENT_SECONDS = registry.register(Histogram(
+    'sql_statement_duration_seconds', 'Latency of individual SQL statements'))
+ARANGO_SECONDS = registry.register(Histogram(
+    'arango_request_duration_seconds', 'ArangoDB call latency by operation',
+    ('operation',)))
+SOCKET_EVENT_SECONDS = registry.register(Histogram(
+    'socketio_event_duration_seconds', 'Socket.IO handler duration by event (count = events received)',
+    ('event',)))
+SOCKET_EVENT_ERRORS = registry.register(Counter(
+    'socketio_event_errors_total', 'Socket.IO handlers that raised, by event',
+    ('event',)))
+PASSWORD_HASH_SECONDS = registry.register(Histogram(
+    'password_hash_duration_seconds', 'Password hashing/verification time including pool wait, by operation',
+    ('operation',)))
+
+# --- SQL ---------------------------------------------------------------
+
+# The start time lives on the statement's execution context, so a statement
+# that fails (no after_cursor_execute) leaves nothing behind on the connection
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    SQL_STATEMENT_SECONDS.observe(elapsed)
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+# --- HTTP --------------------------------------------------------------
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                     method=request.method, status=response.status_code)
+        HTTP_SQL_STATEMENTS.observe(g.sql_statements, endpoint=endpoint)
+        HTTP_SQL_SECONDS.observe(g.sql_seconds, endpoint=endpoint)
+    return response
+
+# --- Socket.IO ---------------------------------------------------------
+
+def socket_event(name, namespace=None):
+    """
+    Register a Socket.IO handler (like `socketio.on`) and record its
+    duration and errors under the event name.
+    """
+    from .extensions import socketio
+
+    def decorator(handler):
+        @wraps(handler)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            except Exception:
+                SOCKET_EVENT_ERRORS.inc(event=name)
+                raise
+            finally:
+                SOCKET_EVENT_SECONDS.observe(time.perf_counter() - started, event=name)
+        return socketio.on(name, namespace)(timed)
+    return decorator
+
+# --- ArangoDB ----------------------------------------------------------
+
+def arango_operation(name):
+    """Decorator timing a function that talks to ArangoDB"""
+    return ARANGO_SECONDS.time(operation=name)
+
+# --- Component stats ---------------------------------------------------
+
+def _stats_collector(source, key, label_pairs=()):
+    def collect():
+        return {tuple(label_pairs): source()[key]}
+    return collect
+
+def register_component_stats():
+    """Expose the counters the cache, draw batcher, whiteboard writer and password hasher keep"""
+    from .cache import user_cache
+    from .draw_batching import draw_batcher
+    from .whiteboard_writer import whiteboard_writer
+    from .passwords import password_hasher
+
+    gauges = [
+        ('user_cache_hits_total', 'User cache hits', 'counter', user_cache.stats, 'hits'),
+        ('user_cache_misses_total', 'User cache misses', 'counter', user_cache.stats, 'misses'),
+        ('user_cache_backend_hits_total', 'User cache hits served by the shared backend', 'counter', user_cache.stats, 'backendHits'),
+        ('user_cache_evictions_total', 'User cache LRU evictions', 'counter', user_cache.stats, 'evictions'),
+        ('draw_batch_segments_in_total', 'Live drawing segments received', 'counter', draw_batcher.stats, 'segmentsIn'),
+        ('draw_batch_frames_out_total', 'drawing_batch frames emitted', 'counter', draw_batcher.stats, 'framesOut'),
+        ('draw_batch_points_dropped_total', 'Points dropped by decimation', 'counter', draw_batcher.stats, 'pointsDropped'),
+        ('draw_batch_emit_p99_seconds', 'p99 time to build and emit recent drawing_batch frames', 'gauge', draw_batcher.stats, 'emitP99Seconds'),
+        ('whiteboard_write_queue_depth', 'Whiteboard operations waiting to be persisted', 'gauge', whiteboard_writer.stats, 'queueDepth'),
+        ('whiteboard_write_flushes_total', 'Whiteboard write batches persisted', 'counter', whiteboard_writer.stats, 'flushes'),
+        ('whiteboard_write_failed_batches_total', 'Whiteboard write batches that failed', 'counter', whiteboard_writer.stats, 'failedBatches'),
+        ('whiteboard_write_dropped_ops_total', 'Whiteboard operations dropped after retries', 'counter', whiteboard_writer.stats, 'droppedOps'),
+        ('whiteboard_write_overflow_ops_total', 'Whiteboard operations dropped because the queue was full', 'counter', whiteboard_writer.stats, 'overflowOps'),
+        ('whiteboard_write_flush_seconds_total', 'Time spent persisting whiteboard batches', 'counter', whiteboard_writer.stats, 'flushSecondsTotal'),
+        ('password_hash_in_flight', 'Password hashes running or waiting for a worker', 'gauge', password_hasher.stats, 'inFlight'),
+    ]
+    for name, documentation, metric_type, source, key in gauges:
+        registry.add_collector(name, documentation, metric_type, _stats_collector(source, key))
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+def _metrics_allowed(token):
+    if not token:
+        return request.remote_addr in LOOPBACK_ADDRESSES
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+
+def metrics_view():
+    if not _metrics_allowed(current_app.config.get('METRICS_TOKEN')):
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def init_metrics(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    register_component_stats()
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
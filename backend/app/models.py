@@ -5,26 +5,34 @@ Defines the SQLAlchemy models for the application: User, Role, Project, Team, Ta
 import uuid
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import selectinload, noload
+from .cache import user_cache
+from .passwords import password_hasher
 
 db = SQLAlchemy()
 
 # Association table for user-team many-to-many relationship
 user_teams = db.Table('user_teams',
     db.Column('user_id', db.String(36), db.ForeignKey('user.user_id'), primary_key=True),
-    db.Column('team_id', db.String(36), db.ForeignKey('team.team_id'), primary_key=True)
+    db.Column('team_id', db.String(36), db.ForeignKey('team.team_id'), primary_key=True),
+    # Reverse lookup: members of a team
+    db.Index('ix_user_teams_team_user', 'team_id', 'user_id')
 )
 
 # Association table for project-team many-to-many relationship
 project_teams = db.Table('project_teams',
     db.Column('project_id', db.String(36), db.ForeignKey('project.project_id'), primary_key=True),
-    db.Column('team_id', db.String(36), db.ForeignKey('team.team_id'), primary_key=True)
+    db.Column('team_id', db.String(36), db.ForeignKey('team.team_id'), primary_key=True),
+    # Reverse lookup: projects of a team
+    db.Index('ix_project_teams_team_project', 'team_id', 'project_id')
 )
 
 # Association table for task-assignee many-to-many relationship
 task_assignees = db.Table('task_assignees',
     db.Column('task_id', db.String(36), db.ForeignKey('task.task_id'), primary_key=True),
-    db.Column('user_id', db.String(36), db.ForeignKey('user.user_id'), primary_key=True)
+    db.Column('user_id', db.String(36), db.ForeignKey('user.user_id'), primary_key=True),
+    # Reverse lookup: tasks assigned to a user (my-tasks)
+    db.Index('ix_task_assignees_user_task', 'user_id', 'task_id')
 )
 
 class Role(db.Model):
@@ -33,8 +41,13 @@ class Role(db.Model):
     users = db.relationship('User', backref='role', lazy=True)
 
 class Team(db.Model):
+    __table_args__ = (
+        db.Index('ix_team_name_id', 'name', 'team_id'),  # keyset pagination
+    )
+
     team_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
+    version = db.Column(db.BigInteger, default=0, server_default='0', nullable=False)  # bumped on membership changes (ETag)
 
     def to_dict(self):
         return {
@@ -43,6 +56,10 @@ class Team(db.Model):
         }
 
 class User(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'user_id'),  # keyset pagination
+    )
+
     user_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
@@ -56,10 +73,17 @@ class User(db.Model):
         backref=db.backref('users', lazy=True))
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def upgrade_password_hash(self, password):
+        """After a successful check: re-hash with the configured parameters if they changed (caller commits)"""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
     
     def login(self):
         pass
@@ -83,6 +107,11 @@ class User(db.Model):
         }
 
 class Project(db.Model):
+    __table_args__ = (
+        db.Index('ix_project_created_by', 'created_by'),
+        db.Index('ix_project_created_at_id', 'created_at', 'project_id'),  # keyset pagination
+    )
+
     project_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -90,11 +119,13 @@ class Project(db.Model):
     jira_url = db.Column(db.String(500), nullable=True)
     created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
     created_by = db.Column(db.String(36), db.ForeignKey('user.user_id'), nullable=False)
+    version = db.Column(db.BigInteger, default=0, server_default='0', nullable=False)  # change counter, see versioning.py
     
     # Relationships
     teams = db.relationship('Team', secondary=project_teams, lazy='subquery',
         backref=db.backref('projects', lazy=True))
     tasks = db.relationship('Task', backref='project', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('ProjectStats', uselist=False, lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -109,6 +140,15 @@ class Project(db.Model):
         }
 
 class Task(db.Model):
+    __table_args__ = (
+        db.Index('ix_task_project_created_at_id', 'project_id', 'created_at', 'task_id'),  # project task lists
+        db.Index('ix_task_project_status', 'project_id', 'status'),
+        db.Index('ix_task_project_deadline', 'project_id', 'deadline'),
+        db.Index('ix_task_status', 'status'),
+        db.Index('ix_task_deadline', 'deadline'),
+        db.Index('ix_task_project_version', 'project_id', 'version'),  # ?since= deltas
+    )
+
     task_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -135,12 +175,17 @@ class Task(db.Model):
     completed_by = db.Column(db.String(36), db.ForeignKey('user.user_id'), nullable=True)  # User who completed the task
     accumulated_work_time = db.Column(db.Integer, default=0, nullable=False)  # Total seconds spent in in_progress status
     last_progress_start = db.Column(db.Integer, nullable=True)  # Track current in_progress session start
+    version = db.Column(db.BigInteger, default=0, server_default='0', nullable=False)  # Project version of the last change
     
     # Relationships
     assignees = db.relationship('User', secondary=task_assignees, lazy='subquery',
         backref=db.backref('assigned_tasks', lazy=True))
     
-    def to_dict(self):
+    def referenced_user_ids(self):
+        """User ids whose names appear in the serialized task"""
+        return [self.created_by, self.started_by, self.reviewed_by, self.completed_by]
+
+    def to_dict(self, user_names=None):
         # Calculate time worked: accumulated time in in_progress status
         time_worked = self.accumulated_work_time
         
@@ -155,11 +200,9 @@ class Task(db.Model):
         if self.status == 'done' and self.completed_at and self.created_at:
             total_time = self.completed_at - self.created_at
         
-        # Get user names for activity tracking
-        created_by_user = User.query.get(self.created_by) if self.created_by else None
-        started_by_user = User.query.get(self.started_by) if self.started_by else None
-        reviewed_by_user = User.query.get(self.reviewed_by) if self.reviewed_by else None
-        completed_by_user = User.query.get(self.completed_by) if self.completed_by else None
+        # Get user names for activity tracking (single query when not prefetched)
+        if user_names is None:
+            user_names = load_user_names(self.referenced_user_ids())
         
         return {
             'taskId': self.task_id,
@@ -173,31 +216,176 @@ class Task(db.Model):
             'jiraUrl': self.jira_url,
             'createdAt': self.created_at,
             'createdBy': self.created_by,
-            'createdByName': f"{created_by_user.first_name} {created_by_user.last_name}" if created_by_user else None,
+            'createdByName': user_names.get(self.created_by),
             'updatedAt': self.updated_at,
             'startedAt': self.started_at,
             'startedBy': self.started_by,
-            'startedByName': f"{started_by_user.first_name} {started_by_user.last_name}" if started_by_user else None,
+            'startedByName': user_names.get(self.started_by),
             'reviewedAt': self.reviewed_at,
             'reviewedBy': self.reviewed_by,
-            'reviewedByName': f"{reviewed_by_user.first_name} {reviewed_by_user.last_name}" if reviewed_by_user else None,
+            'reviewedByName': user_names.get(self.reviewed_by),
             'completedAt': self.completed_at,
             'completedBy': self.completed_by,
-            'completedByName': f"{completed_by_user.first_name} {completed_by_user.last_name}" if completed_by_user else None,
+            'completedByName': user_names.get(self.completed_by),
             'timeWorked': time_worked,
             'totalTime': total_time,
+            'version': self.version,
             'assignees': [{'userId': u.user_id, 'email': u.email, 'firstName': u.first_name, 'lastName': u.last_name} for u in self.assignees]
         }
 
+def get_user_summaries(user_ids):
+    """
+    Read-through lookup of user summaries (name, email, role, team ids).
+    Cached entries come from user_cache; the rest are loaded with one IN query
+    per table and cached. Returns a dict of user_id -> summary; unknown ids are omitted.
+    """
+    ids = {user_id for user_id in user_ids if user_id}
+    if not ids:
+        return {}
+
+    cached = user_cache.get_many([f"user:{user_id}" for user_id in ids])
+    summaries = {summary['userId']: summary for summary in cached.values()}
+    missing = ids - set(summaries)
+    if not missing:
+        return summaries
+
+    rows = db.session.query(
+        User.user_id, User.first_name, User.last_name, User.email, User.role_id, Role.name
+    ).outerjoin(Role, Role.role_id == User.role_id).filter(User.user_id.in_(missing)).all()
+    team_ids = {}
+    for user_id, team_id in db.session.query(user_teams.c.user_id, user_teams.c.team_id) \
+            .filter(user_teams.c.user_id.in_(missing)):
+        team_ids.setdefault(user_id, []).append(team_id)
+
+    for user_id, first_name, last_name, email, role_id, role_name in rows:
+        summary = {
+            'userId': user_id,
+            'name': f"{first_name} {last_name}",
+            'firstName': first_name,
+            'lastName': last_name,
+            'email': email,
+            'roleId': role_id,
+            'roleName': role_name,
+            'teamIds': sorted(team_ids.get(user_id, []))
+        }
+        user_cache.set(f"user:{user_id}", summary)
+        summaries[user_id] = summary
+    return summaries
+
+def get_user_summary(user_id):
+    return get_user_summaries([user_id]).get(user_id)
+
+def load_user_names(user_ids):
+    """
+    Resolve display names for many users at once (cached, see get_user_summaries).
+    Returns a dict of user_id -> "First Last"; unknown ids are omitted.
+    """
+    return {user_id: summary['name'] for user_id, summary in get_user_summaries(user_ids).items()}
+
+def user_display_name(user_id, default="Unknown"):
+    summary = get_user_summary(user_id)
+    return summary['name'] if summary else default
+
+def get_role_name(role_id):
+    """Cached role_id -> role name lookup"""
+    if not role_id:
+        return None
+    key = f"role:{role_id}"
+    name = user_cache.get(key)
+    if name is None:
+        role = Role.query.get(role_id)
+        if not role:
+            return None
+        name = role.name
+        user_cache.set(key, name)
+    return name
+
+def invalidate_users(*user_ids):
+    """Drop cached summaries after a user, role or team membership change"""
+    user_cache.delete(*[f"user:{user_id}" for user_id in user_ids if user_id])
+
+# Serialized task keys that need a user name lookup
+TASK_NAME_FIELDS = {'createdByName', 'startedByName', 'reviewedByName', 'completedByName'}
+
+def task_load_options(fields=None):
+    """
+    Loader options for task list queries: assignees come in one SELECT ... IN
+    for the whole batch, without eagerly pulling each assignee's teams.
+    Assignees are not loaded at all when a field projection leaves them out.
+    """
+    if fields is not None and 'assignees' not in fields:
+        return (noload(Task.assignees),)
+    return (selectinload(Task.assignees).lazyload(User.teams),)
+
+def serialize_tasks(tasks, fields=None):
+    """
+    Serialize a list of tasks with a constant number of queries.
+    All createdBy/startedBy/reviewedBy/completedBy names are resolved at once,
+    and skipped entirely when `fields` does not ask for any of them.
+    """
+    tasks = list(tasks)
+    user_names = {}
+    if fields is None or fields & TASK_NAME_FIELDS:
+        user_ids = set()
+        for task in tasks:
+            user_ids.update(task.referenced_user_ids())
+        user_names = load_user_names(user_ids)
+
+    data = [task.to_dict(user_names=user_names) for task in tasks]
+    if fields is not None:
+        data = [{key: value for key, value in item.items() if key in fields} for item in data]
+    return data
+
+# Columns behind ?view=summary (created_at is only there for the keyset cursor)
+TASK_SUMMARY_COLUMNS = (Task.task_id, Task.name, Task.status, Task.priority, Task.deadline, Task.created_at)
+
+def task_summary_query():
+    """
+    Query of narrow task rows for board/list views.
+    Rows are plain tuples, so no Task objects are built or tracked by the session.
+    """
+    return db.session.query(*TASK_SUMMARY_COLUMNS)
+
+def serialize_task_summaries(rows, fields=None):
+    """Compact task dicts from task_summary_query rows; assignee ids come from one IN query"""
+    rows = list(rows)
+    assignee_ids = {}
+    if rows and (fields is None or 'assigneeIds' in fields):
+        links = db.session.query(task_assignees.c.task_id, task_assignees.c.user_id) \
+            .filter(task_assignees.c.task_id.in_([row.task_id for row in rows]))
+        for task_id, user_id in links:
+            assignee_ids.setdefault(task_id, []).append(user_id)
+
+    data = [{
+        'taskId': row.task_id,
+        'name': row.name,
+        'status': row.status,
+        'priority': row.priority,
+        'deadline': row.deadline,
+        'assigneeIds': assignee_ids.get(row.task_id, [])
+    } for row in rows]
+    if fields is not None:
+        data = [{key: value for key, value in item.items() if key in fields} for item in data]
+    return data
+
 class TaskActivity(db.Model):
     """
     Model for tracking all task status changes and activities.
     Provides complete audit trail including rejections and backward movements.
     """
     __tablename__ = 'task_activity'
+    __table_args__ = (
+        # Feeds are paged on (timestamp, activity_id); InnoDB appends the
+        # primary key to secondary indexes, so these serve the tie-break too
+        db.Index('ix_task_activity_task_timestamp', 'task_id', 'timestamp'),
+        db.Index('ix_task_activity_project_timestamp', 'project_id', 'timestamp'),
+        db.Index('ix_task_activity_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     activity_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     task_id = db.Column(db.String(36), db.ForeignKey('task.task_id', ondelete='CASCADE'), nullable=False)
+    # Denormalized from the task so the project feed needs no join
+    project_id = db.Column(db.String(36), db.ForeignKey('project.project_id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.String(36), db.ForeignKey('user.user_id'), nullable=False)
     action_type = db.Column(db.String(50), nullable=False)  # 'created', 'status_change', 'assigned', etc.
     old_status = db.Column(db.String(50))  # Previous status (null for creation)
@@ -209,15 +397,112 @@ class TaskActivity(db.Model):
     user = db.relationship('User', backref=db.backref('task_activities', lazy='dynamic'))
     
     def to_dict(self):
-        user = User.query.get(self.user_id)
         return {
             'activityId': self.activity_id,
             'taskId': self.task_id,
+            'projectId': self.project_id,
             'userId': self.user_id,
-            'userName': f"{user.first_name} {user.last_name}" if user else None,
+            'userName': user_display_name(self.user_id, default=None),
             'actionType': self.action_type,
             'oldStatus': self.old_status,
             'newStatus': self.new_status,
             'timestamp': self.timestamp
         }
 
+def task_activity_values(task, user_id, action_type, old_status=None, new_status=None, timestamp=None):
+    """
+    Column values of a TaskActivity row about `task` (a Task, or anything with
+    task_id and project_id), for TaskActivity(**values) or Core inserts.
+    The denormalized project_id is always copied from the task here.
+    """
+    return {
+        'activity_id': str(uuid.uuid4()),
+        'task_id': task.task_id,
+        'project_id': task.project_id,
+        'user_id': user_id,
+        'action_type': action_type,
+        'old_status': old_status,
+        'new_status': new_status,
+        'timestamp': int(datetime.utcnow().timestamp()) if timestamp is None else timestamp
+    }
+
+# Keyset order of the activity feeds
+ACTIVITY_FEED_ORDER = (TaskActivity.timestamp, TaskActivity.activity_id)
+
+def activity_feed_query(with_task_name=False):
+    """
+    Query of activity rows with the acting user's name joined in, so a page
+    of any size is one statement (no per-row user lookups).
+    """
+    columns = [
+        TaskActivity.activity_id, TaskActivity.task_id, TaskActivity.project_id,
+        TaskActivity.user_id, TaskActivity.action_type, TaskActivity.old_status,
+        TaskActivity.new_status, TaskActivity.timestamp,
+        User.first_name, User.last_name
+    ]
+    if with_task_name:
+        columns.append(Task.name.label('task_name'))
+    query = db.session.query(*columns).outerjoin(User, User.user_id == TaskActivity.user_id)
+    if with_task_name:
+        query = query.outerjoin(Task, Task.task_id == TaskActivity.task_id)
+    return query
+
+def serialize_activity_rows(rows):
+    data = []
+    for row in rows:
+        item = {
+            'activityId': row.activity_id,
+            'taskId': row.task_id,
+            'projectId': row.project_id,
+            'userId': row.user_id,
+            'userName': f"{row.first_name} {row.last_name}" if row.first_name is not None else None,
+            'actionType': row.action_type,
+            'oldStatus': row.old_status,
+            'newStatus': row.new_status,
+            'timestamp': row.timestamp
+        }
+        if 'task_name' in row._fields:
+            item['taskName'] = row.task_name
+        data.append(item)
+    return data
+
+
+class ProjectStats(db.Model):
+    """
+    Per-project task aggregates.
+    Maintained incrementally by the task routes (see stats.py) so dashboards
+    don't need to download every task; `flask rebuild-stats` fixes any drift.
+    """
+    __tablename__ = 'project_stats'
+    
+    project_id = db.Column(db.String(36), db.ForeignKey('project.project_id', ondelete='CASCADE'), primary_key=True)
+    
+    # Task counts by status
+    to_do_count = db.Column(db.Integer, default=0, nullable=False)
+    in_progress_count = db.Column(db.Integer, default=0, nullable=False)
+    for_review_count = db.Column(db.Integer, default=0, nullable=False)
+    done_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Task counts by priority
+    low_priority_count = db.Column(db.Integer, default=0, nullable=False)
+    medium_priority_count = db.Column(db.Integer, default=0, nullable=False)
+    high_priority_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    total_work_time = db.Column(db.BigInteger, default=0, nullable=False)  # Sum of accumulated_work_time (seconds)
+    cycle_time_total = db.Column(db.BigInteger, default=0, nullable=False)  # Sum of completed_at - created_at for done tasks
+    cycle_time_count = db.Column(db.Integer, default=0, nullable=False)  # Number of done tasks in cycle_time_total
+
+class TaskTombstone(db.Model):
+    """
+    Marker left by a deleted task, so ?since= delta requests can report
+    the deletion. `version` is the project version of the delete.
+    """
+    __tablename__ = 'task_tombstone'
+    __table_args__ = (
+        db.Index('ix_task_tombstone_project_version', 'project_id', 'version'),
+    )
+    
+    task_id = db.Column(db.String(36), primary_key=True)
+    project_id = db.Column(db.String(36), db.ForeignKey('project.project_id', ondelete='CASCADE'), nullable=False)
+    version = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()), nullable=False)
@@ -0,0 +1,176 @@
+"""
+Pagination helpers.
+Keyset (cursor) pagination and field projection shared by the list endpoints.
+"""
+import base64
+import json
+from flask import request, abort, make_response
+from sqlalchemy import and_, or_
+from .utils import error_response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Representations accepted by ?view= (endpoints that support it)
+VIEWS = ('full', 'summary')
+
+class PageArgs:
+    """
+    Parsed ?limit=&cursor=&fields=&view= query parameters.
+    `paginated` is False when the client asked for neither limit nor cursor,
+    in which case endpoints keep returning plain lists.
+    """
+    def __init__(self, limit=None, cursor=None, fields=None, view='full'):
+        self.paginated = limit is not None or cursor is not None
+        self.limit = limit or DEFAULT_PAGE_SIZE
+        self.cursor = cursor
+        self.fields = fields
+        self.view = view
+
+    def representation(self, **extra):
+        """
+        Normalized query of the representation these arguments select ('' for
+        the default one), plus `extra` parameters that are not None. Used to
+        give each representation of a resource its own ETag.
+        """
+        parts = []
+        if self.view != 'full':
+            parts.append(('view', self.view))
+        if self.fields is not None:
+            parts.append(('fields', ','.join(sorted(self.fields))))
+        if self.paginated:
+            parts.append(('limit', self.limit))
+        if self.cursor is not None:
+            parts.append(('cursor', encode_cursor(self.cursor)))
+        parts.extend((key, value) for key, value in sorted(extra.items()) if value is not None)
+        return '&'.join(f"{key}={value}" for key, value in parts)
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(values, list):
+        raise ValueError("Cursor must encode a list")
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        raise ValueError("Cursor values must be strings or numbers")
+    return values
+
+def _cursor_matches(values, columns):
+    """Whether a decoded cursor holds one value of each sort column's Python type"""
+    if len(values) != len(columns):
+        return False
+    for value, column in zip(values, columns):
+        try:
+            expected = column.type.python_type
+        except NotImplementedError:
+            continue
+        if not isinstance(value, expected):
+            return False
+    return True
+
+def get_page_args():
+    """
+    Read pagination and projection parameters from the request.
+    Returns (PageArgs, None) or (None, error_response)
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
+    view = request.args.get('view', 'full')
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, error_response("limit must be an integer")
+        if limit < 1:
+            return None, error_response("limit must be positive")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return None, error_response("Invalid cursor")
+    else:
+        cursor = None
+
+    if fields:
+        fields = {f.strip() for f in fields.split(',') if f.strip()}
+    else:
+        fields = None
+
+    if view not in VIEWS:
+        return None, error_response(f"view must be one of: {', '.join(VIEWS)}")
+
+    return PageArgs(limit=limit, cursor=cursor, fields=fields, view=view), None
+
+def _keyset_after(columns, values, descending=False):
+    """WHERE clause selecting rows strictly after `values` in (columns...) order"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+def keyset_batches(session, statement, order_columns, batch_size):
+    """
+    Run a Core select in batches of `batch_size` rows, each a LIMIT query
+    resuming after the last row of the previous one in (order_columns...)
+    order. Memory stays bounded on every driver, unlike streaming a single
+    cursor. The order columns must be selected and unique together.
+    Yields lists of rows.
+    """
+    statement = statement.order_by(*order_columns)
+    after = None
+    while True:
+        query = statement if after is None else statement.where(_keyset_after(order_columns, after))
+        rows = session.execute(query.limit(batch_size)).all()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]._mapping
+        after = [last[column] for column in order_columns]
+
+def paginate_query(query, order_columns, page, descending=False):
+    """
+    Apply keyset ordering to a query (newest first when `descending`).
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    query = query.order_by(*[column.desc() if descending else column for column in order_columns])
+    if not page.paginated:
+        return query.all(), None
+
+    if page.cursor is not None:
+        # Cursors come from clients; one from another endpoint or sort order is a 400, not a SQL error
+        if not _cursor_matches(page.cursor, order_columns):
+            abort(make_response(*error_response("Invalid cursor")))
+        query = query.filter(_keyset_after(order_columns, page.cursor, descending))
+
+    items = query.limit(page.limit + 1).all()
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, column.key) for column in order_columns)
+    return items, next_cursor
+
+def project_fields(data, fields):
+    """Keep only the requested keys of a serialized dict (no-op when fields is None)"""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+def page_response(items, next_cursor, page):
+    """
+    Response body for a list endpoint.
+    Plain list when not paginated (backwards compatible), envelope otherwise.
+    """
+    if not page.paginated:
+        return items
+    return {'items': items, 'nextCursor': next_cursor}
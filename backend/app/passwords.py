@@ -0,0 +1,93 @@
+"""
+Password Hashing.
+Runs werkzeug's password hashing and verification off the request's
+(green) thread, in a bounded pool.
+
+Under eventlet every request and Socket.IO connection of a process shares
+one OS thread, so a burst of logins doing PBKDF2/scrypt inline stalls them
+all. Here the work goes to eventlet's native thread pool (tpool) and the
+calling green thread yields until it is done; hashlib releases the GIL
+while hashing, so the hub keeps serving sockets. At most
+PASSWORD_HASH_WORKERS hashes run at once; further logins wait their turn
+(green-aware) instead of piling up CPU work. Other async modes use a
+ThreadPoolExecutor of the same size.
+
+PASSWORD_HASH_METHOD and PASSWORD_SALT_LENGTH are passed to werkzeug.
+Stored hashes made with other parameters still verify; needs_rehash()
+tells the login route to store a fresh hash while it has the plain password.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from .metrics import PASSWORD_HASH_SECONDS
+
+class PasswordHasher:
+    def __init__(self, method='scrypt:32768:8:1', salt_length=16, workers=4):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self._async_mode = None
+        self._slots = None
+        self._executor = None
+        self._method_prefix = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def configure(self, app, async_mode=None):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self._async_mode = async_mode
+        self._slots = None
+        self._executor = None
+        self._method_prefix = None
+
+    def _run(self, operation, func, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if self._async_mode == 'eventlet':
+                from eventlet import tpool
+                from eventlet.semaphore import BoundedSemaphore
+                if self._slots is None:
+                    self._slots = BoundedSemaphore(self.workers)
+                with self._slots:
+                    return tpool.execute(func, *args)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            return self._executor.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def _current_prefix(self):
+        # werkzeug fills in default parameters ('pbkdf2' -> 'pbkdf2:sha256:<iterations>'),
+        # so the stored form of the configured method is learned from one hash
+        if self._method_prefix is None:
+            self._method_prefix = self.hash('').split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other parameters than the configured ones"""
+        if not password_hash or password_hash.count('$') < 2:
+            return True
+        method, salt, _ = password_hash.split('$', 2)
+        return method != self._current_prefix() or len(salt) != self.salt_length
+
+    def stats(self):
+        return {'inFlight': self.in_flight, 'workers': self.workers}
+
+password_hasher = PasswordHasher()
+
+def init_passwords(app):
+    from .extensions import socketio
+    password_hasher.configure(app, async_mode=socketio.async_mode)
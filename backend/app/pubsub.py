@@ -0,0 +1,29 @@
+"""
+Socket.IO Pub/Sub.
+In-process stand-in for the message-queue client managers used when the
+Socket.IO server is scaled out over several worker processes.
+"""
+from socketio import PubSubManager
+
+class LocalPubSubManager(PubSubManager):
+    """
+    Pub/sub client manager that fans messages out inside one process.
+
+    Every Socket.IO server in the process created with the same channel gets
+    the others' room broadcasts, exactly as separate processes would through
+    Redis. Used by tests and single-host benchmarks (SOCKETIO_MESSAGE_QUEUE=local://).
+    """
+    name = 'local'
+
+    # channel -> subscriber queues of every server listening on it
+    _subscribers = {}
+
+    def _publish(self, data):
+        for queue in list(self._subscribers.get(self.channel, [])):
+            queue.put(data)
+
+    def _listen(self):
+        queue = self.server.eio.create_queue()
+        self._subscribers.setdefault(self.channel, []).append(queue)
+        while True:
+            yield queue.get()
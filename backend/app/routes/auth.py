@@ -2,11 +2,13 @@
 Authentication Routes.
 Handles user login, registration, and password management.
 """
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from ..models import db, User
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -15,24 +17,25 @@ def login():
     email = data.get('email')
     password = data.get('password')
     
-    print(f"Login attempt for: {email}")
+    logger.debug("Login attempt for: %s", email)
     
     user = User.query.filter_by(email=email).first()
     if user:
-        print(f"User found: {user.email}")
         if user.check_password(password):
-            print("Password check passed")
             access_token = create_access_token(identity=user.user_id, additional_claims={'role': user.role.name, 'email': user.email})
-            return jsonify(
+            response = jsonify(
                 access_token=access_token, 
                 role=user.role.name,
                 userId=user.user_id,
                 username=f"{user.first_name} {user.last_name}"
-            ), 200
-        else:
-            print("Password check failed")
+            )
+            # Hash parameters changed since this password was stored: store a fresh hash
+            if user.upgrade_password_hash(password):
+                db.session.commit()
+            return response, 200
+        logger.debug("Password check failed for: %s", email)
     else:
-        print("User not found")
+        logger.debug("User not found: %s", email)
     
     return jsonify({"msg": "Bad email or password"}), 401
 
@@ -62,7 +65,7 @@ def request_password_reset():
     
     if user:
         # Mock email sending
-        print(f"Sending password reset email to {email}")
+        logger.info("Sending password reset email to %s", email)
         return jsonify({"msg": "Password reset email sent"}), 200
     
     # Return 200 even if user not found to prevent enumeration
@@ -97,5 +100,5 @@ def update_password():
     user.set_password(new_password)
     db.session.commit()
     
-    print(f"Password updated for {email}")
+    logger.info("Password updated for %s", email)
     return jsonify({"msg": "Password updated successfully"}), 200
@@ -2,9 +2,21 @@
 Project Routes.
 Handles CRUD operations for creating, retrieving, and managing projects.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt
-from ..models import db, Project, Team, User
+from sqlalchemy import and_, exists, literal
+from sqlalchemy.orm import selectinload
+from ..models import (
+    db, Project, Team, Task, TaskTombstone, TaskActivity, serialize_tasks, task_load_options,
+    task_summary_query, serialize_task_summaries,
+    activity_feed_query, serialize_activity_rows, ACTIVITY_FEED_ORDER
+)
+from ..pagination import get_page_args, paginate_query, project_fields, page_response
+from ..access import get_access_context, project_access_error
+from ..stats import get_project_stats, create_project_stats
+from ..export import export_project, EXPORT_FORMATS
+from ..constants import STATUS_IN_PROGRESS
+from ..versioning import bump_project_version, make_etag, not_modified, etag_headers
 
 projects_bp = Blueprint('projects', __name__)
 
@@ -12,60 +24,150 @@ projects_bp = Blueprint('projects', __name__)
 @jwt_required()
 def get_projects():
     """Get all projects (Managers see their team's projects, Admins see all)"""
-    claims = get_jwt()
-    role_claim = claims.get('role')
-    user_id = claims.get('userId') or claims.get('sub')  # Backwards compatibility
+    access = get_access_context()
     
-    if not user_id:
+    if not access.user_id:
         return jsonify({"msg": "Invalid token, please log in again"}), 401
     
-    if role_claim == 'admin':
-        # Admins see all projects
-        projects = Project.query.all()
-    elif role_claim == 'manager':
-        # Managers see projects where they are in assigned teams
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"msg": "User not found"}), 404
-            
-        projects = []
-        # Add projects from teams the manager is in
-        for team in user.teams:
-            projects.extend(team.projects)
-            
-        # Also could add projects created by the manager if not strictly team-based, 
-        # but requirements say "only see their projects". 
-        # Usually implies projects they are working on (via teams). 
-        # If they created a project but didn't assign their team, they might want to see it too.
-        created_projects = Project.query.filter_by(created_by=user_id).all()
-        projects.extend(created_projects)
-
-        # Remove duplicates
-        projects = list(set(projects))
-    else:
-        # Regular users see projects from their teams
-        user = User.query.get(user_id)
-        if not user:
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    # Teams for the whole page come in one SELECT ... IN
+    query = Project.query.options(selectinload(Project.teams))
+    if not access.is_admin:
+        # Managers see projects of their teams plus projects they created,
+        # regular users see projects of their teams. Visibility is a
+        # semi-join on the DISTINCT project ids, so it stays one statement
+        # and the keyset order on (created_at, project_id) is unaffected.
+        if not access.exists:
             return jsonify({"msg": "User not found"}), 404
-        projects = []
-        for team in user.teams:
-            projects.extend(team.projects)
-        projects = list(set(projects))
+        query = query.filter(Project.project_id.in_(access.visible_projects_query()))
     
-    return jsonify([p.to_dict() for p in projects]), 200
+    projects, next_cursor = paginate_query(query, (Project.created_at, Project.project_id), page)
+    items = [project_fields(p.to_dict(), page.fields) for p in projects]
+    return jsonify(page_response(items, next_cursor, page)), 200
 
 """Get project details with teams, epics, and tasks"""
 @projects_bp.route('/projects/<project_id>', methods=['GET'])
 @jwt_required()
 def get_project_details(project_id):
-    project = Project.query.get(project_id)
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"msg": "since must be an integer version"}), 400
+    
+    # Revalidation is answered from the project row alone, before any task is read.
+    # timeWorked of in-progress tasks grows with the clock, not the version, so a
+    # representation holding one is never cached (the EXISTS is served by ix_task_project_status).
+    time_dependent = page.view == 'full' and (page.fields is None or 'timeWorked' in page.fields)
+    running = exists().where(Task.project_id == Project.project_id, Task.status == STATUS_IN_PROGRESS)
+    row = db.session.query(Project.version, running if time_dependent else literal(False)) \
+        .filter(Project.project_id == project_id).first()
+    if row is None:
+        return jsonify({"msg": "Project not found"}), 404
+    error = project_access_error(project_id)
+    if error:
+        return error
+    version, has_running_tasks = row
+    etag = None
+    if not has_running_tasks:
+        etag = make_etag('project', project_id, version, page.representation(since=since))
+        response = not_modified(etag)
+        if response:
+            return response
+    
+    project = Project.query.options(selectinload(Project.teams)).get(project_id)
     if not project:
         return jsonify({"msg": "Project not found"}), 404
     
+    # limit/cursor/fields/view apply to the embedded task list
     project_data = project.to_dict()
-    project_data['tasks'] = [t.to_dict() for t in project.tasks]
+    project_data['version'] = version
+    task_filter = Task.project_id == project_id
+    order_columns = (Task.created_at, Task.task_id)
+    if since is not None:
+        # Delta mode: only tasks changed after `since`, plus deleted task ids
+        task_filter = and_(task_filter, Task.version > since)
+        order_columns = (Task.version, Task.task_id)
+        project_data['since'] = since
+        project_data['deletedTaskIds'] = [] if page.cursor is not None else [
+            task_id for task_id, in db.session.query(TaskTombstone.task_id)
+            .filter(TaskTombstone.project_id == project_id, TaskTombstone.version > since)
+        ]
+    
+    if page.view == 'summary':
+        rows, next_cursor = paginate_query(task_summary_query().filter(task_filter), order_columns, page)
+        project_data['tasks'] = serialize_task_summaries(rows, page.fields)
+    else:
+        query = Task.query.options(*task_load_options(page.fields)).filter(task_filter)
+        tasks, next_cursor = paginate_query(query, order_columns, page)
+        project_data['tasks'] = serialize_tasks(tasks, page.fields)
+    if page.paginated:
+        project_data['tasksNextCursor'] = next_cursor
+    
+    return jsonify(project_data), 200, etag_headers(etag) if etag else {}
+
+"""Get precomputed task statistics for a project"""
+@projects_bp.route('/projects/<project_id>/stats', methods=['GET'])
+@jwt_required()
+def get_project_statistics(project_id):
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({"msg": "Project not found"}), 404
+    error = project_access_error(project_id)
+    if error:
+        return error
+    
+    return jsonify(get_project_stats(project_id)), 200
+
+"""Activity feed of all tasks in a project, newest first (supports ?limit=&cursor=&fields=)"""
+@projects_bp.route('/projects/<project_id>/activities', methods=['GET'])
+@jwt_required()
+def get_project_activities(project_id):
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    if not db.session.query(Project.project_id).filter_by(project_id=project_id).scalar():
+        return jsonify({"msg": "Project not found"}), 404
+    error = project_access_error(project_id)
+    if error:
+        return error
     
-    return jsonify(project_data), 200
+    # One query per page, served by the (project_id, timestamp) index
+    query = activity_feed_query(with_task_name=True).filter(TaskActivity.project_id == project_id)
+    rows, next_cursor = paginate_query(query, ACTIVITY_FEED_ORDER, page, descending=True)
+    items = [project_fields(item, page.fields) for item in serialize_activity_rows(rows)]
+    return jsonify(page_response(items, next_cursor, page)), 200
+
+"""Stream a project's tasks, assignees and activity history as NDJSON or CSV"""
+@projects_bp.route('/projects/<project_id>/export', methods=['GET'])
+@jwt_required()
+def export_project_data(project_id):
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"msg": f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({"msg": "Project not found"}), 404
+    error = project_access_error(project_id)
+    if error:
+        return error
+    
+    # No Content-Length: the body is sent with chunked transfer encoding
+    return Response(
+        stream_with_context(export_project(project_id, export_format)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=project-{project_id}.{export_format}'}
+    )
 
 """Create a new project (Admin/Manager only)"""
 @projects_bp.route('/projects', methods=['POST'])
@@ -103,6 +205,9 @@ def create_project():
             project.teams.append(team)
     
     db.session.add(project)
+    db.session.flush()
+    # Task writes then only ever UPDATE the stats row
+    create_project_stats(project.project_id)
     db.session.commit()
     
     # TODO: Create Jira project (will implement in jira_integration)
@@ -129,6 +234,7 @@ def update_project(project_id):
         project.name = data['name']
     if 'description' in data:
         project.description = data['description']
+    bump_project_version(project_id)
     if 'teamIds' in data:
         # Update team assignments
         project.teams = []
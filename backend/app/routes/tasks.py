@@ -2,28 +2,130 @@
 Task Routes.
 Handles creation, updating, and retrieval of tasks, including activity tracking and assignments.
 """
-from flask import Blueprint, request
+import logging
+import uuid
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from sqlalchemy import insert
+from sqlalchemy.orm import noload, lazyload
 from flask_jwt_extended import jwt_required
-from ..models import db, Task, Project, User, TaskActivity
+from ..models import (
+    db, Task, Project, User, TaskActivity, task_assignees, task_activity_values,
+    serialize_tasks, task_load_options, get_role_name, load_user_names,
+    task_summary_query, serialize_task_summaries,
+    activity_feed_query, serialize_activity_rows, ACTIVITY_FEED_ORDER
+)
 from ..utils import (
     get_current_user_id, get_current_user_role,
     success_response, error_response,
     validate_user_id, check_role
 )
 from ..constants import ADMIN_MANAGER, ALL_PRIORITIES, ALL_STATUSES
+from ..pagination import get_page_args, paginate_query, project_fields, page_response
+from ..stats import task_contribution, apply_task_delta, sum_contributions
+from ..task_import import import_tasks, IMPORT_FORMATS
+from ..access import get_access_context, project_access_error
+from ..versioning import touch_task, touch_tasks, record_task_deletion
+from ..task_events import (
+    TASK_CREATED, TASK_UPDATED, TASK_STATUS_CHANGED, TASK_DELETED, MAX_EVENT_TASKS,
+    queue_task_event, queue_bulk_task_event, task_changes
+)
 
 tasks_bp = Blueprint('tasks', __name__)
+logger = logging.getLogger(__name__)
+
+# Maximum number of items accepted by the /tasks/batch endpoints
+MAX_BATCH_SIZE = 1000
+
+def load_users_by_id(user_ids):
+    """Load many users with one IN query (teams are not eagerly loaded)"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return {}
+    users = User.query.options(lazyload(User.teams)).filter(User.user_id.in_(user_ids)).all()
+    return {user.user_id: user for user in users}
+
+def apply_status_transition(task, status, user_id, current_timestamp):
+    """
+    Move a task to `status`, applying the workflow time-tracking rules
+    (started/reviewed/completed stamps, accumulated work time, resets on
+    backward moves). Returns the previous status. Does not log activity or commit.
+    """
+    old_status = task.status
+    task.status = status
+    
+    # Track when work started (to_do -> in_progress)
+    if status == 'in_progress':
+        if old_status == 'to_do' and not task.started_at:
+            task.started_at = current_timestamp
+            task.started_by = user_id
+        # Track the start of this work session
+        task.last_progress_start = current_timestamp
+    
+    # Track when sent for review or done (accumulate work time)
+    if old_status == 'in_progress' and status in ['for_review', 'done', 'to_do']:
+        # Calculate and accumulate the work time for this session
+        if task.last_progress_start:
+            session_time = current_timestamp - task.last_progress_start
+            task.accumulated_work_time = (task.accumulated_work_time or 0) + session_time
+            task.last_progress_start = None
+    
+    # Track when sent for review
+    if status == 'for_review' and old_status == 'in_progress' and not task.reviewed_at:
+        task.reviewed_at = current_timestamp
+        task.reviewed_by = user_id
+    
+    # Track completion time when task is marked as done (only managers)
+    if status == 'done' and old_status != 'done':
+        task.completed_at = current_timestamp
+        task.completed_by = user_id
+    
+    # Clear timestamps and users if task is moved backwards in workflow
+    if status == 'to_do':
+        task.started_at = None
+        task.started_by = None
+        task.reviewed_at = None
+        task.reviewed_by = None
+        task.completed_at = None
+        task.completed_by = None
+        # Keep accumulated work time, just reset the session
+        task.last_progress_start = None
+    elif status == 'in_progress' and old_status in ['for_review', 'done']:
+        # If moving back to in_progress from review/done, clear review/completion timestamps
+        task.reviewed_at = None
+        task.reviewed_by = None
+        task.completed_at = None
+        task.completed_by = None
+    elif status == 'for_review':
+        task.completed_at = None
+        task.completed_by = None
+    
+    return old_status
 
 @tasks_bp.route('/projects/<project_id>/tasks', methods=['GET'])
 @jwt_required()
 def get_tasks(project_id):
-    """Get all tasks for a project"""
+    """Get tasks for a project (supports ?limit=&cursor=&fields=&view=summary)"""
+    page, error = get_page_args()
+    if error:
+        return error
+    
     project = Project.query.get(project_id)
     if not project:
         return error_response("Project not found", 404)
+    error = project_access_error(project_id)
+    if error:
+        return error
+    
+    order_columns = (Task.created_at, Task.task_id)
+    if page.view == 'summary':
+        query = task_summary_query().filter(Task.project_id == project_id)
+        rows, next_cursor = paginate_query(query, order_columns, page)
+        return success_response(page_response(serialize_task_summaries(rows, page.fields), next_cursor, page))
     
-    tasks = Task.query.filter_by(project_id=project_id).all()
-    return success_response([t.to_dict() for t in tasks])
+    query = Task.query.options(*task_load_options(page.fields)).filter_by(project_id=project_id)
+    tasks, next_cursor = paginate_query(query, order_columns, page)
+    return success_response(page_response(serialize_tasks(tasks, page.fields), next_cursor, page))
 
 """Get tasks assigned to current user"""
 @tasks_bp.route('/tasks/my-tasks', methods=['GET'])
@@ -34,12 +136,26 @@ def get_my_tasks():
     if error:
         return error
     
-    user = User.query.get(user_id)
-    if not user:
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    if not get_access_context().exists:
         return error_response("User not found", 404)
     
-    tasks = user.assigned_tasks
-    return success_response([t.to_dict() for t in tasks])
+    order_columns = (Task.created_at, Task.task_id)
+    if page.view == 'summary':
+        query = task_summary_query() \
+            .join(task_assignees, task_assignees.c.task_id == Task.task_id) \
+            .filter(task_assignees.c.user_id == user_id)
+        rows, next_cursor = paginate_query(query, order_columns, page)
+        return success_response(page_response(serialize_task_summaries(rows, page.fields), next_cursor, page))
+    
+    query = Task.query.options(*task_load_options(page.fields)) \
+        .join(task_assignees, task_assignees.c.task_id == Task.task_id) \
+        .filter(task_assignees.c.user_id == user_id)
+    tasks, next_cursor = paginate_query(query, order_columns, page)
+    return success_response(page_response(serialize_tasks(tasks, page.fields), next_cursor, page))
 
 """Create a new task (Admin/Manager only)"""
 @tasks_bp.route('/projects/<project_id>/tasks', methods=['POST'])
@@ -73,38 +189,42 @@ def create_task(project_id):
     if priority not in ALL_PRIORITIES:
         return error_response(f"Priority must be one of: {', '.join(ALL_PRIORITIES)}")
     
+    # Ids are generated here so the task and its activity are flushed together
+    current_timestamp = int(datetime.utcnow().timestamp())
     task = Task(
+        task_id=str(uuid.uuid4()),
         name=name,
         description=description,
         project_id=project_id,
         priority=priority,
+        status='to_do',
         deadline=deadline,
-        created_by=user_id
+        created_at=current_timestamp,
+        created_by=user_id,
+        accumulated_work_time=0
     )
     
-    # Assign users to task
-    for assignee_id in assignee_ids:
-        user = User.query.get(assignee_id)
-        if user:
-            task.assignees.append(user)
-    
-    db.session.add(task)
-    db.session.commit()
+    # Assign users to task (one IN query for all assignees)
+    users = load_users_by_id(assignee_ids)
+    task.assignees = [users[a] for a in dict.fromkeys(assignee_ids) if a in users]
     
     # Log task creation activity
-    creation_activity = TaskActivity(
-        task_id=task.task_id,
-        user_id=user_id,
-        action_type='created',
-        old_status=None,
-        new_status='to_do'
-    )
+    creation_activity = TaskActivity(**task_activity_values(
+        task, user_id, 'created', new_status='to_do', timestamp=current_timestamp
+    ))
+    db.session.add(task)
     db.session.add(creation_activity)
+    touch_task(task)
+    apply_task_delta(project_id, {}, task_contribution(task))
+    
+    # Serialize before committing so the response does not reload the expired task
+    task_data = task.to_dict()
+    queue_task_event(TASK_CREATED, project_id, task_data)
     db.session.commit()
     
     # TODO: Create Jira issue (will implement in jira_integration)
     
-    return success_response(task.to_dict(), 201)
+    return success_response(task_data, 201)
 
 """Update task details (Admin/Manager only for priority/deadline, all users for other fields)"""
 @tasks_bp.route('/tasks/<task_id>', methods=['PUT'])
@@ -127,6 +247,9 @@ def update_task(task_id):
     if error:
         return error
     
+    stats_before = task_contribution(task)
+    before = task.to_dict()
+    
     if 'name' in data:
         task.name = data['name']
     if 'description' in data:
@@ -137,22 +260,26 @@ def update_task(task_id):
     if 'deadline' in data:
         task.deadline = data['deadline']
     if 'assigneeIds' in data:
-        # Update assignees
-        task.assignees = []
-        for assignee_id in data['assigneeIds']:
-            user = User.query.get(assignee_id)
-            if user:
-                task.assignees.append(user)
-    
+        # Update assignees (one IN query for all assignees)
+        users = load_users_by_id(data['assigneeIds'])
+        task.assignees = [users[a] for a in dict.fromkeys(data['assigneeIds']) if a in users]
+    
+    touch_task(task)
+    apply_task_delta(task.project_id, stats_before, task_contribution(task))
+    
+    # Flushed first so updatedAt is part of both the event and the response
+    db.session.flush()
+    task_data = task.to_dict()
+    queue_task_event(TASK_UPDATED, task.project_id, {
+        'taskId': task_id, 'version': task.version, 'changes': task_changes(before, task_data)
+    })
     db.session.commit()
-    return success_response(task.to_dict())
+    return success_response(task_data)
 
 """Update task status (All authenticated users)"""
 @tasks_bp.route('/tasks/<task_id>/status', methods=['PUT'])
 @jwt_required()
 def update_task_status(task_id):
-    from datetime import datetime
-    
     user_id = get_current_user_id()
     role = get_current_user_role()
     
@@ -170,89 +297,51 @@ def update_task_status(task_id):
     if status == 'done' and role not in ['admin', 'manager']:
         return error_response("Only managers and admins can mark tasks as done", 403)
     
-    old_status = task.status
-    task.status = status
-    
-    current_timestamp = int(datetime.utcnow().timestamp())
+    stats_before = task_contribution(task)
+    before = task.to_dict()
+    old_status = apply_status_transition(task, status, user_id, int(datetime.utcnow().timestamp()))
     
     # Log activity to task_activity table
-    activity = TaskActivity(
-        task_id=task_id,
-        user_id=user_id,
-        action_type='status_change',
-        old_status=old_status,
-        new_status=status
-    )
+    activity = TaskActivity(**task_activity_values(
+        task, user_id, 'status_change', old_status=old_status, new_status=status
+    ))
     db.session.add(activity)
     
-    # Track when work started (to_do -> in_progress)
-    if status == 'in_progress':
-        if old_status == 'to_do' and not task.started_at:
-            task.started_at = current_timestamp
-            task.started_by = user_id
-        # Track the start of this work session
-        task.last_progress_start = current_timestamp
-    
-    # Track when sent for review or done (accumulate work time)
-    if old_status == 'in_progress' and status in ['for_review', 'done', 'to_do']:
-        # Calculate and accumulate the work time for this session
-        if task.last_progress_start:
-            session_time = current_timestamp - task.last_progress_start
-            task.accumulated_work_time = (task.accumulated_work_time or 0) + session_time
-            task.last_progress_start = None
-    
-    # Track when sent for review
-    if status == 'for_review' and old_status == 'in_progress' and not task.reviewed_at:
-        task.reviewed_at = current_timestamp
-        task.reviewed_by = user_id
-    
-    # Track completion time when task is marked as done (only managers)
-    if status == 'done' and old_status != 'done':
-        task.completed_at = current_timestamp
-        task.completed_by = user_id
-    
-    # Clear timestamps and users if task is moved backwards in workflow
-    if status == 'to_do':
-        task.started_at = None
-        task.started_by = None
-        task.reviewed_at = None
-        task.reviewed_by = None
-        task.completed_at = None
-        task.completed_by = None
-        # Keep accumulated work time, just reset the session
-        task.last_progress_start = None
-    elif status == 'in_progress' and old_status in ['for_review', 'done']:
-        # If moving back to in_progress from review/done, clear review/completion timestamps
-        task.reviewed_at = None
-        task.reviewed_by = None
-        task.completed_at = None
-        task.completed_by = None
-    elif status == 'for_review':
-        task.completed_at = None
-        task.completed_by = None
+    touch_task(task)
+    apply_task_delta(task.project_id, stats_before, task_contribution(task))
     
+    db.session.flush()
+    task_data = task.to_dict()
+    queue_task_event(TASK_STATUS_CHANGED, task.project_id, {
+        'taskId': task_id, 'version': task.version, 'oldStatus': old_status,
+        'changes': task_changes(before, task_data)
+    })
     db.session.commit()
     
     # TODO: Send notification if status changed to for_review or done
     # This would integrate with Communication Service
     if status in ['for_review', 'done'] and old_status != status:
         # Placeholder for notification logic
-        print(f"Task {task.name} moved to {status} - notification should be sent")
+        logger.info("Task %s moved to %s - notification should be sent", task_data['name'], status)
     
-    return success_response(task.to_dict())
+    return success_response(task_data)
 
 """Get activity history for a task"""
 @tasks_bp.route('/tasks/<task_id>/activities', methods=['GET'])
 @jwt_required()
 def get_task_activities(task_id):
-    task = Task.query.get(task_id)
-    if not task:
+    if not db.session.query(Task.task_id).filter_by(task_id=task_id).scalar():
         return error_response("Task not found", 404)
     
-    # Get all activities for this task, ordered by timestamp
-    activities = TaskActivity.query.filter_by(task_id=task_id).order_by(TaskActivity.timestamp.asc()).all()
+    page, error = get_page_args()
+    if error:
+        return error
     
-    return success_response([activity.to_dict() for activity in activities])
+    # Oldest first, user names joined in (served by the (task_id, timestamp) index)
+    query = activity_feed_query().filter(TaskActivity.task_id == task_id)
+    rows, next_cursor = paginate_query(query, ACTIVITY_FEED_ORDER, page)
+    items = [project_fields(item, page.fields) for item in serialize_activity_rows(rows)]
+    return success_response(page_response(items, next_cursor, page))
 
 """Delete a task (Admin/Manager only)"""
 @tasks_bp.route('/tasks/<task_id>', methods=['DELETE'])
@@ -267,7 +356,11 @@ def delete_task(task_id):
     if not task:
         return error_response("Task not found", 404)
     
+    stats_before = task_contribution(task)
     db.session.delete(task)
+    version = record_task_deletion(task)
+    apply_task_delta(task.project_id, stats_before, {})
+    queue_task_event(TASK_DELETED, task.project_id, {'taskId': task_id, 'version': version})
     db.session.commit()
     
     return success_response({"msg": "Task deleted"})
@@ -285,7 +378,317 @@ def get_task_assignees(task_id):
         'firstName': user.first_name,
         'lastName': user.last_name,
         'email': user.email,
-        'role': user.role.name if user.role else None
+        'role': get_role_name(user.role_id)
     } for user in task.assignees]
     
     return success_response(assignees)
+
+def assignee_ids_error(value, required=False):
+    """Why `value` is not a list of user ids (None is accepted unless required), or None"""
+    if value is None and not required:
+        return None
+    if not isinstance(value, list) or not all(isinstance(a, str) for a in value):
+        return "assigneeIds must be a list of user ids"
+    return None
+
+def status_shape_error(value):
+    # Unknown status names are reported per task; only the type is checked up front
+    return None if isinstance(value, str) else "status must be a string"
+
+def batch_items_error(errors):
+    """400 listing the items of a batch that are malformed ([{index, error}])"""
+    return jsonify({"msg": "Invalid batch items", "errors": errors}), 400
+
+def get_batch_items(data, value_key, value_error):
+    """
+    Normalize a batch request body.
+    Accepts {"items": [{"taskId": ..., value_key: ...}, ...]} or the shorthand
+    {"taskIds": [...], value_key: ...} applying one value to every task.
+    Every item must have a string taskId and a value for which
+    value_error(value) returns None; otherwise the whole batch is a 400
+    naming the bad items, before any id is used.
+    Returns (items, None) or (None, error_response)
+    """
+    if not isinstance(data, dict):
+        return None, error_response("Request body must be an object")
+    if 'items' in data:
+        items = data.get('items')
+    else:
+        task_ids = data.get('taskIds')
+        if not isinstance(task_ids, list):
+            return None, error_response("Provide either items or taskIds")
+        items = [{'taskId': task_id, value_key: data.get(value_key)} for task_id in task_ids]
+    
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return None, error_response("items must be a list of objects")
+    if not items:
+        return None, error_response("No tasks given")
+    if len(items) > MAX_BATCH_SIZE:
+        return None, error_response(f"At most {MAX_BATCH_SIZE} tasks per batch")
+    
+    errors = []
+    for index, item in enumerate(items):
+        error = "taskId must be a string" if not isinstance(item.get('taskId'), str) else value_error(item.get(value_key))
+        if error:
+            errors.append({'index': index, 'error': error})
+    if errors:
+        return None, batch_items_error(errors)
+    return items, None
+
+def queue_batch_changes(event_name, tasks, snapshots, user_names):
+    """
+    Queue change entries for the tasks a batch touched (`snapshots`: task_id ->
+    to_dict() before the change, or None when the batch is too large to describe).
+    """
+    if snapshots is None:
+        for task in {t.project_id: t for t in tasks}.values():
+            queue_bulk_task_event(event_name, task.project_id, task.version)
+        return
+    db.session.flush()
+    for task in tasks:
+        before = snapshots[task.task_id]
+        entry = {
+            'taskId': task.task_id,
+            'version': task.version,
+            'changes': task_changes(before, task.to_dict(user_names=user_names))
+        }
+        if event_name == TASK_STATUS_CHANGED:
+            entry['oldStatus'] = before['status']
+        queue_task_event(event_name, task.project_id, entry)
+
+"""Create many tasks in one transaction (Admin/Manager only)"""
+@tasks_bp.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+def batch_create_tasks():
+    user_id = get_current_user_id()
+    role = get_current_user_role()
+    
+    error = validate_user_id(user_id)
+    if error:
+        return error
+    
+    error = check_role(role, ADMIN_MANAGER)
+    if error:
+        return error
+    
+    data = request.get_json() or {}
+    project_id = data.get('projectId')
+    items = data.get('tasks')
+    
+    if not isinstance(items, list) or not items:
+        return error_response("tasks must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        return error_response(f"At most {MAX_BATCH_SIZE} tasks per batch")
+    
+    # Malformed ids or deadlines would fail the whole batch later (unhashable, not iterable, not an integer)
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        error = assignee_ids_error(item.get('assigneeIds'))
+        deadline = item.get('deadline')
+        if not error and deadline is not None and (not isinstance(deadline, int) or isinstance(deadline, bool)):
+            error = "deadline must be an integer timestamp"
+        if error:
+            errors.append({'index': index, 'error': error})
+    if errors:
+        return batch_items_error(errors)
+    
+    project = Project.query.get(project_id)
+    if not project:
+        return error_response("Project not found", 404)
+    
+    users = load_users_by_id(
+        assignee_id
+        for item in items if isinstance(item, dict)
+        for assignee_id in (item.get('assigneeIds') or [])
+    )
+    current_timestamp = int(datetime.utcnow().timestamp())
+    
+    results = []
+    created = []
+    activity_rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('name'):
+            results.append({'index': index, 'ok': False, 'error': "Task name is required"})
+            continue
+        priority = item.get('priority', 'medium')
+        if priority not in ALL_PRIORITIES:
+            results.append({'index': index, 'ok': False,
+                            'error': f"Priority must be one of: {', '.join(ALL_PRIORITIES)}"})
+            continue
+        
+        task = Task(
+            task_id=str(uuid.uuid4()),
+            name=item['name'],
+            description=item.get('description', ''),
+            project_id=project_id,
+            priority=priority,
+            status='to_do',
+            deadline=item.get('deadline'),
+            created_at=current_timestamp,
+            created_by=user_id,
+            accumulated_work_time=0
+        )
+        task.assignees = [users[a] for a in dict.fromkeys(item.get('assigneeIds') or []) if a in users]
+        created.append(task)
+        activity_rows.append(task_activity_values(task, user_id, 'created', new_status='to_do',
+                                                  timestamp=current_timestamp))
+        results.append({'index': index, 'ok': True, 'taskId': task.task_id})
+    
+    if created:
+        touch_tasks(created)
+        db.session.add_all(created)
+        db.session.flush()
+        db.session.execute(insert(TaskActivity), activity_rows)
+        apply_task_delta(project_id, {}, sum_contributions(task_contribution(t) for t in created))
+        if len(created) > MAX_EVENT_TASKS:
+            queue_bulk_task_event(TASK_CREATED, project_id, created[0].version)
+        else:
+            for task_data in serialize_tasks(created):
+                queue_task_event(TASK_CREATED, project_id, task_data)
+        db.session.commit()
+    
+    return success_response({'created': len(created), 'results': results}, 201)
+
+"""Change the status of many tasks in one transaction (All authenticated users)"""
+@tasks_bp.route('/tasks/batch/status', methods=['POST'])
+@jwt_required()
+def batch_update_task_status():
+    user_id = get_current_user_id()
+    role = get_current_user_role()
+    
+    error = validate_user_id(user_id)
+    if error:
+        return error
+    
+    items, error = get_batch_items(request.get_json() or {}, 'status', status_shape_error)
+    if error:
+        return error
+    
+    task_ids = {item.get('taskId') for item in items}
+    tasks = {t.task_id: t for t in Task.query.options(noload(Task.assignees)).filter(Task.task_id.in_(task_ids))}
+    current_timestamp = int(datetime.utcnow().timestamp())
+    
+    # Before-images for the task_status_changed event (names resolved once)
+    snapshots = {} if len(tasks) <= MAX_EVENT_TASKS else None
+    user_names = {}
+    if snapshots is not None:
+        user_names = load_user_names({user_id}.union(*(t.referenced_user_ids() for t in tasks.values())))
+    
+    results = []
+    activity_rows = []
+    stats_before = {}
+    stats_after = {}
+    for item in items:
+        task_id = item.get('taskId')
+        status = item.get('status')
+        task = tasks.get(task_id)
+        if not task:
+            results.append({'taskId': task_id, 'ok': False, 'error': "Task not found"})
+            continue
+        if status not in ALL_STATUSES:
+            results.append({'taskId': task_id, 'ok': False,
+                            'error': f"Invalid status. Must be one of: {', '.join(ALL_STATUSES)}"})
+            continue
+        # Only managers/admins can mark task as done
+        if status == 'done' and role not in ['admin', 'manager']:
+            results.append({'taskId': task_id, 'ok': False,
+                            'error': "Only managers and admins can mark tasks as done"})
+            continue
+        
+        if snapshots is not None and task_id not in snapshots:
+            snapshots[task_id] = task.to_dict(user_names=user_names)
+        stats_before.setdefault(task.project_id, []).append(task_contribution(task))
+        old_status = apply_status_transition(task, status, user_id, current_timestamp)
+        stats_after.setdefault(task.project_id, []).append(task_contribution(task))
+        
+        activity_rows.append(task_activity_values(task, user_id, 'status_change', old_status=old_status,
+                                                  new_status=status, timestamp=current_timestamp))
+        results.append({'taskId': task_id, 'ok': True, 'oldStatus': old_status, 'status': status})
+    
+    if activity_rows:
+        changed = list({result['taskId']: tasks[result['taskId']] for result in results if result['ok']}.values())
+        touch_tasks(changed)
+        db.session.execute(insert(TaskActivity), activity_rows)
+        for project_id in stats_before:
+            apply_task_delta(project_id, sum_contributions(stats_before[project_id]),
+                             sum_contributions(stats_after[project_id]))
+        queue_batch_changes(TASK_STATUS_CHANGED, changed, snapshots, user_names)
+        db.session.commit()
+    
+    return success_response({'updated': len(activity_rows), 'results': results})
+
+"""Replace the assignees of many tasks in one transaction (Admin/Manager only)"""
+@tasks_bp.route('/tasks/batch/assignees', methods=['POST'])
+@jwt_required()
+def batch_reassign_tasks():
+    role = get_current_user_role()
+    error = check_role(role, ADMIN_MANAGER)
+    if error:
+        return error
+    
+    items, error = get_batch_items(request.get_json() or {}, 'assigneeIds',
+                                   lambda value: assignee_ids_error(value, required=True))
+    if error:
+        return error
+    
+    task_ids = {item.get('taskId') for item in items}
+    tasks = {t.task_id: t for t in Task.query.options(*task_load_options()).filter(Task.task_id.in_(task_ids))}
+    users = load_users_by_id(
+        assignee_id for item in items for assignee_id in (item.get('assigneeIds') or [])
+    )
+    
+    # Before-images for the task_updated event (names resolved once)
+    snapshots = {} if len(tasks) <= MAX_EVENT_TASKS else None
+    user_names = {}
+    if snapshots is not None:
+        user_names = load_user_names(set().union(*(t.referenced_user_ids() for t in tasks.values())))
+    
+    results = []
+    for item in items:
+        task_id = item.get('taskId')
+        task = tasks.get(task_id)
+        if not task:
+            results.append({'taskId': task_id, 'ok': False, 'error': "Task not found"})
+            continue
+        if snapshots is not None and task_id not in snapshots:
+            snapshots[task_id] = task.to_dict(user_names=user_names)
+        task.assignees = [users[a] for a in dict.fromkeys(item['assigneeIds']) if a in users]
+        results.append({'taskId': task_id, 'ok': True, 'assigneeIds': [u.user_id for u in task.assignees]})
+    
+    changed = list({result['taskId']: tasks[result['taskId']] for result in results if result['ok']}.values())
+    touch_tasks(changed)
+    queue_batch_changes(TASK_UPDATED, changed, snapshots, user_names)
+    db.session.commit()
+    return success_response({'results': results})
+
+"""Import tasks into a project from a CSV or NDJSON upload (Admin/Manager only)"""
+@tasks_bp.route('/projects/<project_id>/tasks/import', methods=['POST'])
+@jwt_required()
+def import_project_tasks(project_id):
+    user_id = get_current_user_id()
+    role = get_current_user_role()
+    
+    error = validate_user_id(user_id)
+    if error:
+        return error
+    
+    error = check_role(role, ADMIN_MANAGER)
+    if error:
+        return error
+    
+    # ?format= wins, otherwise the upload's Content-Type decides
+    import_format = request.args.get('format')
+    if not import_format:
+        import_format = next((f for f, mimetype in IMPORT_FORMATS.items() if mimetype == request.mimetype), 'ndjson')
+    if import_format not in IMPORT_FORMATS:
+        return error_response(f"Invalid format. Must be one of: {', '.join(IMPORT_FORMATS)}")
+    
+    project = Project.query.get(project_id)
+    if not project:
+        return error_response("Project not found", 404)
+    
+    # The body is read from the raw stream, never buffered as a whole
+    result = import_tasks(project_id, user_id, request.stream, import_format)
+    return success_response(result, 201 if result['imported'] else 200)
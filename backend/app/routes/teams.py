@@ -4,7 +4,10 @@ Handles team management including adding members and listing teams.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
-from ..models import db, Team, User
+from ..models import db, Team, User, invalidate_users
+from ..access import get_access_context, reset_access_context
+from ..versioning import bump_team_versions, bump_team_projects, make_etag, not_modified, etag_headers
+from ..pagination import get_page_args, paginate_query, project_fields, page_response
 
 teams_bp = Blueprint('teams', __name__)
 
@@ -12,35 +15,37 @@ teams_bp = Blueprint('teams', __name__)
 @jwt_required()
 def get_teams():
     """Get all teams (Admin gets all, Manager gets only their teams)"""
-    claims = get_jwt()
-    role_claim = claims.get('role')
-    user_id = claims.get('userId') or claims.get('sub')  # Backwards compatibility
+    access = get_access_context()
     
-    if not user_id:
+    if not access.user_id:
         return jsonify({"msg": "Invalid token, please log in again"}), 401
     
-    if role_claim not in ['admin', 'manager']:
+    if access.role not in ['admin', 'manager']:
         return jsonify({"msg": "Unauthorized"}), 403
     
-    if role_claim == 'admin':
-        teams = Team.query.all()
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    if access.is_admin:
+        query = Team.query
     else:  # manager
-        user = User.query.get(user_id)
-        if not user:
+        if not access.exists:
             return jsonify({"msg": "User not found"}), 404
-        teams = user.teams
-        
-    return jsonify([t.to_dict() for t in teams]), 200
+        query = Team.query.filter(Team.team_id.in_(access.team_ids))
+    
+    # Teams have no creation timestamp, so they are paged by name
+    teams, next_cursor = paginate_query(query, (Team.name, Team.team_id), page)
+    items = [project_fields(t.to_dict(), page.fields) for t in teams]
+    return jsonify(page_response(items, next_cursor, page)), 200
 
 """Get team details with members (All authenticated users can view)"""
 @teams_bp.route('/teams/<team_id>', methods=['GET'])
 @jwt_required()
 def get_team_details(team_id):
-    claims = get_jwt()
-    role_claim = claims.get('role')
-    user_id = claims.get('userId') or claims.get('sub')  # Backwards compatibility
+    access = get_access_context()
     
-    if not user_id:
+    if not access.user_id:
         return jsonify({"msg": "Invalid token, please log in again"}), 401
         
     team = Team.query.get(team_id)
@@ -48,14 +53,17 @@ def get_team_details(team_id):
         return jsonify({"msg": "Team not found"}), 404
     
     # Managers and regular users can only view teams they are assigned to
-    if role_claim != 'admin':
-        user = User.query.get(user_id)
-        if not user or team not in user.teams:
-            return jsonify({"msg": "You can only view teams you are assigned to"}), 403
+    if not access.is_admin and not access.in_team(team_id):
+        return jsonify({"msg": "You can only view teams you are assigned to"}), 403
+    
+    etag = make_etag('team', team_id, team.version)
+    response = not_modified(etag)
+    if response:
+        return response
         
     team_data = team.to_dict()
     team_data['users'] = [u.to_dict() for u in team.users]
-    return jsonify(team_data), 200
+    return jsonify(team_data), 200, etag_headers(etag)
 
 """Create a new team (Admin/Manager only)"""
 @teams_bp.route('/teams', methods=['POST'])
@@ -91,23 +99,26 @@ def delete_team(team_id):
     team = Team.query.get(team_id)
     if not team:
         return jsonify({"msg": "Team not found"}), 404
-        
+    
+    member_ids = [u.user_id for u in team.users]
+    # Projects list their teams, and members' other teams show this team in member entries
+    bump_team_projects(team_id)
+    bump_team_versions(*{t.team_id for u in team.users for t in u.teams if t.team_id != team_id})
     db.session.delete(team)
     db.session.commit()
+    invalidate_users(*member_ids)
     return jsonify({"msg": "Team deleted"}), 200
 
 """Add a user to a team (Admin/Manager only - Manager only for their teams)"""
 @teams_bp.route('/teams/<team_id>/users', methods=['POST'])
 @jwt_required()
 def add_user_to_team(team_id):
-    claims = get_jwt()
-    role_claim = claims.get('role')
-    user_id = claims.get('userId') or claims.get('sub')  # Backwards compatibility
+    access = get_access_context()
     
-    if not user_id:
+    if not access.user_id:
         return jsonify({"msg": "Invalid token, please log in again"}), 401
     
-    if role_claim not in ['admin', 'manager']:
+    if access.role not in ['admin', 'manager']:
         return jsonify({"msg": "Unauthorized"}), 403
     
     team = Team.query.get(team_id)
@@ -115,10 +126,8 @@ def add_user_to_team(team_id):
         return jsonify({"msg": "Team not found"}), 404
     
     # Managers can only add users to teams they are assigned to
-    if role_claim == 'manager':
-        manager = User.query.get(user_id)
-        if not manager or team not in manager.teams:
-            return jsonify({"msg": "You can only add users to teams you are assigned to"}), 403
+    if access.role == 'manager' and not access.in_team(team_id):
+        return jsonify({"msg": "You can only add users to teams you are assigned to"}), 403
         
     data = request.get_json()
     user_email = data.get('email')
@@ -129,7 +138,12 @@ def add_user_to_team(team_id):
         
     if user not in team.users:
         team.users.append(user)
+        # Member entries list their teams, so every team of the user changes
+        bump_team_versions(team_id, *[t.team_id for t in user.teams])
         db.session.commit()
+        invalidate_users(user.user_id)
+        if user.user_id == access.user_id:
+            reset_access_context()
         
     return jsonify({"msg": "User added to team"}), 200
 
@@ -137,14 +151,12 @@ def add_user_to_team(team_id):
 @teams_bp.route('/teams/<team_id>/users', methods=['DELETE'])
 @jwt_required()
 def remove_user_from_team(team_id):
-    claims = get_jwt()
-    role_claim = claims.get('role')
-    user_id = claims.get('userId') or claims.get('sub')  # Backwards compatibility
+    access = get_access_context()
     
-    if not user_id:
+    if not access.user_id:
         return jsonify({"msg": "Invalid token, please log in again"}), 401
     
-    if role_claim not in ['admin', 'manager']:
+    if access.role not in ['admin', 'manager']:
         return jsonify({"msg": "Unauthorized"}), 403
     
     team = Team.query.get(team_id)
@@ -152,10 +164,8 @@ def remove_user_from_team(team_id):
         return jsonify({"msg": "Team not found"}), 404
     
     # Managers can only remove users from teams they are assigned to
-    if role_claim == 'manager':
-        manager = User.query.get(user_id)
-        if not manager or team not in manager.teams:
-            return jsonify({"msg": "You can only remove users from teams you are assigned to"}), 403
+    if access.role == 'manager' and not access.in_team(team_id):
+        return jsonify({"msg": "You can only remove users from teams you are assigned to"}), 403
         
     data = request.get_json()
     user_email = data.get('email')
@@ -166,6 +176,11 @@ def remove_user_from_team(team_id):
         
     if user in team.users:
         team.users.remove(user)
+        # Member entries list their teams, so every team of the user changes
+        bump_team_versions(team_id, *[t.team_id for t in user.teams])
         db.session.commit()
+        invalidate_users(user.user_id)
+        if user.user_id == access.user_id:
+            reset_access_context()
         
     return jsonify({"msg": "User removed from team"}), 200
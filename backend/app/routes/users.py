@@ -2,24 +2,57 @@
 User Routes.
 Handles user management, listing, and updates.
 """
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from ..models import db, User, Role
+from ..utils import get_current_user_id
+from ..models import (
+    db, User, Role, TaskActivity, invalidate_users,
+    activity_feed_query, serialize_activity_rows, ACTIVITY_FEED_ORDER
+)
+from ..versioning import bump_team_versions, bump_user_projects
+from ..pagination import get_page_args, paginate_query, project_fields, page_response
 
 users_bp = Blueprint('users', __name__)
+logger = logging.getLogger(__name__)
 
 @users_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    """Get all users (Admin/Manager)"""
+    """Get all users (Admin/Manager, supports ?limit=&cursor=&fields=)"""
     claims = get_jwt()
     role_claim = claims.get('role')
     
     if role_claim not in ['admin', 'manager']:
         return jsonify({"msg": "Admins and Managers only!"}), 403
+    
+    page, error = get_page_args()
+    if error:
+        return error
         
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    users, next_cursor = paginate_query(User.query, (User.created_at, User.user_id), page)
+    items = [project_fields(user.to_dict(), page.fields) for user in users]
+    return jsonify(page_response(items, next_cursor, page)), 200
+
+"""Activity feed of one user, newest first (own feed, or any feed for Admin/Manager)"""
+@users_bp.route('/users/<user_id>/activities', methods=['GET'])
+@jwt_required()
+def get_user_activities(user_id):
+    claims = get_jwt()
+    role_claim = claims.get('role')
+    
+    if user_id != get_current_user_id() and role_claim not in ['admin', 'manager']:
+        return jsonify({"msg": "You can only view your own activity"}), 403
+    
+    page, error = get_page_args()
+    if error:
+        return error
+    
+    # Served by the (user_id, timestamp) index
+    query = activity_feed_query(with_task_name=True).filter(TaskActivity.user_id == user_id)
+    rows, next_cursor = paginate_query(query, ACTIVITY_FEED_ORDER, page, descending=True)
+    items = [project_fields(item, page.fields) for item in serialize_activity_rows(rows)]
+    return jsonify(page_response(items, next_cursor, page)), 200
 
 """Update user details (Admin only)"""
 @users_bp.route('/users/<user_id>', methods=['PUT'])
@@ -36,14 +69,21 @@ def update_user(user_id):
         return jsonify({"msg": "User not found"}), 404
         
     data = request.get_json()
+    old_name = (user.first_name, user.last_name)
     if 'isActive' in data:
         user.is_active = data['isActive']
     if 'firstName' in data:
         user.first_name = data['firstName']
     if 'lastName' in data:
         user.last_name = data['lastName']
-        
+    
+    # Team detail responses embed members
+    bump_team_versions(*[team.team_id for team in user.teams])
+    # Project details embed names in tasks (creator, assignees, ...)
+    if (user.first_name, user.last_name) != old_name:
+        bump_user_projects(user.user_id)
     db.session.commit()
+    invalidate_users(user.user_id)
     return jsonify(user.to_dict()), 200
 
 """Create a new user (Admin only)"""
@@ -53,7 +93,7 @@ def create_user():
     current_user_id = get_jwt_identity()
     claims = get_jwt()
     role_claim = claims.get('role')
-    print(f"Create user attempt by: {current_user_id} with role {role_claim}")
+    logger.debug("Create user attempt by: %s with role %s", current_user_id, role_claim)
     
     if role_claim != 'admin':
         return jsonify({"msg": "Admins only!"}), 403
@@ -76,6 +116,7 @@ def create_user():
     new_user.set_password(password)
     db.session.add(new_user)
     db.session.commit()
+    invalidate_users(new_user.user_id)
     
     return jsonify({"msg": "User created successfully"}), 201
 
@@ -0,0 +1,124 @@
+"""
+Seed Data.
+Roles, the default admin and the TEST sample data (UserTEST, ManagerTEST,
+TeamTEST, ProjectTEST with two tasks). Run with `flask --app run seed`;
+every step is skipped when its rows already exist.
+"""
+import logging
+from .models import db, User, Role, Project, Task, Team
+from .stats import rebuild_project_stats
+from .constants import ALL_ROLES, ROLE_ADMIN, ROLE_MANAGER, ROLE_USER
+
+logger = logging.getLogger(__name__)
+
+def seed_roles():
+    existing = {name for (name,) in db.session.query(Role.name)}
+    for name in ALL_ROLES:
+        if name not in existing:
+            db.session.add(Role(name=name))
+    db.session.commit()
+
+def seed_admin():
+    if User.query.filter_by(email='admin@example.com').first():
+        return
+    admin = User(
+        email='admin@example.com',
+        first_name='Super',
+        last_name='Admin',
+        role=Role.query.filter_by(name=ROLE_ADMIN).first()
+    )
+    admin.set_password('admin')
+    db.session.add(admin)
+    db.session.commit()
+    logger.info("Admin user created (admin@example.com / admin).")
+
+def seed_samples():
+    """UserTEST, ManagerTEST, TeamTEST and ProjectTEST with two tasks"""
+    manager_role = Role.query.filter_by(name=ROLE_MANAGER).first()
+    user_role = Role.query.filter_by(name=ROLE_USER).first()
+    admin_user = User.query.filter_by(email='admin@example.com').first()
+
+    # 1. Create Users
+    manager_test = User.query.filter_by(email='manager@manager.com').first()
+    if not manager_test:
+        manager_test = User(
+            email='manager@manager.com',
+            first_name='managerTEST',
+            last_name='User',
+            role=manager_role
+        )
+        manager_test.set_password('takovo123')
+        db.session.add(manager_test)
+        logger.info("managerTEST created.")
+
+    user_test = User.query.filter_by(email='user@user.com').first()
+    if not user_test:
+        user_test = User(
+            email='user@user.com',
+            first_name='userTEST',
+            last_name='User',
+            role=user_role
+        )
+        user_test.set_password('takovo123')
+        db.session.add(user_test)
+        logger.info("userTEST created.")
+
+    db.session.commit()
+
+    # 2. Create Team
+    team_test = Team.query.filter_by(name='TeamTEST').first()
+    if not team_test:
+        team_test = Team(name='TeamTEST')
+        team_test.users.append(manager_test)
+        team_test.users.append(user_test)
+        db.session.add(team_test)
+        db.session.commit()
+        logger.info("TeamTEST created and users assigned.")
+
+    # 3. Create Project
+    project_test = Project.query.filter_by(name='ProjectTEST').first()
+    if not project_test:
+        project_test = Project(
+            name='ProjectTEST',
+            description='Initial test project',
+            created_by=admin_user.user_id # Admin created it
+        )
+        project_test.teams.append(team_test)
+        db.session.add(project_test)
+        db.session.commit()
+        logger.info("ProjectTEST created.")
+
+        # 4. Create Tasks
+        task1 = Task(
+            name='TaskTEST1',
+            description='First test task description',
+            project_id=project_test.project_id,
+            priority='high',
+            created_by=manager_test.user_id,
+            status='to_do'
+        )
+        task1.assignees.append(user_test)
+
+        task2 = Task(
+            name='TaskTEST2',
+            description='Second test task description',
+            project_id=project_test.project_id,
+            priority='medium',
+            created_by=manager_test.user_id,
+            status='in_progress'
+        )
+        task2.assignees.append(manager_test)
+
+        db.session.add(task1)
+        db.session.add(task2)
+        db.session.flush()
+        rebuild_project_stats(project_test.project_id)
+        db.session.commit()
+        logger.info("TaskTEST1 and TaskTEST2 created.")
+
+def seed_database(samples=True):
+    """Seed roles and the admin, plus the TEST sample data unless `samples` is False"""
+    seed_roles()
+    seed_admin()
+    if samples:
+        seed_samples()
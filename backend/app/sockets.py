@@ -1,45 +1,60 @@
+from flask import request
 from flask_socketio import emit, join_room, leave_room
-from .extensions import socketio, arango_db
-from .models import User
+from .metrics import socket_event
+from .draw_batching import draw_batcher, parse_segment
+from .whiteboard import sync_payload, history_payload
+from .whiteboard_writer import whiteboard_writer
+from .models import user_display_name
+from .task_events import task_room
 import json
+import logging
 import uuid
 import time
 
-@socketio.on('join_project')
+logger = logging.getLogger(__name__)
+
+@socket_event('join_project')
 def on_join(data):
     project_id = data.get('projectId')
-    print(f"User joining project room (ArangoDB): {project_id}")
+    since_version = data.get('sinceVersion')
+    logger.debug("User joining project room: %s", project_id)
     room = project_id
     join_room(room)
     
-    # Get elements for this project from ArangoDB
-    # AQL Query
-    cursor = arango_db.aql.execute(
-        'FOR doc IN whiteboard_elements FILTER doc.projectId == @pid RETURN doc',
-        bind_vars={'pid': project_id}
-    )
-    
-    elements = []
-    
-    for doc in cursor:
-        elements.append({
-            'elementId': doc['elementId'],
-            'projectId': doc['projectId'],
-            'type': doc['type'],
-            'content': doc['content'], 
-            'createdBy': doc['createdBy'],
-            'createdByName': doc['createdByName'],
-            'createdAt': doc['createdAt']
-        })
+    # Reconnecting clients send their last seen board version and only get the
+    # changes after it; everyone else gets the full snapshot
+    if not isinstance(since_version, int):
+        since_version = None
+    # Changes still in the write-behind queue are served from memory; they are
+    # read before the store so one persisted in between is not missed
+    pending = whiteboard_writer.pending_changes(project_id)
+    event, payload = sync_payload(project_id, since_version, pending)
+    emit(event, payload)
 
-    emit('init_whiteboard', elements)
+@socket_event('subscribe_tasks')
+def on_subscribe_tasks(data):
+    # Task views listen for task_created/updated/status_changed/deleted
+    # without joining the whiteboard room
+    project_id = data.get('projectId')
+    if project_id:
+        join_room(task_room(project_id))
 
-@socketio.on('draw')
+@socket_event('unsubscribe_tasks')
+def on_unsubscribe_tasks(data):
+    project_id = data.get('projectId')
+    if project_id:
+        leave_room(task_room(project_id))
+
+@socket_event('draw')
 def on_draw(data):
+    # Live segments are buffered per room and fanned out as 'drawing_batch' frames
     project_id = data.get('projectId')
-    emit('drawing', data, room=project_id, include_self=False)
+    segment = parse_segment(data)
+    if not project_id or segment is None:
+        return
+    draw_batcher.add(project_id, request.sid, segment)
 
-@socketio.on('save_element')
+@socket_event('save_element')
 def on_save_element(data):
     project_id = data.get('projectId')
     user_id = data.get('userId')
@@ -47,8 +62,7 @@ def on_save_element(data):
     content_data = data.get('content') 
     
     element_id = str(uuid.uuid4())
-    user = User.query.get(user_id)
-    user_name = f"{user.first_name} {user.last_name}" if user else "Unknown"
+    user_name = user_display_name(user_id)
     
     doc = {
         "elementId": element_id,
@@ -61,114 +75,37 @@ def on_save_element(data):
         "_key": element_id # Use elementId as Arango key
     }
     
-    arango_db.collection('whiteboard_elements').insert(doc)
-    
-    action_doc = {
-        "actionId": str(uuid.uuid4()),
-        "projectId": project_id, 
-        "userId": user_id,
-        "userName": user_name,
-        "actionType": "add",
-        "elementId": element_id,
-        "elementType": element_type,
-        "data": content_data,
-        "timestamp": int(time.time())
-    }
-    arango_db.collection('whiteboard_actions').insert(action_doc)
-    
+    # Broadcast first; the element and its action-log entry are written in bulk later
     emit('element_saved', doc, room=project_id)
+    whiteboard_writer.add(doc, user_name)
 
-@socketio.on('update_element')
+@socket_event('update_element')
 def on_update_element(data):
     element_id = data.get('elementId')
     project_id = data.get('projectId')
     user_id = data.get('userId')
     new_content = data.get('content')
     
-    # Check existence
-    collection = arango_db.collection('whiteboard_elements')
-    if collection.has(element_id):
-        existing = collection.get(element_id)
-        old_content = existing.get('content')
-        
-        # Update
-        existing['content'] = new_content
-        collection.update(existing)
-        
-        emit('element_updated', existing, room=project_id, include_self=False)
-        
-        user = User.query.get(user_id)
-        user_name = f"{user.first_name} {user.last_name}" if user else "Unknown"
-        
-        action_doc = {
-            "actionId": str(uuid.uuid4()),
-            "projectId": project_id,
-            "userId": user_id,
-            "userName": user_name,
-            "actionType": "modify",
-            "elementId": element_id,
-            "elementType": existing.get('type'),
-            "data": {"before": old_content, "after": new_content},
-            "timestamp": int(time.time())
-        }
-        arango_db.collection('whiteboard_actions').insert(action_doc)
+    emit('element_updated', {
+        'elementId': element_id,
+        'projectId': project_id,
+        'content': new_content
+    }, room=project_id, include_self=False)
+    
+    # Elements that no longer exist are skipped by the writer
+    whiteboard_writer.update(project_id, element_id, new_content, user_id, user_display_name(user_id))
 
-@socketio.on('delete_element')
+@socket_event('delete_element')
 def on_delete_element(data):
     element_id = data.get('elementId')
     project_id = data.get('projectId')
     user_id = data.get('userId')
     
-    collection = arango_db.collection('whiteboard_elements')
-    if collection.has(element_id):
-        existing = collection.get(element_id)
-        content_snapshot = existing.get('content')
-        
-        collection.delete(existing)
-        
-        user = User.query.get(user_id)
-        user_name = f"{user.first_name} {user.last_name}" if user else "Unknown"
-        
-        action_doc = {
-            "actionId": str(uuid.uuid4()),
-            "projectId": project_id,
-            "userId": user_id,
-            "userName": user_name,
-            "actionType": "delete",
-            "elementId": element_id,
-            "elementType": existing.get('type'),
-            "data": content_snapshot,
-            "timestamp": int(time.time())
-        }
-        arango_db.collection('whiteboard_actions').insert(action_doc)
-        
-        emit('element_deleted', {'elementId': element_id}, room=project_id)
+    emit('element_deleted', {'elementId': element_id}, room=project_id)
+    whiteboard_writer.delete(project_id, element_id, user_id, user_display_name(user_id))
 
-@socketio.on('get_history')
+@socket_event('get_history')
 def on_get_history(data):
     project_id = data.get('projectId')
-    
-    # AQL for History
-    cursor = arango_db.aql.execute(
-        '''
-        FOR doc IN whiteboard_actions 
-        FILTER doc.projectId == @pid 
-        SORT doc.timestamp DESC 
-        LIMIT 50 
-        RETURN doc
-        ''',
-        bind_vars={'pid': project_id}
-    )
-    
-    history = []
-    for doc in cursor:
-        history.append({
-            "actionId": doc.get('actionId'),
-            "userName": doc.get('userName', 'Unknown'),
-            "actionType": doc.get('actionType'),
-            "elementId": doc.get('elementId'),
-            "elementType": doc.get('elementType'),
-            "data": doc.get('data'),
-            "timestamp": doc.get('timestamp')
-        })
-    emit('history_data', history)
\ No newline at end of file
+    pending = whiteboard_writer.pending_history(project_id)
+    emit('history_data', history_payload(project_id, pending))
@@ -0,0 +1,170 @@
+"""
+Project Statistics.
+Incremental maintenance of the ProjectStats aggregates.
+
+Each task contributes a set of counter values (its status and priority
+count, work time, cycle time). Mutations apply the difference between a
+task's contribution before and after the change with an atomic
+`UPDATE ... SET col = col + delta`, inside the caller's transaction.
+Projects get a zeroed row when they are created, so that UPDATE is the
+normal path; projects from before the table existed are rebuilt on first
+use with an upsert.
+"""
+from datetime import datetime
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects import mysql, sqlite
+from .models import db, Task, ProjectStats
+from .constants import (
+    STATUS_TODO, STATUS_IN_PROGRESS, STATUS_FOR_REVIEW, STATUS_DONE,
+    PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_HIGH
+)
+
+STATUS_COLUMNS = {
+    STATUS_TODO: 'to_do_count',
+    STATUS_IN_PROGRESS: 'in_progress_count',
+    STATUS_FOR_REVIEW: 'for_review_count',
+    STATUS_DONE: 'done_count'
+}
+
+PRIORITY_COLUMNS = {
+    PRIORITY_LOW: 'low_priority_count',
+    PRIORITY_MEDIUM: 'medium_priority_count',
+    PRIORITY_HIGH: 'high_priority_count'
+}
+
+COUNTER_COLUMNS = list(STATUS_COLUMNS.values()) + list(PRIORITY_COLUMNS.values()) + [
+    'total_work_time', 'cycle_time_total', 'cycle_time_count'
+]
+
+def task_contribution(task):
+    """Counter values a task adds to its project's stats ({} for no task)"""
+    if task is None:
+        return {}
+    contribution = {'total_work_time': task.accumulated_work_time or 0}
+    if task.status in STATUS_COLUMNS:
+        contribution[STATUS_COLUMNS[task.status]] = 1
+    if task.priority in PRIORITY_COLUMNS:
+        contribution[PRIORITY_COLUMNS[task.priority]] = 1
+    if task.status == STATUS_DONE and task.completed_at and task.created_at:
+        contribution['cycle_time_total'] = task.completed_at - task.created_at
+        contribution['cycle_time_count'] = 1
+    return contribution
+
+def sum_contributions(contributions):
+    """Add up several task contributions (for batch operations)"""
+    total = {}
+    for contribution in contributions:
+        for column, value in contribution.items():
+            total[column] = total.get(column, 0) + value
+    return total
+
+def create_project_stats(project_id):
+    """Zeroed stats row of a new project (caller commits it with the project)"""
+    db.session.add(ProjectStats(project_id=project_id, **dict.fromkeys(COUNTER_COLUMNS, 0)))
+
+def apply_task_delta(project_id, before, after):
+    """
+    Apply the change between two task contributions to the project's stats.
+    Projects without a stats row yet (created before stats existed) are
+    rebuilt from their tasks instead (after a flush, so the pending change
+    is included).
+    """
+    delta = {}
+    for column in set(before) | set(after):
+        diff = after.get(column, 0) - before.get(column, 0)
+        if diff:
+            delta[column] = diff
+    if not delta:
+        return
+
+    result = db.session.execute(
+        update(ProjectStats)
+        .where(ProjectStats.project_id == project_id)
+        .values({column: getattr(ProjectStats, column) + diff for column, diff in delta.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Only projects from before stats rows; the rebuild upserts
+        db.session.flush()
+        rebuild_project_stats(project_id)
+
+def _aggregate_query():
+    done_with_times = (Task.status == STATUS_DONE) & Task.completed_at.isnot(None) & Task.created_at.isnot(None)
+    return db.session.query(
+        Task.project_id,
+        Task.status,
+        Task.priority,
+        func.count(Task.task_id),
+        func.coalesce(func.sum(Task.accumulated_work_time), 0),
+        func.coalesce(func.sum(case((done_with_times, Task.completed_at - Task.created_at), else_=0)), 0),
+        func.coalesce(func.sum(case((done_with_times, 1), else_=0)), 0)
+    ).group_by(Task.project_id, Task.status, Task.priority)
+
+def rebuild_project_stats(project_id=None):
+    """
+    Recompute stats from the task table for one project (or all projects).
+    Returns the number of stats rows written. Caller commits.
+    """
+    query = _aggregate_query()
+    if project_id is not None:
+        query = query.filter(Task.project_id == project_id)
+
+    totals = {}
+    for pid, status, priority, count, work_time, cycle_total, cycle_count in query:
+        row = totals.setdefault(pid, dict.fromkeys(COUNTER_COLUMNS, 0))
+        if status in STATUS_COLUMNS:
+            row[STATUS_COLUMNS[status]] += count
+        if priority in PRIORITY_COLUMNS:
+            row[PRIORITY_COLUMNS[priority]] += count
+        row['total_work_time'] += int(work_time)
+        row['cycle_time_total'] += int(cycle_total)
+        row['cycle_time_count'] += int(cycle_count)
+
+    if project_id is not None:
+        _upsert_stats(project_id, totals.get(project_id, dict.fromkeys(COUNTER_COLUMNS, 0)))
+        return 1
+
+    ProjectStats.query.delete()
+    db.session.add_all(ProjectStats(project_id=pid, **values) for pid, values in totals.items())
+    return len(totals)
+
+def _upsert_stats(project_id, values):
+    """
+    Write one project's row whether or not it exists, in one statement, so
+    two requests rebuilding the same project do not collide on the key
+    """
+    if db.session.get_bind().dialect.name == 'mysql':
+        statement = mysql.insert(ProjectStats).values(project_id=project_id, **values) \
+            .on_duplicate_key_update(**values)
+    else:
+        statement = sqlite.insert(ProjectStats).values(project_id=project_id, **values) \
+            .on_conflict_do_update(index_elements=[ProjectStats.project_id], set_=values)
+    db.session.execute(statement)
+
+def get_project_stats(project_id):
+    """Stats payload for GET /projects/<id>/stats"""
+    stats = ProjectStats.query.get(project_id)
+    if stats is None:
+        rebuild_project_stats(project_id)
+        db.session.commit()
+        stats = ProjectStats.query.get(project_id)
+
+    # Overdue depends on the current time, so it is counted on demand
+    # (served by the (project_id, deadline) index)
+    now = int(datetime.utcnow().timestamp())
+    overdue = Task.query.filter(
+        Task.project_id == project_id,
+        Task.deadline.isnot(None),
+        Task.deadline < now,
+        Task.status != STATUS_DONE
+    ).count()
+
+    return {
+        'projectId': project_id,
+        'taskCount': sum(getattr(stats, column) for column in STATUS_COLUMNS.values()),
+        'byStatus': {status: getattr(stats, column) for status, column in STATUS_COLUMNS.items()},
+        'byPriority': {priority: getattr(stats, column) for priority, column in PRIORITY_COLUMNS.items()},
+        'totalWorkTime': stats.total_work_time,
+        'overdueCount': overdue,
+        'meanCycleTime': stats.cycle_time_total / stats.cycle_time_count if stats.cycle_time_count else None
+    }
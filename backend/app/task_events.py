@@ -0,0 +1,84 @@
+"""
+Task Events.
+Pushes task changes to Socket.IO subscribers of a project's task room.
+
+Routes queue events while they work; the queue lives on the database
+session and is only handed over to the request once the transaction
+commits (a rollback drops it). After the response is built, everything the
+request committed is emitted, coalesced into one event per project and
+event type, so a batch edit of 200 tasks produces a single
+'task_status_changed' carrying 200 entries.
+
+Event payload: {projectId, version, tasks: [...]} where entries are
+ - task_created: the full serialized task
+ - task_updated / task_status_changed: {taskId, version, changes: {...}}
+   holding only the fields that changed (status changes also carry oldStatus)
+ - task_deleted: {taskId, version}
+Events with more than MAX_EVENT_TASKS entries are sent with an empty task
+list and `truncated: true`; clients resync with GET /projects/<id>?since=.
+"""
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .extensions import socketio
+from .models import db
+
+TASK_CREATED = 'task_created'
+TASK_UPDATED = 'task_updated'
+TASK_STATUS_CHANGED = 'task_status_changed'
+TASK_DELETED = 'task_deleted'
+
+MAX_EVENT_TASKS = 500
+
+def task_room(project_id):
+    return f"tasks:{project_id}"
+
+def task_changes(before, after):
+    """Fields of a serialized task that differ between two to_dict() snapshots"""
+    return {key: value for key, value in after.items() if before.get(key) != value}
+
+def _add(events, project_id, name, entries, version, truncated=False):
+    pending = events.setdefault((project_id, name), {'version': 0, 'tasks': [], 'truncated': False})
+    pending['version'] = max(pending['version'], version or 0)
+    if pending['truncated'] or truncated or len(pending['tasks']) + len(entries) > MAX_EVENT_TASKS:
+        pending['truncated'] = True
+        pending['tasks'] = []
+    else:
+        pending['tasks'].extend(entries)
+
+def queue_task_event(name, project_id, entry, version=None):
+    """Queue one task entry; it is emitted only if the current transaction commits"""
+    events = db.session().info.setdefault('task_events', {})
+    _add(events, project_id, name, [entry], version if version is not None else entry.get('version'))
+
+def queue_bulk_task_event(name, project_id, version):
+    """Queue a change too large to describe entry by entry (clients resync)"""
+    events = db.session().info.setdefault('task_events', {})
+    _add(events, project_id, name, [], version, truncated=True)
+
+@event.listens_for(Session, 'after_commit')
+def _hand_over_task_events(session):
+    events = session.info.pop('task_events', None)
+    if not events or not has_request_context():
+        return
+    committed = g.setdefault('task_events', {})
+    for (project_id, name), pending in events.items():
+        _add(committed, project_id, name, pending['tasks'], pending['version'], pending['truncated'])
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_task_events(session):
+    session.info.pop('task_events', None)
+
+def emit_task_events(response):
+    """after_request hook: emit what the request committed"""
+    events = g.pop('task_events', None)
+    if events:
+        for (project_id, name), pending in events.items():
+            payload = {'projectId': project_id, 'version': pending['version'], 'tasks': pending['tasks']}
+            if pending['truncated']:
+                payload['truncated'] = True
+            socketio.emit(name, payload, room=task_room(project_id))
+    return response
+
+def init_task_events(app):
+    app.after_request(emit_task_events)
@@ -0,0 +1,284 @@
+"""
+Task Import.
+Bulk-loads tasks into a project from a streamed CSV or NDJSON upload.
+The body is parsed line by line and written in chunks: each chunk resolves
+its assignee emails with one query, inserts tasks, assignments and 'created'
+activities with one executemany per table, and commits. Invalid rows are
+reported and skipped; they never abort the rest of the import. A chunk the
+database rejects is retried row by row, so only the offending rows fail.
+"""
+import csv
+import json
+import logging
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import insert, select
+from .models import db, Task, TaskActivity, User, task_assignees, task_activity_values
+from .constants import ALL_PRIORITIES, ALL_STATUSES, PRIORITY_MEDIUM, STATUS_TODO
+from .stats import task_contribution, apply_task_delta, sum_contributions
+from .versioning import bump_project_version
+from .task_events import TASK_CREATED, queue_bulk_task_event
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Rows written per executemany batch / transaction
+IMPORT_CHUNK_SIZE = 500
+# Per-row errors returned in the response (the total is always reported)
+MAX_REPORTED_ERRORS = 1000
+
+# Longest accepted text per record field: the column lengths, and for the
+# description what a TEXT column holds (65535 bytes, up to 4 per character)
+TEXT_LIMITS = {
+    'name': Task.name.type.length,
+    'description': 65535 // 4,
+    'jiraKey': Task.jira_key.type.length,
+    'jiraUrl': Task.jira_url.type.length
+}
+# Deadlines are stored in a signed 32-bit INT column
+MAX_DEADLINE = 2 ** 31 - 1
+
+def _lines(stream):
+    """Decode a binary request stream line by line without reading it whole"""
+    first = True
+    for raw in iter(stream.readline, b''):
+        line = raw.decode('utf-8')
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+def _ndjson_records(stream):
+    for number, line in enumerate(_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Each line must be a JSON object"
+            continue
+        yield number, record, None
+
+def _csv_records(stream):
+    reader = csv.DictReader(_lines(stream))
+    for record in reader:
+        yield reader.line_num, record, None
+
+def _parse_assignees(value):
+    """Assignee emails as a JSON list or a ';'-separated string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    if not isinstance(value, list):
+        return None
+    emails = [email.strip().lower() for email in value if isinstance(email, str) and email.strip()]
+    return list(dict.fromkeys(emails))
+
+def _text(record, key):
+    """Returns (stripped value or None, None) or (None, error message) for a text field"""
+    value = record.get(key)
+    if value is None:
+        return None, None
+    if not isinstance(value, str):
+        return None, f"{key} must be a string"
+    value = value.strip()
+    if len(value) > TEXT_LIMITS[key]:
+        return None, f"{key} must be at most {TEXT_LIMITS[key]} characters"
+    return value or None, None
+
+def _validate(record):
+    """Returns (fields, None) for a valid task record or (None, error message)"""
+    texts = {}
+    for key in TEXT_LIMITS:
+        texts[key], message = _text(record, key)
+        if message:
+            return None, message
+    name = texts['name']
+    if not name:
+        return None, "Task name is required"
+
+    priority = record.get('priority') or PRIORITY_MEDIUM
+    if priority not in ALL_PRIORITIES:
+        return None, f"Priority must be one of: {', '.join(ALL_PRIORITIES)}"
+
+    status = record.get('status') or STATUS_TODO
+    if status not in ALL_STATUSES:
+        return None, f"Status must be one of: {', '.join(ALL_STATUSES)}"
+
+    deadline = record.get('deadline')
+    if deadline in (None, ''):
+        deadline = None
+    else:
+        try:
+            if isinstance(deadline, bool) or not isinstance(deadline, (int, str)):
+                raise TypeError(deadline)
+            deadline = int(deadline)
+        except (TypeError, ValueError):
+            return None, "Deadline must be a unix timestamp"
+        if not 0 <= deadline <= MAX_DEADLINE:
+            return None, "Deadline must be a unix timestamp"
+
+    assignees = _parse_assignees(record.get('assigneeEmails'))
+    if assignees is None:
+        return None, "assigneeEmails must be a list or a ';'-separated string"
+
+    return {
+        'name': name,
+        'description': texts['description'] or '',
+        'priority': priority,
+        'status': status,
+        'deadline': deadline,
+        'jira_key': texts['jiraKey'],
+        'jira_url': texts['jiraUrl'],
+        'assignees': assignees
+    }, None
+
+class TaskImporter:
+    """Accumulates validated rows and writes them to one project in chunks"""
+    def __init__(self, project_id, user_id):
+        self.project_id = project_id
+        self.user_id = user_id
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self._chunk = []
+        # email -> user_id (None when unknown), kept across chunks
+        self._emails = {}
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+    def add(self, row, record):
+        fields, message = _validate(record)
+        if message:
+            self.error(row, message)
+            return
+        self._chunk.append((row, fields))
+        if len(self._chunk) >= IMPORT_CHUNK_SIZE:
+            self.flush()
+
+    def _resolve_emails(self, emails):
+        unknown = [email for email in emails if email not in self._emails]
+        if unknown:
+            self._emails.update(dict.fromkeys(unknown))
+            found = db.session.execute(
+                select(User.email, User.user_id).where(User.email.in_(unknown))
+            )
+            for email, user_id in found:
+                self._emails[email.lower()] = user_id
+
+    def flush(self):
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+
+        self._resolve_emails({email for _, fields in chunk for email in fields['assignees']})
+
+        current_timestamp = int(datetime.utcnow().timestamp())
+        entries = []
+        for row, fields in chunk:
+            missing = [email for email in fields['assignees'] if not self._emails.get(email)]
+            if missing:
+                self.error(row, f"Unknown assignee: {', '.join(missing)}")
+                continue
+            task_id = str(uuid.uuid4())
+            task_row = {
+                'task_id': task_id,
+                'name': fields['name'],
+                'description': fields['description'],
+                'project_id': self.project_id,
+                'priority': fields['priority'],
+                'status': fields['status'],
+                'deadline': fields['deadline'],
+                'jira_key': fields['jira_key'],
+                'jira_url': fields['jira_url'],
+                'created_at': current_timestamp,
+                'created_by': self.user_id,
+                'accumulated_work_time': 0,
+                'completed_at': None
+            }
+            assignee_rows = [
+                {'task_id': task_id, 'user_id': user_id}
+                for user_id in dict.fromkeys(self._emails[email] for email in fields['assignees'])
+            ]
+            activity_row = task_activity_values(SimpleNamespace(**task_row), self.user_id, 'created',
+                                                new_status=fields['status'], timestamp=current_timestamp)
+            entries.append((row, task_row, assignee_rows, activity_row))
+
+        if not entries:
+            return
+        if self._insert(entries):
+            return
+        if len(entries) > 1:
+            # Find the rows the database rejects instead of failing the whole chunk
+            for entry in entries:
+                if not self._insert([entry]):
+                    self.error(entry[0], "Database error, row not imported")
+        else:
+            self.error(entries[0][0], "Database error, row not imported")
+
+    def _insert(self, entries):
+        """Write (row, task row, assignee rows, activity row) entries in one transaction; False when it failed"""
+        task_rows = [task_row for _, task_row, _, _ in entries]
+        assignee_rows = [assignee for _, _, assignees, _ in entries for assignee in assignees]
+        try:
+            version = bump_project_version(self.project_id)
+            for task_row in task_rows:
+                task_row['version'] = version
+            db.session.execute(insert(Task), task_rows)
+            if assignee_rows:
+                db.session.execute(insert(task_assignees), assignee_rows)
+            db.session.execute(insert(TaskActivity), [activity_row for _, _, _, activity_row in entries])
+            queue_bulk_task_event(TASK_CREATED, self.project_id, version)
+            apply_task_delta(self.project_id, {}, sum_contributions(
+                task_contribution(SimpleNamespace(**task_row)) for task_row in task_rows
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Task import of %d row(s) failed", len(entries))
+            return False
+        self.imported += len(task_rows)
+        return True
+
+    def result(self):
+        return {
+            'imported': self.imported,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'errorsTruncated': self.error_count > len(self.errors)
+        }
+
+def import_tasks(project_id, user_id, stream, import_format):
+    """
+    Import tasks from a CSV/NDJSON byte stream into a project.
+    Records carry name, description, priority, status, deadline, jiraKey,
+    jiraUrl and assigneeEmails; records of another type (the 'type' /
+    'recordType' column of an export) are skipped.
+    """
+    importer = TaskImporter(project_id, user_id)
+    records = _ndjson_records(stream) if import_format == 'ndjson' else _csv_records(stream)
+    try:
+        for row, record, message in records:
+            if message:
+                importer.error(row, message)
+                continue
+            record_type = record.get('type') or record.get('recordType')
+            if record_type and record_type != 'task':
+                continue
+            importer.add(row, record)
+    except (UnicodeDecodeError, csv.Error) as e:
+        importer.error(None, f"Unreadable upload: {e}")
+    importer.flush()
+    return importer.result()
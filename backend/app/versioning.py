@@ -0,0 +1,131 @@
+"""
+Change Versions.
+Per-project (and per-team) change counters behind ETags and delta sync.
+
+Every task, team-assignment or project mutation bumps its project's version
+inside the caller's transaction, and stamps changed tasks with the new
+value. Deleted tasks leave a tombstone with the version of their deletion.
+A client holding version N can then revalidate with If-None-Match (answered
+from the project row alone) or ask for ?since=N to get only what changed.
+Each representation (view, fields, page, since) has its own ETag, and
+responses holding values that change with time alone get none.
+
+The version is bumped with an atomic `UPDATE ... SET version = version + 1`,
+which also locks the project row until commit, so concurrent writers get
+distinct, increasing versions. The bump happens once per project per
+transaction; later changes in the same transaction reuse it.
+"""
+import hashlib
+from flask import request
+from sqlalchemy import event, select, update, or_
+from sqlalchemy.orm import Session
+from werkzeug.http import quote_etag
+from .models import db, Project, Team, Task, TaskTombstone, project_teams, task_assignees
+
+def _bumped(session):
+    return session.info.setdefault('project_versions', {})
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _forget_bumped_versions(session):
+    # A new transaction must take a new version (and the row lock with it)
+    session.info.pop('project_versions', None)
+
+def bump_project_version(project_id):
+    """Move a project to its next version (once per transaction) and return it"""
+    bumped = _bumped(db.session())
+    if project_id not in bumped:
+        # No autoflush: pending task changes are written once, with their version, at commit
+        with db.session.no_autoflush:
+            db.session.execute(
+                update(Project)
+                .where(Project.project_id == project_id)
+                .values(version=Project.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            bumped[project_id] = db.session.execute(
+                select(Project.version).where(Project.project_id == project_id)
+            ).scalar_one()
+    return bumped[project_id]
+
+def touch_task(task):
+    """Stamp a created/changed task with its project's new version"""
+    task.version = bump_project_version(task.project_id)
+    return task.version
+
+def touch_tasks(tasks):
+    """touch_task for many tasks; projects are bumped in a fixed order to avoid lock-order deadlocks"""
+    by_project = {}
+    for task in tasks:
+        by_project.setdefault(task.project_id, []).append(task)
+    for project_id in sorted(by_project):
+        version = bump_project_version(project_id)
+        for task in by_project[project_id]:
+            task.version = version
+
+def record_task_deletion(task):
+    """Leave a tombstone so ?since= clients learn about the deletion; returns its version"""
+    version = bump_project_version(task.project_id)
+    db.session.add(TaskTombstone(task_id=task.task_id, project_id=task.project_id, version=version))
+    return version
+
+def bump_team_projects(*team_ids):
+    """Bump every project assigned to the given teams (their team list changed)"""
+    project_ids = db.session.execute(
+        select(project_teams.c.project_id).where(project_teams.c.team_id.in_(team_ids)).distinct()
+    ).scalars().all()
+    for project_id in project_ids:
+        bump_project_version(project_id)
+
+def bump_user_projects(user_id):
+    """
+    A user's name changed: bump every project whose tasks show it (creator,
+    starter, reviewer, completer or assignee) and stamp those tasks with the
+    new version, so both revalidation and ?since= deltas pick up the rename
+    """
+    mentions = or_(
+        Task.created_by == user_id, Task.started_by == user_id,
+        Task.reviewed_by == user_id, Task.completed_by == user_id,
+        Task.task_id.in_(select(task_assignees.c.task_id).where(task_assignees.c.user_id == user_id))
+    )
+    project_ids = db.session.execute(select(Task.project_id).where(mentions).distinct()).scalars().all()
+    # Fixed order, like touch_tasks, to avoid lock-order deadlocks
+    for project_id in sorted(project_ids):
+        version = bump_project_version(project_id)
+        db.session.execute(
+            update(Task)
+            .where(Task.project_id == project_id, mentions)
+            .values(version=version)
+            .execution_options(synchronize_session=False)
+        )
+
+def bump_team_versions(*team_ids):
+    """Invalidate the ETags of team detail responses (members changed)"""
+    team_ids = [team_id for team_id in team_ids if team_id]
+    if team_ids:
+        db.session.execute(
+            update(Team)
+            .where(Team.team_id.in_(team_ids))
+            .values(version=Team.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+def make_etag(kind, resource_id, version, representation=''):
+    """
+    Strong ETag of one representation of a versioned resource; `representation`
+    is the normalized query selecting it (see PageArgs.representation)
+    """
+    etag = f"{kind}-{resource_id}-{version}"
+    if representation:
+        etag += '-' + hashlib.sha1(representation.encode()).hexdigest()[:16]
+    return etag
+
+def not_modified(etag):
+    """A 304 response when the request's If-None-Match already has `etag`, else None"""
+    if request.if_none_match.contains(etag):
+        return '', 304, etag_headers(etag)
+    return None
+
+def etag_headers(etag):
+    # no-cache: browsers keep the body but revalidate every time
+    return {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
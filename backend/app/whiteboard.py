@@ -0,0 +1,374 @@
+"""
+Whiteboard Storage.
+Boards, elements and the versioned action log behind the WhiteboardStore
+interface, with an ArangoDB implementation and an in-process stand-in for
+tests, benchmarks and local development (WHITEBOARD_STORE=memory).
+
+Every mutation of a board gets a per-project, monotonically increasing
+version stored on its action document. Versions are reserved in the same
+store operation (an ArangoDB stream transaction) that writes their
+actions, so a board version is never visible before its changes. The
+elements collection is the current snapshot of a board; the versioned
+actions form the delta log a reconnecting client replays from its last
+seen version. Deltas are only
+served from the board's base version onwards: the base is moved forward
+(compacted) as the log grows, and older clients get a full snapshot.
+"""
+import copy
+import threading
+from collections import Counter
+from . import extensions
+from .metrics import arango_operation
+
+ELEMENTS = 'whiteboard_elements'
+ACTIONS = 'whiteboard_actions'
+BOARDS = 'whiteboard_boards'
+
+# How many versions of delta log are kept servable before compacting
+DELTA_RETENTION = 5000
+
+HISTORY_LIMIT = 50
+
+# Reserve @n versions of a board (moving its base forward when the log outgrows the retention)
+ALLOCATE_VERSIONS = '''
+UPSERT { _key: @pid }
+INSERT { _key: @pid, projectId: @pid, version: @n, baseVersion: 0 }
+UPDATE {
+    version: OLD.version + @n,
+    baseVersion: OLD.version + @n - OLD.baseVersion > 2 * @retention
+        ? OLD.version + @n - @retention
+        : OLD.baseVersion
+}
+IN whiteboard_boards
+RETURN NEW.version
+'''
+
+# Served by idx_elements_project
+LIST_ELEMENTS = 'FOR doc IN whiteboard_elements FILTER doc.projectId == @pid RETURN doc'
+
+# Served by idx_actions_project_timestamp for both the filter and the sort,
+# so cost does not depend on other boards' data
+HISTORY = '''
+FOR doc IN whiteboard_actions
+FILTER doc.projectId == @pid
+SORT doc.projectId DESC, doc.timestamp DESC
+LIMIT @limit
+RETURN doc
+'''
+
+# Served by idx_actions_project_version
+CHANGES_SINCE = '''
+FOR doc IN whiteboard_actions
+FILTER doc.projectId == @pid AND doc.version > @version
+SORT doc.projectId, doc.version
+LIMIT @limit
+RETURN doc
+'''
+
+class WhiteboardStore:
+    """
+    Storage interface used by sockets.py, the write-behind writer and the
+    data generator. Documents are plain dicts keyed by their ids ('_key').
+    """
+    def get_board(self, project_id):
+        """Board version info: {'version': int, 'baseVersion': int}"""
+        raise NotImplementedError
+
+    def list_elements(self, project_id):
+        """Current elements of a board, serialized with element_to_dict"""
+        raise NotImplementedError
+
+    def history(self, project_id, limit=HISTORY_LIMIT):
+        """Latest actions of a board, newest first, serialized with action_to_history"""
+        raise NotImplementedError
+
+    def get_elements(self, element_ids):
+        """Existing element documents by id; missing ids are left out"""
+        raise NotImplementedError
+
+    def write_batch(self, elements=(), deleted_ids=(), actions=()):
+        """
+        Persist a batch of element upserts, element deletes and actions, and
+        version the actions, all in one atomic operation. Actions are numbered
+        per project in list order; each element gets the version of its last action.
+        Elements and actions are keyed by their ids and written with replace
+        semantics, so retrying a failed batch is safe.
+        """
+        raise NotImplementedError
+
+    def changes_since(self, project_id, version):
+        """
+        Delta log entries after `version`, oldest first, in the shape clients apply:
+        add -> full element, modify -> new content, delete -> element id.
+        """
+        raise NotImplementedError
+
+def _assign_versions(elements, actions, allocate):
+    """Number `actions` per project with versions from allocate(project_id, count) -> last reserved version"""
+    counts = Counter(action['projectId'] for action in actions)
+    next_version = {project_id: allocate(project_id, count) - count + 1 for project_id, count in counts.items()}
+    latest = {}
+    for action in actions:
+        action['version'] = next_version[action['projectId']]
+        next_version[action['projectId']] += 1
+        latest[action['elementId']] = action['version']
+    for doc in elements:
+        if doc['_key'] in latest:
+            doc['version'] = latest[doc['_key']]
+
+def _next_board(board, count):
+    version = board['version'] + count
+    base = board['baseVersion']
+    if version - base > 2 * DELTA_RETENTION:
+        base = version - DELTA_RETENTION
+    return {'version': version, 'baseVersion': base}
+
+class ArangoWhiteboardStore(WhiteboardStore):
+    """Collections in the ArangoDB database, connected on first use (extensions.get_arango_db)"""
+
+    @property
+    def database(self):
+        return extensions.get_arango_db()
+
+    @arango_operation('get_board')
+    def get_board(self, project_id):
+        doc = self.database.collection(BOARDS).get(project_id)
+        if not doc:
+            return {'version': 0, 'baseVersion': 0}
+        return {'version': doc.get('version', 0), 'baseVersion': doc.get('baseVersion', 0)}
+
+    @arango_operation('list_elements')
+    def list_elements(self, project_id):
+        cursor = self.database.aql.execute(
+            LIST_ELEMENTS,
+            bind_vars={'pid': project_id}
+        )
+        return [element_to_dict(doc) for doc in cursor]
+
+    @arango_operation('history')
+    def history(self, project_id, limit=HISTORY_LIMIT):
+        cursor = self.database.aql.execute(
+            HISTORY,
+            bind_vars={'pid': project_id, 'limit': limit}
+        )
+        return [action_to_history(doc) for doc in cursor]
+
+    @arango_operation('get_elements')
+    def get_elements(self, element_ids):
+        if not element_ids:
+            return {}
+        docs = self.database.collection(ELEMENTS).get_many(list(element_ids))
+        return {doc['_key']: doc for doc in docs}
+
+    @arango_operation('write_batch')
+    def write_batch(self, elements=(), deleted_ids=(), actions=()):
+        # One stream transaction: the board versions only move once the actions
+        # holding them are committed. Concurrent writers to the same board are
+        # serialized by the board document (a conflict fails the batch, which is retried).
+        elements, actions = list(elements), list(actions)
+        transaction = self.database.begin_transaction(write=[BOARDS, ELEMENTS, ACTIONS])
+        try:
+            _assign_versions(elements, actions, lambda project_id, count: next(transaction.aql.execute(
+                ALLOCATE_VERSIONS,
+                bind_vars={'pid': project_id, 'n': count, 'retention': DELTA_RETENTION}
+            )))
+            # One bulk request per collection
+            errors = []
+            if elements:
+                results = transaction.collection(ELEMENTS).insert_many(elements, overwrite_mode='replace')
+                errors.extend(r for r in results if isinstance(r, Exception))
+            if deleted_ids:
+                results = transaction.collection(ELEMENTS).delete_many(list(deleted_ids))
+                # 1202: document not found (already deleted)
+                errors.extend(r for r in results
+                              if isinstance(r, Exception) and getattr(r, 'error_code', None) != 1202)
+            if actions:
+                results = transaction.collection(ACTIONS).insert_many(actions, overwrite_mode='replace')
+                errors.extend(r for r in results if isinstance(r, Exception))
+            if errors:
+                raise errors[0]
+        except Exception:
+            transaction.abort_transaction()
+            raise
+        transaction.commit_transaction()
+
+    @arango_operation('changes_since')
+    def changes_since(self, project_id, version):
+        cursor = self.database.aql.execute(
+            CHANGES_SINCE,
+            bind_vars={'pid': project_id, 'version': version, 'limit': 2 * DELTA_RETENTION}
+        )
+        return [action_to_change(doc) for doc in cursor]
+
+class MemoryWhiteboardStore(WhiteboardStore):
+    """
+    In-process stand-in with the same semantics as the ArangoDB store.
+    Data lives as long as the process; documents are copied on the way in
+    and out, like a round trip to a database would.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = {}
+        self._elements = {}   # element id -> doc
+        self._actions = {}    # project id -> {action id -> doc}
+
+    def _allocate_versions(self, project_id, count):
+        board = _next_board(self._boards.get(project_id, {'version': 0, 'baseVersion': 0}), count)
+        self._boards[project_id] = board
+        return board['version']
+
+    def get_board(self, project_id):
+        with self._lock:
+            return dict(self._boards.get(project_id, {'version': 0, 'baseVersion': 0}))
+
+    def list_elements(self, project_id):
+        with self._lock:
+            docs = [doc for doc in self._elements.values() if doc['projectId'] == project_id]
+            return [element_to_dict(copy.deepcopy(doc)) for doc in docs]
+
+    def history(self, project_id, limit=HISTORY_LIMIT):
+        with self._lock:
+            docs = sorted(self._actions.get(project_id, {}).values(),
+                          key=lambda doc: doc.get('timestamp') or 0, reverse=True)[:limit]
+            return [action_to_history(copy.deepcopy(doc)) for doc in docs]
+
+    def get_elements(self, element_ids):
+        with self._lock:
+            return {element_id: copy.deepcopy(self._elements[element_id])
+                    for element_id in element_ids if element_id in self._elements}
+
+    def write_batch(self, elements=(), deleted_ids=(), actions=()):
+        elements, actions = list(elements), list(actions)
+        with self._lock:
+            _assign_versions(elements, actions, self._allocate_versions)
+            for doc in elements:
+                self._elements[doc['_key']] = copy.deepcopy(doc)
+            for element_id in deleted_ids:
+                self._elements.pop(element_id, None)
+            for doc in actions:
+                self._actions.setdefault(doc['projectId'], {})[doc['_key']] = copy.deepcopy(doc)
+
+    def changes_since(self, project_id, version):
+        with self._lock:
+            docs = sorted((doc for doc in self._actions.get(project_id, {}).values() if doc['version'] > version),
+                          key=lambda doc: doc['version'])[:2 * DELTA_RETENTION]
+            return [action_to_change(copy.deepcopy(doc)) for doc in docs]
+
+STORES = {
+    'arango': ArangoWhiteboardStore,
+    'memory': MemoryWhiteboardStore
+}
+
+_store = None
+
+def init_whiteboard_store(app):
+    """Select the store named by WHITEBOARD_STORE; nothing is contacted until first use"""
+    global _store
+    name = app.config.get('WHITEBOARD_STORE', 'arango')
+    if name not in STORES:
+        raise ValueError(f"Unknown WHITEBOARD_STORE '{name}', expected one of: {', '.join(STORES)}")
+    if name == 'arango':
+        extensions.init_arango(app)
+    _store = STORES[name]()
+    return _store
+
+def get_store():
+    """The active WhiteboardStore (see init_whiteboard_store)"""
+    if _store is None:
+        raise RuntimeError("Whiteboard store is not initialized")
+    return _store
+
+def element_to_dict(doc):
+    return {
+        'elementId': doc['elementId'],
+        'projectId': doc['projectId'],
+        'type': doc['type'],
+        'content': doc['content'],
+        'createdBy': doc['createdBy'],
+        'createdByName': doc['createdByName'],
+        'createdAt': doc['createdAt']
+    }
+
+def action_to_history(doc):
+    return {
+        "actionId": doc.get('actionId'),
+        "userName": doc.get('userName', 'Unknown'),
+        "actionType": doc.get('actionType'),
+        "elementId": doc.get('elementId'),
+        "elementType": doc.get('elementType'),
+        "data": doc.get('data'),
+        "timestamp": doc.get('timestamp')
+    }
+
+def action_to_change(doc):
+    change = {
+        'version': doc.get('version'),
+        'actionType': doc.get('actionType'),
+        'elementId': doc.get('elementId'),
+        'elementType': doc.get('elementType')
+    }
+    if change['actionType'] == 'add':
+        change['element'] = {
+            'elementId': doc.get('elementId'),
+            'projectId': doc.get('projectId'),
+            'type': doc.get('elementType'),
+            'content': doc.get('data'),
+            'createdBy': doc.get('userId'),
+            'createdByName': doc.get('userName'),
+            'createdAt': doc.get('timestamp')
+        }
+    elif change['actionType'] == 'modify':
+        data = doc.get('data') or {}
+        change['content'] = data.get('after')
+    return change
+
+def sync_payload(project_id, since_version=None, pending=()):
+    """
+    Build the join response for a client.
+    Returns ('whiteboard_delta', payload) when the client's version is still
+    inside the servable delta window, otherwise ('init_whiteboard', payload)
+    with a full snapshot. A board version only becomes visible together with
+    the actions up to it (see write_batch), and it is read before the data,
+    so a client never skips a change; replaying an already applied change is harmless.
+
+    `pending` are changes not persisted yet (whiteboard_writer.pending_changes,
+    taken before this call): they are appended to the delta or applied to the
+    snapshot, so joining never waits for the write-behind queue.
+    """
+    store = get_store()
+    board = store.get_board(project_id)
+    current = board['version']
+
+    if since_version is not None and board['baseVersion'] <= since_version <= current:
+        changes = store.changes_since(project_id, since_version) if since_version < current else []
+        return 'whiteboard_delta', {
+            'version': current,
+            'fromVersion': since_version,
+            'changes': changes + list(pending)
+        }
+
+    elements = {element['elementId']: element for element in store.list_elements(project_id)}
+    for change in pending:
+        element_id = change['elementId']
+        if change['actionType'] == 'add':
+            elements[element_id] = change['element']
+        elif change['actionType'] == 'modify':
+            if element_id in elements:
+                elements[element_id] = dict(elements[element_id], content=change['content'])
+        else:
+            elements.pop(element_id, None)
+    return 'init_whiteboard', {
+        'version': current,
+        'elements': list(elements.values())
+    }
+
+def history_payload(project_id, pending=()):
+    """
+    Latest actions of a board, newest first: `pending` entries not persisted
+    yet (whiteboard_writer.pending_history, taken before this call) followed
+    by the stored history. An action persisted in between is listed once.
+    """
+    pending = list(pending)
+    seen = {entry['actionId'] for entry in pending}
+    stored = [entry for entry in get_store().history(project_id) if entry['actionId'] not in seen]
+    return (pending + stored)[:HISTORY_LIMIT]
@@ -0,0 +1,269 @@
+"""
+Whiteboard Write-Behind Queue.
+Socket handlers broadcast immediately and enqueue the persistence work here;
+a background task writes elements and action-log entries to ArangoDB in bulk.
+Nothing on the socket path waits for the store: joins and history requests
+see the operations still queued here through pending_changes() and
+pending_history().
+"""
+import atexit
+import logging
+import time
+import uuid
+from collections import deque
+from .extensions import socketio
+from .whiteboard import get_store, element_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Writer operation -> actionType of its action-log entry
+ACTION_TYPES = {'add': 'add', 'update': 'modify', 'delete': 'delete'}
+
+class WhiteboardWriter:
+    """
+    Bounded write-behind queue for whiteboard mutations.
+
+    Operations ('add', 'update', 'delete') are applied in order per batch:
+    existing elements are fetched with one bulk read, and the resulting
+    element upserts, deletes and action documents are written (and
+    versioned) by one store operation.
+    A failed batch is put back at the head of the queue and retried, up to
+    `max_retries` times, with the loop backing off exponentially (up to
+    `max_backoff` seconds) while the store keeps failing.
+
+    The queue is capped at `max_queue` operations, including the batch being
+    written. Producers never block: once the cap is reached new operations
+    are dropped (they were already broadcast, but are not persisted),
+    counted in `overflow_ops` and logged.
+    """
+    def __init__(self, max_queue=10000, batch_size=500, interval=0.05, max_retries=5, max_backoff=5.0):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._pending = deque()
+        self._inflight = []
+        self._failures = 0
+        self._lock = None
+        self._task = None
+        # Metrics
+        self.flushes = 0
+        self.failed_batches = 0
+        self.dropped_ops = 0
+        self.overflow_ops = 0
+        self.last_flush_seconds = 0.0
+        self.flush_seconds_total = 0.0
+
+    def configure(self, app):
+        self.max_queue = app.config.get('WHITEBOARD_WRITE_QUEUE_SIZE', 10000)
+        self.batch_size = app.config.get('WHITEBOARD_WRITE_BATCH', 500)
+        self.interval = app.config.get('WHITEBOARD_WRITE_INTERVAL_MS', 50) / 1000.0
+        self.max_retries = app.config.get('WHITEBOARD_WRITE_RETRIES', 5)
+        self.max_backoff = app.config.get('WHITEBOARD_WRITE_MAX_BACKOFF_MS', 5000) / 1000.0
+
+    def depth(self):
+        return len(self._pending) + len(self._inflight)
+
+    def add(self, element, user_name):
+        self._enqueue({
+            'op': 'add',
+            'projectId': element['projectId'],
+            'elementId': element['elementId'],
+            'element': element,
+            'userId': element['createdBy'],
+            'userName': user_name
+        })
+
+    def update(self, project_id, element_id, content, user_id, user_name):
+        self._enqueue({
+            'op': 'update',
+            'projectId': project_id,
+            'elementId': element_id,
+            'content': content,
+            'userId': user_id,
+            'userName': user_name
+        })
+
+    def delete(self, project_id, element_id, user_id, user_name):
+        self._enqueue({
+            'op': 'delete',
+            'projectId': project_id,
+            'elementId': element_id,
+            'userId': user_id,
+            'userName': user_name
+        })
+
+    def _enqueue(self, op):
+        if self.depth() >= self.max_queue:
+            self.overflow_ops += 1
+            if self.overflow_ops % 1000 == 1:
+                logger.warning("Whiteboard write queue full (%d ops); dropped %d op(s) so far",
+                               self.max_queue, self.overflow_ops)
+            return
+        op['timestamp'] = int(time.time())
+        op['attempts'] = 0
+        op['actionId'] = str(uuid.uuid4())
+        self._pending.append(op)
+        if self._task is None:
+            self._task = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(min(self.interval * 2 ** self._failures, self.max_backoff))
+            if self._pending:
+                self.flush()
+
+    def _project_ops(self, project_id):
+        return [op for op in self._inflight + list(self._pending) if op['projectId'] == project_id]
+
+    def pending_changes(self, project_id):
+        """Queued changes of a board, oldest first, shaped like whiteboard.action_to_change (without versions)"""
+        changes = []
+        for op in self._project_ops(project_id):
+            change = {
+                'version': None,
+                'actionType': ACTION_TYPES[op['op']],
+                'elementId': op['elementId'],
+                'elementType': op['element'].get('type') if op['op'] == 'add' else None
+            }
+            if op['op'] == 'add':
+                change['element'] = element_to_dict(op['element'])
+            elif op['op'] == 'update':
+                change['content'] = op['content']
+            changes.append(change)
+        return changes
+
+    def pending_history(self, project_id):
+        """Queued actions of a board, newest first, shaped like whiteboard.action_to_history"""
+        entries = []
+        for op in reversed(self._project_ops(project_id)):
+            if op['op'] == 'add':
+                data = op['element'].get('content')
+            elif op['op'] == 'update':
+                data = {"before": None, "after": op['content']}
+            else:
+                data = None
+            entries.append({
+                "actionId": op['actionId'],
+                "userName": op['userName'],
+                "actionType": ACTION_TYPES[op['op']],
+                "elementId": op['elementId'],
+                "elementType": op['element'].get('type') if op['op'] == 'add' else None,
+                "data": data,
+                "timestamp": op['timestamp']
+            })
+        return entries
+
+    def _acquire(self):
+        # A one-token queue from the async server works as a lock that
+        # cooperates with green threads (a threading.Lock would block the hub)
+        if self._lock is None:
+            self._lock = socketio.server.eio.create_queue()
+            self._lock.put(True)
+        self._lock.get()
+
+    def _release(self):
+        self._lock.put(True)
+
+    def flush(self):
+        """Write everything queued so far (called by the loop and at shutdown)"""
+        self._acquire()
+        try:
+            while self._pending:
+                batch = [self._pending.popleft()
+                         for _ in range(min(self.batch_size, len(self._pending)))]
+                # Still visible to pending_changes()/pending_history() while being written
+                self._inflight = batch
+                started = time.perf_counter()
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    self.failed_batches += 1
+                    self._failures += 1
+                    for op in batch:
+                        op['attempts'] += 1
+                    retry = [op for op in batch if op['attempts'] < self.max_retries]
+                    self.dropped_ops += len(batch) - len(retry)
+                    self._pending.extendleft(reversed(retry))
+                    logger.warning("Whiteboard write batch failed (%d ops, %d requeued): %s", len(batch), len(retry), e)
+                    break
+                finally:
+                    self._inflight = []
+                self._failures = 0
+                elapsed = time.perf_counter() - started
+                self.flushes += 1
+                self.last_flush_seconds = elapsed
+                self.flush_seconds_total += elapsed
+        finally:
+            self._release()
+
+    def _write(self, batch):
+        store = get_store()
+        added = {op['elementId'] for op in batch if op['op'] == 'add'}
+        referenced = {op['elementId'] for op in batch if op['op'] != 'add'}
+        state = {
+            element_id: {k: v for k, v in doc.items() if k not in ('_id', '_rev')}
+            for element_id, doc in store.get_elements(referenced - added).items()
+        }
+
+        elements = {}
+        deleted = set()
+        actions = []
+        for op in batch:
+            element_id = op['elementId']
+            if op['op'] == 'add':
+                doc = dict(op['element'])
+                data = doc.get('content')
+            elif op['op'] == 'update':
+                existing = state.get(element_id)
+                if existing is None:
+                    continue
+                doc = dict(existing, content=op['content'])
+                data = {"before": existing.get('content'), "after": op['content']}
+            else:
+                doc = state.pop(element_id, None)
+                if doc is None:
+                    continue
+                elements.pop(element_id, None)
+                deleted.add(element_id)
+                data = doc.get('content')
+
+            if op['op'] != 'delete':
+                state[element_id] = doc
+                elements[element_id] = doc
+                deleted.discard(element_id)
+
+            action_id = op['actionId']
+            actions.append({
+                "_key": action_id,
+                "actionId": action_id,
+                "projectId": op['projectId'],
+                "userId": op['userId'],
+                "userName": op['userName'],
+                "actionType": ACTION_TYPES[op['op']],
+                "elementId": element_id,
+                "elementType": doc.get('type'),
+                "data": data,
+                "timestamp": op['timestamp']
+            })
+
+        store.write_batch(elements.values(), deleted, actions)
+
+    def shutdown(self):
+        if self._pending:
+            self.flush()
+
+    def stats(self):
+        return {
+            'queueDepth': self.depth(),
+            'flushes': self.flushes,
+            'failedBatches': self.failed_batches,
+            'droppedOps': self.dropped_ops,
+            'overflowOps': self.overflow_ops,
+            'lastFlushSeconds': self.last_flush_seconds,
+            'flushSecondsTotal': self.flush_seconds_total
+        }
+
+whiteboard_writer = WhiteboardWriter()
+atexit.register(whiteboard_writer.shutdown)
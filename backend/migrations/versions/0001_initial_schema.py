@@ -0,0 +1,130 @@
+"""initial schema
+
+Matches the tables previously created by db.create_all() in create_app.
+Existing databases are stamped at this revision instead of running it.
+
+Revision ID: 0001_initial_schema
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('role',
+        sa.Column('role_id', sa.String(length=36), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('role_id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table('team',
+        sa.Column('team_id', sa.String(length=36), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('team_id')
+    )
+    op.create_table('user',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=256), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=True),
+        sa.Column('last_name', sa.String(length=50), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.Integer(), nullable=True),
+        sa.Column('role_id', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['role_id'], ['role.role_id']),
+        sa.PrimaryKeyConstraint('user_id'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table('project',
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('jira_key', sa.String(length=20), nullable=True),
+        sa.Column('jira_url', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.Integer(), nullable=True),
+        sa.Column('created_by', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['created_by'], ['user.user_id']),
+        sa.PrimaryKeyConstraint('project_id')
+    )
+    op.create_table('user_teams',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('team_id', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['team_id'], ['team.team_id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id']),
+        sa.PrimaryKeyConstraint('user_id', 'team_id')
+    )
+    op.create_table('project_teams',
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('team_id', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.project_id']),
+        sa.ForeignKeyConstraint(['team_id'], ['team.team_id']),
+        sa.PrimaryKeyConstraint('project_id', 'team_id')
+    )
+    op.create_table('task',
+        sa.Column('task_id', sa.String(length=36), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('priority', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('deadline', sa.Integer(), nullable=True),
+        sa.Column('jira_key', sa.String(length=20), nullable=True),
+        sa.Column('jira_url', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.Integer(), nullable=True),
+        sa.Column('created_by', sa.String(length=36), nullable=False),
+        sa.Column('updated_at', sa.Integer(), nullable=True),
+        sa.Column('started_at', sa.Integer(), nullable=True),
+        sa.Column('started_by', sa.String(length=36), nullable=True),
+        sa.Column('reviewed_at', sa.Integer(), nullable=True),
+        sa.Column('reviewed_by', sa.String(length=36), nullable=True),
+        sa.Column('completed_at', sa.Integer(), nullable=True),
+        sa.Column('completed_by', sa.String(length=36), nullable=True),
+        sa.Column('accumulated_work_time', sa.Integer(), nullable=False),
+        sa.Column('last_progress_start', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['completed_by'], ['user.user_id']),
+        sa.ForeignKeyConstraint(['created_by'], ['user.user_id']),
+        sa.ForeignKeyConstraint(['project_id'], ['project.project_id']),
+        sa.ForeignKeyConstraint(['reviewed_by'], ['user.user_id']),
+        sa.ForeignKeyConstraint(['started_by'], ['user.user_id']),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_table('task_assignees',
+        sa.Column('task_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['task.task_id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id']),
+        sa.PrimaryKeyConstraint('task_id', 'user_id')
+    )
+    op.create_table('task_activity',
+        sa.Column('activity_id', sa.String(length=36), nullable=False),
+        sa.Column('task_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('action_type', sa.String(length=50), nullable=False),
+        sa.Column('old_status', sa.String(length=50), nullable=True),
+        sa.Column('new_status', sa.String(length=50), nullable=True),
+        sa.Column('timestamp', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['task.task_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id']),
+        sa.PrimaryKeyConstraint('activity_id')
+    )
+
+
+def downgrade():
+    op.drop_table('task_activity')
+    op.drop_table('task_assignees')
+    op.drop_table('task')
+    op.drop_table('project_teams')
+    op.drop_table('user_teams')
+    op.drop_table('project')
+    op.drop_table('user')
+    op.drop_table('team')
+    op.drop_table('role')
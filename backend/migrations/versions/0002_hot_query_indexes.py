@@ -0,0 +1,43 @@
+"""secondary indexes for hot query predicates
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_query_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # (index name, table, columns)
+    ('ix_task_project_created_at_id', 'task', ['project_id', 'created_at', 'task_id']),
+    ('ix_task_project_status', 'task', ['project_id', 'status']),
+    ('ix_task_project_deadline', 'task', ['project_id', 'deadline']),
+    ('ix_task_status', 'task', ['status']),
+    ('ix_task_deadline', 'task', ['deadline']),
+    ('ix_task_activity_task_timestamp', 'task_activity', ['task_id', 'timestamp']),
+    ('ix_project_created_by', 'project', ['created_by']),
+    ('ix_project_created_at_id', 'project', ['created_at', 'project_id']),
+    ('ix_user_created_at_id', 'user', ['created_at', 'user_id']),
+    ('ix_team_name_id', 'team', ['name', 'team_id']),
+    ('ix_user_teams_team_user', 'user_teams', ['team_id', 'user_id']),
+    ('ix_project_teams_team_project', 'project_teams', ['team_id', 'project_id']),
+    ('ix_task_assignees_user_task', 'task_assignees', ['user_id', 'task_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
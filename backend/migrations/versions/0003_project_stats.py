@@ -0,0 +1,40 @@
+"""project task statistics
+
+Rows are created lazily on first use, or in bulk with `flask rebuild-stats`.
+
+Revision ID: 0003_project_stats
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_project_stats'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('project_stats',
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('to_do_count', sa.Integer(), nullable=False),
+        sa.Column('in_progress_count', sa.Integer(), nullable=False),
+        sa.Column('for_review_count', sa.Integer(), nullable=False),
+        sa.Column('done_count', sa.Integer(), nullable=False),
+        sa.Column('low_priority_count', sa.Integer(), nullable=False),
+        sa.Column('medium_priority_count', sa.Integer(), nullable=False),
+        sa.Column('high_priority_count', sa.Integer(), nullable=False),
+        sa.Column('total_work_time', sa.BigInteger(), nullable=False),
+        sa.Column('cycle_time_total', sa.BigInteger(), nullable=False),
+        sa.Column('cycle_time_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.project_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id')
+    )
+
+
+def downgrade():
+    op.drop_table('project_stats')
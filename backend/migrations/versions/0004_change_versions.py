@@ -0,0 +1,41 @@
+"""change versions for ETags and ?since= deltas
+
+Revision ID: 0004_change_versions
+Revises: 0003_project_stats
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_change_versions'
+down_revision = '0003_project_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows start at version 0
+    for table in ('project', 'task', 'team'):
+        op.add_column(table, sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('ix_task_project_version', 'task', ['project_id', 'version'], unique=False)
+
+    op.create_table('task_tombstone',
+        sa.Column('task_id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.project_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index('ix_task_tombstone_project_version', 'task_tombstone', ['project_id', 'version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_task_tombstone_project_version', table_name='task_tombstone')
+    op.drop_table('task_tombstone')
+    op.drop_index('ix_task_project_version', table_name='task')
+    for table in ('team', 'task', 'project'):
+        op.drop_column(table, 'version')
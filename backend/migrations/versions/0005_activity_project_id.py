@@ -0,0 +1,39 @@
+"""denormalized project_id on task_activity for activity feeds
+
+Revision ID: 0005_activity_project_id
+Revises: 0004_change_versions
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_activity_project_id'
+down_revision = '0004_change_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('task_activity', sa.Column('project_id', sa.String(length=36), nullable=True))
+
+    # Backfill from the owning task
+    op.execute(
+        'UPDATE task_activity SET project_id = '
+        '(SELECT task.project_id FROM task WHERE task.task_id = task_activity.task_id)'
+    )
+
+    op.alter_column('task_activity', 'project_id', existing_type=sa.String(length=36), nullable=False)
+    op.create_foreign_key('fk_task_activity_project_id', 'task_activity', 'project',
+                          ['project_id'], ['project_id'], ondelete='CASCADE')
+    op.create_index('ix_task_activity_project_timestamp', 'task_activity', ['project_id', 'timestamp'], unique=False)
+    op.create_index('ix_task_activity_user_timestamp', 'task_activity', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_task_activity_user_timestamp', table_name='task_activity')
+    op.drop_index('ix_task_activity_project_timestamp', table_name='task_activity')
+    op.drop_constraint('fk_task_activity_project_id', 'task_activity', type_='foreignkey')
+    op.drop_column('task_activity', 'project_id')
@@ -2,10 +2,13 @@
 Application Entry Point.
 Initializes the Flask application and runs the Socket.IO server.
 """
+import os
 from app import create_app
 from app.extensions import socketio
 
 app = create_app()
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5001)
+    # Run several instances on different PORTs with SOCKETIO_MESSAGE_QUEUE set to scale out
+    port = int(os.environ.get('PORT') or 5001)
+    socketio.run(app, debug=True, host='0.0.0.0', port=port)
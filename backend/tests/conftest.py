@@ -0,0 +1,149 @@
+"""
+Test fixtures.
+The app runs on the memory storage profile (in-memory SQLite and
+whiteboard store), created and seeded once per test session. Tests add the
+rows they need with the factories below (which return plain records, not
+ORM objects) and use unique names, so they do not depend on each other.
+Requests made with `client` run in their own app context, as in production.
+"""
+import os
+
+# Before config.py is imported: hermetic storage and cheap password hashes
+os.environ['STORAGE_PROFILE'] = 'memory'
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-of-at-least-thirty-two-bytes')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app
+from app.cache import user_cache
+from app.models import db, User, Role, Team, Project, Task
+from app.constants import ROLE_ADMIN, ROLE_MANAGER, ROLE_USER
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@contextmanager
+def _session(app):
+    """Setup code runs in its own app context, so requests never share flask.g or the session with it"""
+    with app.app_context():
+        yield db.session
+        db.session.remove()
+
+def _name(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+def _user_record(user):
+    return SimpleNamespace(user_id=user.user_id, email=user.email, role=user.role.name,
+                           first_name=user.first_name, last_name=user.last_name)
+
+@pytest.fixture
+def make_user(app):
+    """Create a user; returns a record with user_id, email, role, first_name and last_name"""
+    def make(role=ROLE_USER):
+        with _session(app) as session:
+            user = User(email=f"{_name('user')}@example.com", first_name=_name('First'), last_name='Test',
+                        role=Role.query.filter_by(name=role).one(), password_hash='unused')
+            session.add(user)
+            session.commit()
+            return _user_record(user)
+    return make
+
+@pytest.fixture
+def make_team(app):
+    """Create a team with the given user records as members; returns a record with team_id"""
+    def make(members=()):
+        with _session(app) as session:
+            team = Team(name=_name('Team'))
+            team.users.extend(session.get(User, member.user_id) for member in members)
+            session.add(team)
+            session.commit()
+            return SimpleNamespace(team_id=team.team_id, name=team.name)
+    return make
+
+@pytest.fixture
+def make_project(app):
+    """Create a project assigned to the given team records; returns a record with project_id"""
+    def make(creator, teams=()):
+        with _session(app) as session:
+            project = Project(name=_name('Project'), description='', created_by=creator.user_id)
+            project.teams.extend(session.get(Team, team.team_id) for team in teams)
+            session.add(project)
+            session.commit()
+            return SimpleNamespace(project_id=project.project_id, name=project.name)
+    return make
+
+@pytest.fixture
+def make_tasks(app):
+    """Create `count` tasks in a project (extra fields are passed to Task); returns their ids"""
+    def make(project, count, creator, assignees=(), **fields):
+        with _session(app) as session:
+            users = [session.get(User, assignee.user_id) for assignee in assignees]
+            tasks = []
+            for n in range(count):
+                task = Task(name=f"Task {n}", project_id=project.project_id, created_by=creator.user_id,
+                            created_at=1700000000 + n, **fields)
+                task.assignees.extend(users)
+                tasks.append(task)
+            session.add_all(tasks)
+            session.commit()
+            return [task.task_id for task in tasks]
+    return make
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization headers for a user record, with the claims /login puts in the token"""
+    def headers(user):
+        with app.app_context():
+            token = create_access_token(identity=user.user_id,
+                                        additional_claims={'role': user.role, 'email': user.email})
+        return {'Authorization': f"Bearer {token}"}
+    return headers
+
+@pytest.fixture
+def admin(make_user):
+    return make_user(ROLE_ADMIN)
+
+@pytest.fixture
+def manager(make_user):
+    return make_user(ROLE_MANAGER)
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_statements(app):
+    """
+    Context manager recording the SQL statements executed inside it.
+    The user summary cache is cleared first, so counts do not depend on test order.
+    """
+    @contextmanager
+    def counting():
+        counter = StatementCounter()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        user_cache.clear()
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return counting
@@ -0,0 +1,41 @@
+"""
+Project detail ETags.
+Renaming a user shown in a project's tasks must invalidate its cached
+representations and show up in ?since= deltas.
+"""
+
+def test_user_rename_invalidates_project_etag(client, admin, manager, make_user, make_project, make_tasks,
+                                              auth_headers):
+    member = make_user()
+    project = make_project(manager)
+    task_id, = make_tasks(project, 1, manager, assignees=[member])
+    headers = auth_headers(admin)
+    url = f'/projects/{project.project_id}?view=full'
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    version = first.get_json()['version']
+    assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    response = client.put(f'/users/{member.user_id}', json={'firstName': 'Renamed'}, headers=headers)
+    assert response.status_code == 200
+
+    second = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert second.status_code == 200
+    assignees = second.get_json()['tasks'][0]['assignees']
+    assert assignees[0]['firstName'] == 'Renamed'
+
+    delta = client.get(f'/projects/{project.project_id}?since={version}', headers=headers).get_json()
+    assert [task['taskId'] for task in delta['tasks']] == [task_id]
+
+def test_unchanged_name_keeps_project_etag(client, admin, manager, make_user, make_project, make_tasks, auth_headers):
+    member = make_user()
+    project = make_project(manager)
+    make_tasks(project, 1, manager, assignees=[member])
+    headers = auth_headers(admin)
+    url = f'/projects/{project.project_id}'
+
+    etag = client.get(url, headers=headers).headers['ETag']
+    client.put(f'/users/{member.user_id}', json={'isActive': True}, headers=headers)
+    assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,58 @@
+"""
+Project export memory use.
+A project with EXPORT_TEST_ROWS (default 1,000,000) synthetic activity rows
+is streamed through the test client while the process's current resident
+set size is sampled; it must stay within EXPORT_RSS_LIMIT_MB of where it
+started, i.e. not grow with the number of rows.
+"""
+import os
+from sqlalchemy import delete, text
+from app.models import db, TaskActivity
+
+EXPORT_TEST_ROWS = int(os.environ.get('EXPORT_TEST_ROWS', 1000000))
+EXPORT_RSS_LIMIT_MB = int(os.environ.get('EXPORT_RSS_LIMIT_MB', 64))
+
+def current_rss_mb():
+    """Resident set size right now (not the high-water mark ru_maxrss reports)"""
+    with open('/proc/self/statm') as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def test_export_memory_does_not_grow_with_rows(app, client, admin, make_project, make_tasks, auth_headers):
+    project = make_project(admin)
+    task_id, = make_tasks(project, 1, admin)
+    # Generated inside SQLite, so building the rows does not inflate (or pre-grow) this process's heap
+    with app.app_context():
+        db.session.execute(text(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < :rows)
+            INSERT INTO task_activity
+                (activity_id, task_id, project_id, user_id, action_type, old_status, new_status, timestamp)
+            SELECT printf('00000000-0000-0000-0000-%012d', n), :task_id, :project_id, :user_id,
+                   'status_change', 'to_do', 'in_progress', 1700000000 + n / 7
+            FROM seq
+            """
+        ), {'rows': EXPORT_TEST_ROWS, 'task_id': task_id, 'project_id': project.project_id,
+            'user_id': admin.user_id})
+        db.session.commit()
+
+    try:
+        # Before the request: stream_with_context already runs the export up to its first chunk
+        baseline = peak = current_rss_mb()
+        response = client.get(f'/projects/{project.project_id}/export?format=ndjson',
+                               headers=auth_headers(admin), buffered=False)
+        assert response.status_code == 200
+        activity_lines = 0
+        for n, chunk in enumerate(response.iter_encoded()):
+            activity_lines += chunk.count(b'"type":"activity"')
+            if n % 16 == 0:
+                peak = max(peak, current_rss_mb())
+        response.close()
+        peak = max(peak, current_rss_mb())
+    finally:
+        with app.app_context():
+            db.session.execute(delete(TaskActivity).where(TaskActivity.project_id == project.project_id))
+            db.session.commit()
+
+    assert activity_lines == EXPORT_TEST_ROWS
+    assert peak - baseline < EXPORT_RSS_LIMIT_MB, f"RSS grew {peak - baseline:.1f} MB over {EXPORT_TEST_ROWS} rows"
@@ -0,0 +1,17 @@
+"""
+GET /metrics access: a bearer token when METRICS_TOKEN is set, loopback
+clients only otherwise.
+"""
+
+def test_metrics_without_token_only_for_loopback(client):
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code == 403
+
+def test_metrics_with_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    remote = {'REMOTE_ADDR': '10.0.0.5'}
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert b'http_request_duration_seconds' in response.data
@@ -0,0 +1,36 @@
+"""
+Project-scoped reads go through the access context: admins see every
+project, members the projects of their teams, managers also the ones they
+created.
+"""
+import pytest
+
+PROJECT_ROUTES = [
+    '/projects/{project_id}',
+    '/projects/{project_id}/tasks',
+    '/projects/{project_id}/stats',
+    '/projects/{project_id}/activities',
+    '/projects/{project_id}/export',
+]
+
+@pytest.fixture
+def team_project(manager, make_user, make_team, make_project):
+    member = make_user()
+    project = make_project(manager, teams=[make_team([member])])
+    return project, member
+
+@pytest.mark.parametrize('path', PROJECT_ROUTES)
+def test_project_routes_check_visibility(path, client, admin, manager, make_user, team_project, auth_headers):
+    project, member = team_project
+    url = path.format(project_id=project.project_id)
+    outsider = make_user()
+
+    assert client.get(url, headers=auth_headers(outsider)).status_code == 403
+    for user in (member, manager, admin):
+        assert client.get(url, headers=auth_headers(user)).status_code == 200
+
+def test_manager_without_team_or_authorship_is_refused(client, make_user, team_project, auth_headers):
+    project, _ = team_project
+    other_manager = make_user('manager')
+    response = client.get(f'/projects/{project.project_id}', headers=auth_headers(other_manager))
+    assert response.status_code == 403
@@ -0,0 +1,53 @@
+"""
+Project statistics maintenance.
+New projects get their stats row with the project, so task writes only
+update it; projects without one are rebuilt with an upsert.
+"""
+from app.models import db, ProjectStats
+from app.stats import rebuild_project_stats
+
+def _stats(client, project_id, headers):
+    response = client.get(f'/projects/{project_id}/stats', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_new_project_has_zeroed_stats_row(app, client, manager, auth_headers):
+    response = client.post('/projects', json={'name': 'Stats project'}, headers=auth_headers(manager))
+    assert response.status_code == 201
+    project_id = response.get_json()['projectId']
+    with app.app_context():
+        stats = db.session.get(ProjectStats, project_id)
+        assert stats is not None
+        assert stats.to_do_count == 0 and stats.total_work_time == 0
+
+def test_tasks_on_fresh_project_are_counted(client, manager, auth_headers):
+    headers = auth_headers(manager)
+    project_id = client.post('/projects', json={'name': 'Fresh project'}, headers=headers).get_json()['projectId']
+    for n, priority in enumerate(['high', 'medium', 'medium']):
+        response = client.post(f'/projects/{project_id}/tasks', json={'name': f'Task {n}', 'priority': priority},
+                               headers=headers)
+        assert response.status_code == 201
+
+    stats = _stats(client, project_id, headers)
+    assert stats['taskCount'] == 3
+    assert stats['byStatus']['to_do'] == 3
+    assert stats['byPriority'] == {'low': 0, 'medium': 2, 'high': 1}
+
+def test_project_without_stats_row_is_rebuilt(app, client, manager, make_project, make_tasks, auth_headers):
+    # Projects from before stats rows existed (the factory adds none)
+    project = make_project(manager)
+    make_tasks(project, 2, manager, priority='low')
+    headers = auth_headers(manager)
+
+    response = client.post(f'/projects/{project.project_id}/tasks', json={'name': 'First write'}, headers=headers)
+    assert response.status_code == 201
+    stats = _stats(client, project.project_id, headers)
+    assert stats['taskCount'] == 3
+    assert stats['byPriority']['low'] == 2
+
+    # A stale rebuild path must not fail on an existing row either
+    with app.app_context():
+        rebuild_project_stats(project.project_id)
+        rebuild_project_stats(project.project_id)
+        db.session.commit()
+    assert _stats(client, project.project_id, headers)['taskCount'] == 3
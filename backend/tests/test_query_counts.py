@@ -0,0 +1,56 @@
+"""
+Statement counts of the task list endpoints.
+Serializing a task list must not issue queries per task: the number of SQL
+statements is the same for a small and a large project.
+"""
+import pytest
+
+def _project_with_tasks(count, admin, make_user, make_team, make_project, make_tasks):
+    """A project whose tasks reference several users (creator, starter, reviewer, completer, assignees)"""
+    members = [make_user() for _ in range(3)]
+    project = make_project(admin, teams=[make_team(members)])
+    make_tasks(project, count, admin, assignees=members[:2], status='done',
+               started_by=members[0].user_id, started_at=1700000100,
+               reviewed_by=members[1].user_id, reviewed_at=1700000200,
+               completed_by=members[2].user_id, completed_at=1700000300)
+    return project, members
+
+@pytest.mark.parametrize('path', [
+    '/projects/{project_id}/tasks',
+    '/projects/{project_id}/tasks?view=summary',
+    '/projects/{project_id}/tasks?limit=100',
+    '/projects/{project_id}',
+    '/projects/{project_id}?view=summary',
+])
+def test_project_task_lists_use_constant_statements(path, client, admin, auth_headers, count_statements,
+                                                    make_user, make_team, make_project, make_tasks):
+    counts = []
+    for size in (3, 30):
+        project, _ = _project_with_tasks(size, admin, make_user, make_team, make_project, make_tasks)
+        with count_statements() as statements:
+            response = client.get(path.format(project_id=project.project_id), headers=auth_headers(admin))
+        assert response.status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1], f"{path}: {counts[0]} statements for 3 tasks, {counts[1]} for 30"
+
+@pytest.mark.parametrize('path', ['/tasks/my-tasks', '/tasks/my-tasks?view=summary'])
+def test_my_tasks_uses_constant_statements(path, client, admin, auth_headers, count_statements,
+                                           make_user, make_team, make_project, make_tasks):
+    counts = []
+    for size in (3, 30):
+        _, members = _project_with_tasks(size, admin, make_user, make_team, make_project, make_tasks)
+        with count_statements() as statements:
+            response = client.get(path, headers=auth_headers(members[0]))
+        assert response.status_code == 200
+        assert len(response.get_json()) == size
+        counts.append(len(statements))
+    assert counts[0] == counts[1], f"{path}: {counts[0]} statements for 3 tasks, {counts[1]} for 30"
+
+def test_task_serialization_keeps_user_names(client, admin, auth_headers, make_user, make_team,
+                                             make_project, make_tasks):
+    project, members = _project_with_tasks(2, admin, make_user, make_team, make_project, make_tasks)
+    tasks = client.get(f'/projects/{project.project_id}/tasks', headers=auth_headers(admin)).get_json()
+    task = tasks[0]
+    assert task['createdByName'] == f"{admin.first_name} {admin.last_name}"
+    assert task['completedByName'] == f"{members[2].first_name} {members[2].last_name}"
+    assert sorted(a['userId'] for a in task['assignees']) == sorted(m.user_id for m in members[:2])
@@ -0,0 +1,76 @@
+"""
+Query plans of the hot predicates.
+Each listed query must be served by its index, never by a full table scan.
+Runs on SQLite (EXPLAIN QUERY PLAN) always, and on MySQL (EXPLAIN) when
+TEST_MYSQL_URI points at a scratch database; the tables are created there
+from the models if missing.
+"""
+import os
+import pytest
+from sqlalchemy import select, create_engine, text
+from app.models import (
+    db, Task, TaskActivity, TaskTombstone, Project, user_teams, project_teams, task_assignees
+)
+
+ID = '00000000-0000-0000-0000-000000000000'
+
+# (name, statement, index expected in the plan)
+HOT_QUERIES = [
+    ('project tasks', select(Task.task_id).where(Task.project_id == ID).order_by(Task.created_at, Task.task_id),
+     'ix_task_project_created_at_id'),
+    ('project tasks by status', select(Task.task_id).where(Task.project_id == ID, Task.status == 'to_do'),
+     'ix_task_project_status'),
+    ('project tasks by deadline', select(Task.task_id).where(Task.project_id == ID, Task.deadline < 1700000000),
+     'ix_task_project_deadline'),
+    ('tasks by status', select(Task.task_id).where(Task.status == 'in_progress'), 'ix_task_status'),
+    ('tasks by deadline', select(Task.task_id).where(Task.deadline < 1700000000), 'ix_task_deadline'),
+    ('project task delta', select(Task.task_id).where(Task.project_id == ID, Task.version > 10),
+     'ix_task_project_version'),
+    ('project tombstones', select(TaskTombstone.task_id).where(TaskTombstone.project_id == ID,
+                                                                TaskTombstone.version > 10),
+     'ix_task_tombstone_project_version'),
+    ('task activity feed', select(TaskActivity.activity_id).where(TaskActivity.task_id == ID)
+     .order_by(TaskActivity.timestamp), 'ix_task_activity_task_timestamp'),
+    ('project activity feed', select(TaskActivity.activity_id).where(TaskActivity.project_id == ID)
+     .order_by(TaskActivity.timestamp), 'ix_task_activity_project_timestamp'),
+    ('user activity feed', select(TaskActivity.activity_id).where(TaskActivity.user_id == ID)
+     .order_by(TaskActivity.timestamp), 'ix_task_activity_user_timestamp'),
+    ('projects created by', select(Project.project_id).where(Project.created_by == ID), 'ix_project_created_by'),
+    ('team members', select(user_teams.c.user_id).where(user_teams.c.team_id == ID), 'ix_user_teams_team_user'),
+    ('team projects', select(project_teams.c.project_id).where(project_teams.c.team_id == ID),
+     'ix_project_teams_team_project'),
+    ('assigned tasks', select(task_assignees.c.task_id).where(task_assignees.c.user_id == ID),
+     'ix_task_assignees_user_task'),
+]
+
+def _sql(statement, engine):
+    return str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+
+@pytest.mark.parametrize('name, statement, index', HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_sqlite_plan_uses_index(name, statement, index, app):
+    with app.app_context():
+        engine = db.engine
+        with engine.connect() as conn:
+            plan = [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + _sql(statement, engine)))]
+    full_scans = [step for step in plan if step.startswith('SCAN') and 'USING' not in step]
+    assert not full_scans, f"{name}: full scan in {plan}"
+    assert any(index in step for step in plan), f"{name}: {index} not used in {plan}"
+
+@pytest.fixture(scope='module')
+def mysql_engine():
+    uri = os.environ.get('TEST_MYSQL_URI')
+    if not uri:
+        pytest.skip("TEST_MYSQL_URI is not set")
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.mark.parametrize('name, statement, index', HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_mysql_plan_uses_index(name, statement, index, mysql_engine):
+    with mysql_engine.connect() as conn:
+        plan = conn.execute(text('EXPLAIN ' + _sql(statement, mysql_engine))).mappings().all()
+    # Steps without a table are answered without reading any (e.g. an empty table)
+    steps = [step for step in plan if step['table']]
+    assert all(step['type'] != 'ALL' for step in steps), f"{name}: full scan in {plan}"
+    assert not steps or any(step['key'] == index for step in steps), f"{name}: {index} not used in {plan}"
@@ -0,0 +1,58 @@
+"""
+Batch task endpoints.
+Malformed items are rejected with a 400 naming them, before any id is used.
+"""
+import pytest
+
+@pytest.fixture
+def batch_setup(manager, make_project, make_tasks, auth_headers):
+    project = make_project(manager)
+    task_ids = make_tasks(project, 2, manager)
+    return project, task_ids, auth_headers(manager)
+
+@pytest.mark.parametrize('path, body', [
+    ('/tasks/batch', {'tasks': [{'name': 'A', 'assigneeIds': 5}]}),
+    ('/tasks/batch', {'tasks': [{'name': 'A', 'assigneeIds': [{}]}]}),
+    ('/tasks/batch', {'tasks': [{'name': 'A', 'deadline': [1]}]}),
+    ('/tasks/batch/assignees', {'items': [{'taskId': '{task}', 'assigneeIds': 5}]}),
+    ('/tasks/batch/assignees', {'items': [{'taskId': '{task}', 'assigneeIds': [{}]}]}),
+    ('/tasks/batch/assignees', {'taskIds': ['{task}'], 'assigneeIds': 5}),
+    ('/tasks/batch/assignees', {'items': [{'taskId': [1], 'assigneeIds': []}]}),
+    ('/tasks/batch/status', {'items': [{'taskId': [1], 'status': 'done'}]}),
+    ('/tasks/batch/status', {'items': [{'taskId': '{task}', 'status': {'a': 1}}]}),
+    ('/tasks/batch/status', {'taskIds': [{}], 'status': 'done'}),
+])
+def test_malformed_batch_items_are_400(client, batch_setup, path, body):
+    project, task_ids, headers = batch_setup
+    body = _fill(body, task_ids[0])
+    if path == '/tasks/batch':
+        body['projectId'] = project.project_id
+    response = client.post(path, json=body, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['index'] == 0
+
+def test_batch_body_must_be_object(client, batch_setup):
+    _, _, headers = batch_setup
+    assert client.post('/tasks/batch/status', json=[1], headers=headers).status_code == 400
+
+def test_valid_batch_status_and_assignees(client, manager, batch_setup):
+    _, task_ids, headers = batch_setup
+    response = client.post('/tasks/batch/status', json={'taskIds': task_ids, 'status': 'in_progress'}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 2
+
+    response = client.post('/tasks/batch/assignees', json={'items': [
+        {'taskId': task_ids[0], 'assigneeIds': [manager.user_id]},
+        {'taskId': 'missing', 'assigneeIds': []},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results[0] == {'taskId': task_ids[0], 'ok': True, 'assigneeIds': [manager.user_id]}
+    assert results[1]['ok'] is False
+
+def _fill(value, task_id):
+    if isinstance(value, dict):
+        return {key: _fill(item, task_id) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, task_id) for item in value]
+    return task_id if value == '{task}' else value
@@ -0,0 +1,48 @@
+"""
+Query plans of the whiteboard AQL.
+Runs when TEST_ARANGO_URL points at an ArangoDB server: a scratch database
+(TEST_ARANGO_DB, dropped afterwards) is provisioned like the app does, and
+every query must read through its persistent index, never enumerate the
+collection.
+"""
+import os
+import pytest
+from app.extensions import provision_arango
+from app.whiteboard import LIST_ELEMENTS, HISTORY, CHANGES_SINCE, HISTORY_LIMIT
+
+# (query, bind vars, index expected in the plan, whether the index also covers the SORT)
+WHITEBOARD_QUERIES = {
+    'list_elements': (LIST_ELEMENTS, {'pid': 'p'}, 'idx_elements_project', False),
+    'history': (HISTORY, {'pid': 'p', 'limit': HISTORY_LIMIT}, 'idx_actions_project_timestamp', True),
+    'changes_since': (CHANGES_SINCE, {'pid': 'p', 'version': 0, 'limit': 100}, 'idx_actions_project_version', True),
+}
+
+@pytest.fixture(scope='module')
+def arango_db():
+    url = os.environ.get('TEST_ARANGO_URL')
+    if not url:
+        pytest.skip("TEST_ARANGO_URL is not set")
+    from arango import ArangoClient
+    settings = {
+        'db_name': os.environ.get('TEST_ARANGO_DB', 'projecttask_test'),
+        'username': os.environ.get('TEST_ARANGO_USERNAME', 'root'),
+        'password': os.environ.get('TEST_ARANGO_PASSWORD', ''),
+    }
+    client = ArangoClient(hosts=url)
+    database = client.db(settings['db_name'], username=settings['username'], password=settings['password'])
+    provision_arango(client, database, settings)
+    yield database
+    client.db('_system', username=settings['username'], password=settings['password']) \
+        .delete_database(settings['db_name'], ignore_missing=True)
+    client.close()
+
+@pytest.mark.parametrize('name', WHITEBOARD_QUERIES)
+def test_arango_plan_uses_index(name, arango_db):
+    query, bind_vars, index, sorted_by_index = WHITEBOARD_QUERIES[name]
+    plan = arango_db.aql.explain(query, bind_vars=bind_vars, all_plans=False)
+    node_types = [node['type'] for node in plan['nodes']]
+    assert 'EnumerateCollectionNode' not in node_types, f"{name}: collection scan in {node_types}"
+    used = [i['name'] for node in plan['nodes'] if node['type'] == 'IndexNode' for i in node['indexes']]
+    assert index in used, f"{name}: {index} not used (indexes: {used})"
+    if sorted_by_index:
+        assert 'SortNode' not in node_types, f"{name}: sorted after reading in {node_types}"
@@ -0,0 +1,64 @@
+/**
+ * Live task updates over Socket.IO
+ */
+import { io } from 'socket.io-client';
+import { API_BASE_URL } from './api';
+
+const TASK_EVENTS = ['task_created', 'task_updated', 'task_status_changed', 'task_deleted'];
+
+/**
+ * Apply one task event to a task list. Returns the new list, or null when
+ * the event was too large to describe and the caller should refetch.
+ * Entries older than what the list already holds are ignored, so events
+ * and our own HTTP responses can arrive in any order.
+ */
+export function applyTaskEvent(tasks, event, payload) {
+  if (payload.truncated) return null;
+
+  const byId = new Map(tasks.map(t => [t.taskId, t]));
+  for (const entry of payload.tasks) {
+    const current = byId.get(entry.taskId);
+    if (current && current.version >= entry.version) continue;
+
+    if (event === 'task_created') {
+      byId.set(entry.taskId, entry);
+    } else if (event === 'task_deleted') {
+      byId.delete(entry.taskId);
+    } else if (current) {
+      byId.set(entry.taskId, { ...current, ...entry.changes, version: entry.version });
+    }
+  }
+  return Array.from(byId.values());
+}
+
+/**
+ * Listen to a project's task events.
+ * `onEvent(event, payload)` gets every task event, `onReconnect()` is called
+ * after a dropped connection comes back (events may have been missed).
+ * Returns a function that unsubscribes and closes the socket.
+ */
+export function subscribeProjectTasks(projectId, { onEvent, onReconnect }) {
+  const transports = import.meta.env.VITE_SOCKET_TRANSPORTS;
+  const socket = io(API_BASE_URL, {
+    transports: transports ? transports.split(',') : undefined,
+    withCredentials: true
+  });
+
+  let connectedBefore = false;
+  socket.on('connect', () => {
+    socket.emit('subscribe_tasks', { projectId });
+    if (connectedBefore && onReconnect) onReconnect();
+    connectedBefore = true;
+  });
+
+  TASK_EVENTS.forEach(event => {
+    socket.on(event, payload => {
+      if (payload.projectId === projectId) onEvent(event, payload);
+    });
+  });
+
+  return () => {
+    socket.emit('unsubscribe_tasks', { projectId });
+    socket.disconnect();
+  };
+}